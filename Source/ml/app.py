@@ -1,21 +1,156 @@
-from fastapi import FastAPI, HTTPException
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import joblib
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
 import os
-import re
-import pandas as pd
-from typing import List, Optional
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+# pandas, joblib/scikit-learn and the model formats are imported when the model loads
+from inference_pool import InferencePool, PoolSaturated
+from job_queue import CSV_TYPE, DATASET_TYPES, JobQueue, parse_dataset
+from cascade import load_cascade
+from columnar import RESULT_COLUMNS, ScoringColumns, decode_columns, encode_columns, media_type
+from metrics import REQUEST_SECONDS, REQUESTS_TOTAL, SCORING_TIER_TOTAL, STAGE_SECONDS, RequestMetricsMiddleware, render_counter, render_gauge, stage_timer
+from micro_batcher import MicroBatcher
+from near_duplicate import NearDuplicateIndex
+from profiler import ProfileSession
+from model_registry import CASCADE_FILE, COMPACT_FILE, JOBLIB_FILE, ModelRegistry, ServingModel, load_serving_model
+from result_cache import ResultCache, cache_key
+from entity_registry import EntityIndex, mention_indicators, name_similarity
+from indicators import build_risk_indicators, scan_keywords, scan_returns, scan_text, scan_timeframe
+
+print(f"⏱️ Imports finished in {(time.perf_counter() - IMPORT_STARTED) * 1000:.0f}ms")
 
 MODEL_PATH = os.environ.get("ML_MODEL_PATH", os.path.join(os.path.dirname(__file__), "model.joblib"))
+# Memory-mapped array artifact written by train.py; ML_MODEL_FORMAT is auto, joblib or compact
+COMPACT_MODEL_PATH = os.environ.get("ML_COMPACT_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".compact")
+MODEL_FORMAT = os.environ.get("ML_MODEL_FORMAT", "auto")
+# Cascade mode: the rule pre-screen calibrated by train.py answers confident cases before the model
+CASCADE_ENABLED = os.environ.get("ML_CASCADE", "false").lower() in ("1", "true", "yes")
+CASCADE_MODEL_PATH = os.environ.get("ML_CASCADE_PATH", os.path.splitext(MODEL_PATH)[0] + ".cascade.json")
+# Versioned models published by train.py; the registry's active version wins over MODEL_PATH
+MODEL_REGISTRY_PATH = os.environ.get("ML_MODEL_REGISTRY", os.path.join(os.path.dirname(__file__), "models"))
+# Seconds between checks of the registry's active version; 0 disables the watcher
+MODEL_WATCH_INTERVAL = float(os.environ.get("ML_MODEL_WATCH_INTERVAL", "10"))
+# The /admin endpoints require this value in the X-Admin-Token header; without it they
+# answer 403, unless ML_ADMIN_OPEN explicitly opens them (local development only)
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN") or None
+ADMIN_OPEN = os.environ.get("ML_ADMIN_OPEN", "false").lower() in ("1", "true", "yes")
+# Memory-map the arrays inside model.joblib instead of copying them into the heap
+MODEL_MMAP = os.environ.get("ML_MODEL_MMAP", "true").lower() in ("1", "true", "yes")
+# Train in a background process when no model exists, serving /health meanwhile
+TRAIN_ON_STARTUP = os.environ.get("ML_TRAIN_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+TRAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "train.py")
+# Advisor/company registry CSVs indexed for /verify, and seconds between checks for changes (0 disables)
+REGISTRY_DATA_DIR = os.environ.get("ML_REGISTRY_DATA", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "DBMount")))
+REGISTRY_WATCH_INTERVAL = float(os.environ.get("ML_REGISTRY_WATCH_INTERVAL", "30"))
+# Set only when the CSVs list every registered advisor and company: IDs cited in messages
+# but missing from them are then reported as UNREGISTERED rather than UNKNOWN
+REGISTRY_COMPLETE = os.environ.get("ML_REGISTRY_COMPLETE", "false").lower() in ("1", "true", "yes")
+# Name similarity at which a name counts as matching a registered entity
+VERIFY_MIN_SIMILARITY = float(os.environ.get("ML_VERIFY_MIN_SIMILARITY", "0.7"))
+MAX_VERIFY_RESULTS = 50
+MAX_BATCH_SIZE = int(os.environ.get("ML_MAX_BATCH_SIZE", "1000"))
+# Binary columnar bodies skip per-item validation, so they may carry more rows
+MAX_COLUMNAR_ROWS = int(os.environ.get("ML_MAX_COLUMNAR_ROWS", "10000"))
+FAST_PATH_ENABLED = os.environ.get("ML_FAST_PATH", "true").lower() in ("1", "true", "yes")
+# Inference pool: "thread" or "process"; 0 workers scores inline on the event loop
+POOL_MODE = os.environ.get("ML_POOL_MODE", "thread")
+POOL_WORKERS = int(os.environ.get("ML_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+POOL_MAX_QUEUE = int(os.environ.get("ML_POOL_MAX_QUEUE", "64"))
+RETRY_AFTER_SECONDS = int(os.environ.get("ML_RETRY_AFTER", "1"))
+# Optional coalescing of concurrent /score calls into one vectorized prediction
+MICRO_BATCH_ENABLED = os.environ.get("ML_MICRO_BATCH", "false").lower() in ("1", "true", "yes")
+MICRO_BATCH_WINDOW_MS = float(os.environ.get("ML_MICRO_BATCH_WINDOW_MS", "5"))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("ML_MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_QUEUE = int(os.environ.get("ML_MICRO_BATCH_MAX_QUEUE", "1024"))
+# Result cache for repeated messages; ML_CACHE_DB adds a persistent SQLite tier
+CACHE_ENABLED = os.environ.get("ML_CACHE", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.environ.get("ML_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.environ.get("ML_CACHE_TTL", "3600"))
+CACHE_DB_PATH = os.environ.get("ML_CACHE_DB") or None
+# Rows kept in the SQLite tier; the oldest beyond this are pruned every ML_CACHE_DB_PRUNE_EVERY writes
+CACHE_DB_MAX_ENTRIES = int(os.environ.get("ML_CACHE_DB_MAX_ENTRIES", "100000"))
+CACHE_DB_PRUNE_EVERY = int(os.environ.get("ML_CACHE_DB_PRUNE_EVERY", "1000"))
+
+# Near-duplicate fast path: reposted scam templates get the verdict of the message they copy.
+# Off by default: it answers for text the model never saw, so enable it once its precision is measured
+NEAR_DUP_ENABLED = os.environ.get("ML_NEAR_DUP", "false").lower() in ("1", "true", "yes")
+NEAR_DUP_THRESHOLD = float(os.environ.get("ML_NEAR_DUP_THRESHOLD", "0.7"))
+NEAR_DUP_MIN_PROBABILITY = float(os.environ.get("ML_NEAR_DUP_MIN_PROBABILITY", "0.9"))
+NEAR_DUP_MAX_ENTRIES = int(os.environ.get("ML_NEAR_DUP_MAX_ENTRIES", "5000"))
+NEAR_DUP_TTL_SECONDS = float(os.environ.get("ML_NEAR_DUP_TTL", "86400"))
+# Asynchronous bulk jobs: a SQLite queue scored chunk by chunk in niced
+# background processes while interactive scoring is idle
+JOBS_ENABLED = os.environ.get("ML_JOBS", "true").lower() in ("1", "true", "yes")
+JOB_DB_PATH = os.environ.get("ML_JOB_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite"))
+JOB_WORKERS = int(os.environ.get("ML_JOB_WORKERS", "1"))
+JOB_CHUNK_ROWS = int(os.environ.get("ML_JOB_CHUNK_ROWS", "200"))
+JOB_MAX_ROWS = int(os.environ.get("ML_JOB_MAX_ROWS", "1000000"))
+JOB_NICE = int(os.environ.get("ML_JOB_NICE", "10"))
+JOB_LEASE_SECONDS = float(os.environ.get("ML_JOB_LEASE", "120"))
+JOB_POLL_SECONDS = float(os.environ.get("ML_JOB_POLL_INTERVAL", "2"))
+JOB_IDLE_SECONDS = float(os.environ.get("ML_JOB_IDLE_MS", "20")) / 1000
+JOB_RETENTION_SECONDS = float(os.environ.get("ML_JOB_RETENTION", "604800"))
+JOB_MAX_ATTEMPTS = 3
+MAX_JOB_CHUNK_ROWS = 10000
+MAX_PROFILE_SECONDS = 300
+MIN_PROFILE_INTERVAL_MS = 1
 
 app = FastAPI(
     title="Financial Fraud Detection API",
     description="API for detecting fraudulent financial advice using ML",
     version="1.0.0"
 )
+app.add_middleware(RequestMetricsMiddleware)
 
-# Global variable for model
+# Global variable for model: the ServingModel requests are scored with, replaced as a whole on reload
 model = None
+# Model that was active before the last swap, kept loaded for instant rollback
+previous_model = None
+# Lifecycle of the model: loading, training, ready or unavailable
+model_state = "loading"
+# Training process started when no model was found
+training_process = None
+# Registry version that failed to load, so the watcher does not retry it forever
+failed_version = None
+# Serializes reloads, rollbacks and the registry watcher
+reload_lock = asyncio.Lock()
+registry = ModelRegistry(MODEL_REGISTRY_PATH)
+# Worker pool for CPU-bound scoring
+inference_pool = None
+# Scheduler that coalesces concurrent /score calls
+micro_batcher = None
+# Cache of fraud probabilities keyed by message content
+result_cache = None
+# MinHash/LSH index of recent confident scam verdicts
+near_duplicates = None
+# Index of registered advisors and companies, replaced as a whole when the CSVs change
+entity_index = None
+# Queue of bulk scoring jobs, the niced process that scores their chunks
+# and the event that wakes the job runners when a job is submitted
+job_queue = None
+job_executor = None
+job_submitted = None
+# The running or most recent /admin/profile session
+profiler_session = None
+# Set by serve.py in pre-forked workers: this worker's slot, the supervisor
+# that owns model loading and the file it writes per-worker status to
+WORKER_INDEX = None
+SUPERVISOR_PID = None
+WORKER_STATUS_PATH = None
 
 class ScoreRequest(BaseModel):
     text: str
@@ -31,11 +166,26 @@ class ScoreRequest(BaseModel):
             }
         }
 
+class EntityMention(BaseModel):
+    kind: str
+    name: Optional[str] = None
+    registration_id: Optional[str] = None
+    status: Optional[str] = None
+    matched_text: str
+
+class NearDuplicate(BaseModel):
+    cluster_id: str
+    similarity: float
+
 class ScoreResponse(BaseModel):
     fraud_probability: float
     prediction: str
     confidence_level: str
     risk_indicators: List[str]
+    # rules, cache, near_duplicate or model
+    tier: str = "model"
+    entity_mentions: List[EntityMention] = []
+    near_duplicate: Optional[NearDuplicate] = None
     
     class Config:
         schema_extra = {
@@ -43,107 +193,95 @@ class ScoreResponse(BaseModel):
                 "fraud_probability": 0.85,
                 "prediction": "FRAUDULENT",
                 "confidence_level": "HIGH",
-                "risk_indicators": ["Guaranteed returns promised", "Urgency tactics"]
+                "risk_indicators": ["Guaranteed returns promised", "Urgency tactics"],
+                "tier": "model",
+                "entity_mentions": [
+                    {"kind": "registration_id", "registration_id": "INA123456789", "status": "UNKNOWN", "matched_text": "INA123456789"}
+                ]
+            }
+        }
+
+class BatchScoreRequest(BaseModel):
+    items: List[ScoreRequest]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "items": [
+                    {"text": "Guaranteed 25% returns in 2 weeks! Join our Telegram group."},
+                    {"text": "SEBI registered advisor. Mutual funds are subject to market risks."}
+                ]
             }
         }
 
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None
+
+class ProfileRequest(BaseModel):
+    seconds: float = 30
+    requests: Optional[int] = None
+    interval_ms: float = 5
+    include_idle: bool = False
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "seconds": 60,
+                "requests": 500,
+                "interval_ms": 5
+            }
+        }
+
+class VerifyRequest(BaseModel):
+    registration_id: Optional[str] = None
+    name: Optional[str] = None
+    kind: Optional[str] = None
+    top_k: int = 5
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "registration_id": "INA000017523",
+                "name": "1 Finance Pvt Ltd",
+                "top_k": 3
+            }
+        }
+
+class RegistryEntity(BaseModel):
+    registration_id: str
+    name: str
+    kind: str
+    status: Optional[str] = None
+    category: Optional[str] = None
+
+class RegistryMatch(RegistryEntity):
+    score: float
+
+class VerifyResponse(BaseModel):
+    status: str
+    registered: Optional[RegistryEntity] = None
+    name_similarity: Optional[float] = None
+    matches: List[RegistryMatch]
+    took_ms: float
+
+class BatchScoreItem(BaseModel):
+    index: int
+    result: Optional[ScoreResponse] = None
+    error: Optional[str] = None
+
+class BatchScoreResponse(BaseModel):
+    results: List[BatchScoreItem]
+    total: int
+    failed: int
+
 def extract_returns_and_timeframe(text: str) -> tuple:
     """Extract returns percentage and timeframe from text"""
     text_lower = text.lower()
-    
-    # Extract return percentages
-    returns_matches = re.findall(r'(\d+)%', text)
-    extracted_returns = None
-    if returns_matches:
-        # Take the highest percentage mentioned
-        extracted_returns = max(int(r) for r in returns_matches if r.isdigit())
-    
-    # Extract timeframes
-    extracted_timeframe = None
-    timeframe_patterns = [
-        (r'\b(\d+)\s*hours?\b', 'hours'),
-        (r'\b(\d+)\s*days?\b', 'days'),
-        (r'\b(\d+)\s*weeks?\b', 'weeks'),
-        (r'\b(\d+)\s*months?\b', 'months'),
-        (r'\b(\d+)\s*years?\b', 'years'),
-        (r'\bdaily\b', 'daily'),
-        (r'\bweekly\b', 'weekly'),
-        (r'\bmonthly\b', 'monthly'),
-        (r'\bannual(?:ly)?\b', 'annual'),
-        (r'\b24\s*hours?\b', '24 hours'),
-        (r'\b48\s*hours?\b', '48 hours'),
-        (r'\bovernight\b', 'overnight'),
-        (r'\bimmediate(?:ly)?\b', 'immediate')
-    ]
-    
-    for pattern, timeframe_type in timeframe_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            if timeframe_type in ['hours', 'days', 'weeks', 'months', 'years']:
-                extracted_timeframe = f"{match.group(1)} {timeframe_type}"
-            else:
-                extracted_timeframe = timeframe_type
-            break
-    
-    return extracted_returns, extracted_timeframe
+    return scan_returns(text_lower), scan_timeframe(text_lower)
 
 def extract_risk_indicators(text: str, roi_percentage: Optional[int] = None, timeframe: Optional[str] = None) -> List[str]:
     """Extract specific risk indicators from text and additional fields"""
-    indicators = []
-    text_lower = text.lower()
-    
-    # Guaranteed returns and risk-free promises
-    if re.search(r'\b(guaranteed|assured|risk[-\s]?free|100%[-\s]?safe|zero[-\s]?risk)\b', text_lower):
-        indicators.append("Guaranteed/risk-free returns promised")
-    
-    # Urgency and pressure tactics
-    if re.search(r'\b(urgent|hurry|limited[-\s]?time|last[-\s]?chance|act[-\s]?now|immediate|today[-\s]?only|expires)\b', text_lower):
-        indicators.append("Urgency and pressure tactics")
-    
-    # Suspicious communication channels
-    if re.search(r'\b(telegram|whatsapp|join[-\s]?group|premium[-\s]?group|vip[-\s]?group)\b', text_lower):
-        indicators.append("Suspicious communication channels")
-    
-    # Direct payment requests
-    if re.search(r'\b(send[-\s]?money|pay[-\s]?now|processing[-\s]?fee|registration[-\s]?fee|@paytm|@phonepe|@upi)\b', text_lower):
-        indicators.append("Direct payment requests")
-    
-    # Pre-IPO and insider trading claims
-    if re.search(r'\b(pre[-\s]?ipo|insider[-\s]?(trading|tips|information)|exclusive[-\s]?allocation|secret[-\s]?(tips|formula))\b', text_lower):
-        indicators.append("Pre-IPO or insider trading claims")
-    
-    # Unrealistic return percentages (>20% in short timeframe)
-    if roi_percentage:
-        if roi_percentage > 50:
-            indicators.append(f"Extremely unrealistic return percentage ({roi_percentage}%)")
-        elif roi_percentage > 20:
-            indicators.append(f"Unrealistic return percentage ({roi_percentage}%)")
-    
-    # Short timeframe promises
-    if re.search(r'\b(daily|24[-\s]?hours?|1[-\s]?week|2[-\s]?weeks?|few[-\s]?days)\b.*\b(profit|returns?|money)\b', text_lower):
-        indicators.append("Short-term high return promises")
-    
-    # Timeframe-based risk analysis
-    if timeframe:
-        timeframe_lower = timeframe.lower()
-        high_risk_timeframes = ['daily', 'hours', '24 hours', '48 hours', 'overnight', 'immediate']
-        if any(risk_tf in timeframe_lower for risk_tf in high_risk_timeframes):
-            indicators.append(f"Suspicious short timeframe ({timeframe})")
-        
-        # Check for unrealistic returns in short timeframes
-        if roi_percentage and roi_percentage > 10:
-            if any(risk_tf in timeframe_lower for risk_tf in ['daily', 'hours', 'overnight']):
-                indicators.append("High returns promised in very short timeframe")
-    
-    # Celebrity or authority false endorsements
-    if re.search(r'\b(warren[-\s]?buffett|rbi[-\s]?governor|sebi[-\s]?insider|government[-\s]?scheme)\b', text_lower):
-        indicators.append("False authority endorsements")
-    
-    # Get-rich-quick schemes
-    if re.search(r'\b(get[-\s]?rich[-\s]?quick|become[-\s]?millionaire|double[-\s]?money|money[-\s]?doubling)\b', text_lower):
-        indicators.append("Get-rich-quick scheme indicators")
-    
-    return indicators
+    return build_risk_indicators(scan_keywords(text.lower()), roi_percentage, timeframe)
 
 def get_confidence_level(probability: float) -> str:
     """Determine confidence level based on probability"""
@@ -160,31 +298,670 @@ def get_prediction_label(probability: float) -> str:
     """Get prediction label based on probability"""
     return "FRAUDULENT" if probability > 0.5 else "LEGITIMATE"
 
-@app.on_event("startup")
-async def load_model():
-    """Load the ML model on startup"""
-    global model
+def resolve_inputs(text: str, roi_percentage: Optional[int], timeframe: Optional[str]) -> tuple:
+    """Model ROI, timeframe and keyword hits of one message from a single scan of the text"""
+    scan = scan_text(text)
+    return roi_percentage or scan.returns or 0, timeframe or scan.timeframe or 'unknown', scan.keywords
+
+def resolve_features(request: ScoreRequest) -> tuple:
+    """Build the model input row and keyword hits from a single scan of the text"""
+    roi_percentage, timeframe, keywords = resolve_inputs(request.text, request.roi_percentage, request.timeframe)
+    features = {
+        'text': request.text,
+        'roi_percentage': roi_percentage,
+        'timeframe': timeframe
+    }
+    return features, keywords
+
+def annotate(text: str, roi_percentage, timeframe: str, keywords: frozenset) -> tuple:
+    """Risk indicators and registry mentions of one scored message"""
+    with stage_timer("risk_indicators"):
+        risk_indicators = build_risk_indicators(keywords, roi_percentage, timeframe)
+    # Registry data changes independently of the model, so mentions are never cached
+    index = entity_index
+    mentions = []
+    if index is not None:
+        with stage_timer("entity_scan"):
+            mentions = index.scan(text)
+            risk_indicators += mention_indicators(mentions, keywords)
+    return risk_indicators, mentions
+
+def build_score_response(features: dict, keywords: frozenset, fraud_probability: float, tier: str = "model", match=None) -> ScoreResponse:
+    """Assemble the API response for one scored input row"""
+    risk_indicators, mentions = annotate(features['text'], features['roi_percentage'], features['timeframe'], keywords)
+    return ScoreResponse(
+        fraud_probability=round(fraud_probability, 4),
+        prediction=get_prediction_label(fraud_probability),
+        confidence_level=get_confidence_level(fraud_probability),
+        risk_indicators=risk_indicators,
+        tier=tier,
+        entity_mentions=mentions,
+        near_duplicate=NearDuplicate(cluster_id=match.cluster_id, similarity=match.similarity) if match is not None else None
+    )
+
+def predict_cached(rows: List[dict], serving: ServingModel, row_keywords: List[frozenset]) -> tuple:
+    """Fraud probability, the tier that produced it and any near-duplicate match for each feature row"""
+    return predict_columns(
+        [row['text'] for row in rows], [row['roi_percentage'] for row in rows], [row['timeframe'] for row in rows],
+        row_keywords, serving
+    )
+
+def predict_columns(texts: List[str], roi_percentages: list, timeframes: List[str], row_keywords: List[frozenset], serving: ServingModel) -> tuple:
+    """Fraud probability, the tier that produced it and any near-duplicate match for each resolved row
+
+    Tiers are tried from cheapest to most expensive: the rule pre-screen in
+    cascade mode, the exact result cache, the near-duplicate index, and only
+    then the model.
+    """
+    probabilities = [None] * len(texts)
+    tiers = ["model"] * len(texts)
+    matches = [None] * len(texts)
+    cascade = serving.cascade
+    if cascade is not None:
+        with stage_timer("cascade_rules"):
+            for i, row in enumerate(zip(texts, roi_percentages, timeframes, row_keywords)):
+                probabilities[i] = cascade.decide(*row)
+                if probabilities[i] is not None:
+                    tiers[i] = "rules"
+    
+    cache = result_cache
+    if cache is not None:
+        with stage_timer("cache_lookup"):
+            keys = [
+                cache_key(text, roi_percentage, timeframe, serving.lowercase, serving.content_hash)
+                for text, roi_percentage, timeframe in zip(texts, roi_percentages, timeframes)
+            ]
+            for i, key in enumerate(keys):
+                if probabilities[i] is None:
+                    probabilities[i] = cache.get(key)
+                    if probabilities[i] is not None:
+                        tiers[i] = "cache"
+    
+    index = near_duplicates
+    sketches = {}
+    if index is not None:
+        with stage_timer("near_duplicate_lookup"):
+            for i, p in enumerate(probabilities):
+                if p is None:
+                    sketches[i] = index.sketch(texts[i])
+                    matches[i] = index.lookup(sketches[i])
+                    if matches[i] is not None:
+                        probabilities[i] = matches[i].fraud_probability
+                        tiers[i] = "near_duplicate"
+    
+    missing = [i for i, p in enumerate(probabilities) if p is None]
+    if missing:
+        predicted = serving.predict_fraud_probabilities_columns(
+            [texts[i] for i in missing], [roi_percentages[i] for i in missing], [timeframes[i] for i in missing]
+        )
+        for i, p in zip(missing, predicted):
+            probabilities[i] = float(p)
+            if cache is not None:
+                cache.put(keys[i], probabilities[i])
+            if index is not None:
+                index.add(sketches[i], probabilities[i])
+    for tier in tiers:
+        SCORING_TIER_TOTAL.inc((tier,))
+    return probabilities, tiers, matches
+
+def score_one(request: ScoreRequest) -> ScoreResponse:
+    """Extract features, predict and build the response for one validated request"""
+    # Extract returns and timeframe from text if not provided
+    with stage_timer("extraction"):
+        features, keywords = resolve_features(request)
     
+    # Get ML prediction; one model reference is used even if a reload swaps it meanwhile
+    probabilities, tiers, matches = predict_cached([features], model, [keywords])
+    fraud_probability = probabilities[0]  # Probability of fraud (class 1)
+    
+    # Get prediction, confidence and risk indicators
+    return build_score_response(features, keywords, fraud_probability, tiers[0], matches[0])
+
+def score_batch(requests: List[ScoreRequest]) -> List[BatchScoreItem]:
+    """Score many requests with a single predict_proba call, reporting errors per item"""
+    serving = model
+    items = [BatchScoreItem(index=i) for i in range(len(requests))]
+    rows = []
+    row_keywords = []
+    row_items = []
+
+    with stage_timer("extraction"):
+        for item, request in zip(items, requests):
+            if not request.text or not request.text.strip():
+                item.error = "Text input cannot be empty"
+                continue
+            try:
+                features, keywords = resolve_features(request)
+                rows.append(features)
+                row_keywords.append(keywords)
+                row_items.append(item)
+            except Exception as e:
+                item.error = f"Feature extraction failed: {str(e)}"
+
+    if not rows:
+        return items
+
     try:
-        if os.path.exists(MODEL_PATH):
-            model = joblib.load(MODEL_PATH)
-            print(f"✅ Model loaded successfully from: {MODEL_PATH}")
-        else:
-            print(f"❌ Model file not found at: {MODEL_PATH}")
-            # raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
+        fraud_probabilities, tiers, matches = predict_cached(rows, serving, row_keywords)
+    except Exception:
+        # Fall back to row-by-row prediction so one bad row cannot fail the whole batch
+        tiers = ["model"] * len(rows)
+        matches = [None] * len(rows)
+        fraud_probabilities = []
+        for row, item in zip(rows, row_items):
+            try:
+                fraud_probabilities.append(serving.predict_fraud_probabilities([row])[0])
+            except Exception as e:
+                fraud_probabilities.append(None)
+                item.error = f"Prediction failed: {str(e)}"
+
+    for row, keywords, item, fraud_probability, tier, match in zip(rows, row_keywords, row_items, fraud_probabilities, tiers, matches):
+        if fraud_probability is None:
+            continue
+        try:
+            item.result = build_score_response(row, keywords, float(fraud_probability), tier, match)
+        except Exception as e:
+            item.error = f"Prediction failed: {str(e)}"
+
+    return items
+
+def score_columns(columns: ScoringColumns) -> dict:
+    """Score decoded request columns, returning result columns in input order"""
+    serving = model
+    n_rows = len(columns.texts)
+    results = {name: [None] * n_rows for name in RESULT_COLUMNS}
+    errors = results["error"]
+    positions = []
+    texts = []
+    roi_percentages = []
+    timeframes = []
+    row_keywords = []
+
+    with stage_timer("extraction"):
+        for i, (text, roi_percentage, timeframe) in enumerate(zip(*columns)):
+            if not text or not text.strip():
+                errors[i] = "Text input cannot be empty"
+                continue
+            try:
+                roi_percentage, timeframe, keywords = resolve_inputs(text, roi_percentage, timeframe)
+            except Exception as e:
+                errors[i] = f"Feature extraction failed: {str(e)}"
+                continue
+            positions.append(i)
+            texts.append(text)
+            roi_percentages.append(roi_percentage)
+            timeframes.append(timeframe)
+            row_keywords.append(keywords)
+
+    if not positions:
+        return results
+
+    try:
+        fraud_probabilities, tiers, matches = predict_columns(texts, roi_percentages, timeframes, row_keywords, serving)
     except Exception as e:
+        for i in positions:
+            errors[i] = f"Prediction failed: {str(e)}"
+        return results
+
+    rows = zip(positions, texts, roi_percentages, timeframes, row_keywords, fraud_probabilities, tiers, matches)
+    for i, text, roi_percentage, timeframe, keywords, fraud_probability, tier, match in rows:
+        try:
+            risk_indicators, mentions = annotate(text, roi_percentage, timeframe, keywords)
+        except Exception as e:
+            errors[i] = f"Prediction failed: {str(e)}"
+            continue
+        results["fraud_probability"][i] = round(fraud_probability, 4)
+        results["prediction"][i] = get_prediction_label(fraud_probability)
+        results["confidence_level"][i] = get_confidence_level(fraud_probability)
+        results["tier"][i] = tier
+        results["risk_indicators"][i] = risk_indicators
+        results["entity_mentions"][i] = mentions
+        if match is not None:
+            results["near_duplicate_cluster"][i] = match.cluster_id
+            results["near_duplicate_similarity"][i] = match.similarity
+    return results
+
+def open_result_cache():
+    """Create this process's result cache and scope it to the loaded model"""
+    global result_cache
+    if not CACHE_ENABLED:
+        return
+    result_cache = ResultCache(
+        max_entries=CACHE_MAX_ENTRIES,
+        ttl_seconds=CACHE_TTL_SECONDS,
+        db_path=CACHE_DB_PATH,
+        max_disk_entries=CACHE_DB_MAX_ENTRIES,
+        prune_every=CACHE_DB_PRUNE_EVERY
+    )
+    if model is not None:
+        result_cache.set_model_version(model.content_hash)
+        result_cache.prune_disk()
+
+def open_near_duplicate_index():
+    """Create this process's near-duplicate index and scope it to the loaded model"""
+    global near_duplicates
+    if not NEAR_DUP_ENABLED:
+        return
+    near_duplicates = NearDuplicateIndex(
+        threshold=NEAR_DUP_THRESHOLD,
+        min_probability=NEAR_DUP_MIN_PROBABILITY,
+        max_entries=NEAR_DUP_MAX_ENTRIES,
+        ttl_seconds=NEAR_DUP_TTL_SECONDS
+    )
+    if model is not None:
+        near_duplicates.set_model_version(model.content_hash)
+
+def model_source(version: Optional[str] = None) -> tuple:
+    """Paths, version and metadata of a registry version, the active one, or the legacy MODEL_PATH"""
+    version = version or registry.active_version()
+    if version is None:
+        return MODEL_PATH, COMPACT_MODEL_PATH, CASCADE_MODEL_PATH, None, None
+    directory = registry.version_dir(version)
+    return (
+        os.path.join(directory, JOBLIB_FILE), os.path.join(directory, COMPACT_FILE),
+        os.path.join(directory, CASCADE_FILE), version, registry.metadata(version)
+    )
+
+def load_model_from_disk(version: Optional[str] = None) -> Optional[ServingModel]:
+    """Load and warm up a model version without serving it yet"""
+    joblib_path, compact_path, cascade_path, version, metadata = model_source(version)
+    started = time.perf_counter()
+    candidate = load_serving_model(
+        joblib_path, compact_path,
+        model_format=MODEL_FORMAT, mmap=MODEL_MMAP, fast_path=FAST_PATH_ENABLED,
+        metadata=metadata, version=version
+    )
+    if candidate is None:
+        return None
+    if CASCADE_ENABLED:
+        candidate.cascade = load_cascade(cascade_path, candidate.content_hash)
+    candidate.load_seconds = time.perf_counter() - started
+    print(f"⏱️ Model {candidate.version} loaded in {candidate.load_seconds * 1000:.0f}ms ({candidate.model_format})")
+    candidate.warm_up_seconds = candidate.warm_up() / 1000
+    print(f"⏱️ First prediction (warm-up) took {candidate.warm_up_seconds * 1000:.1f}ms")
+    return candidate
+
+def activate_model(candidate: ServingModel):
+    """Serve candidate from now on, keeping the current model for rollback"""
+    global model, previous_model
+    if model is not None and model.version != candidate.version:
+        previous_model = model
+    # Requests read the global once, so this single assignment is the swap
+    model = candidate
+    if result_cache is not None:
+        result_cache.set_model_version(candidate.content_hash)
+    if near_duplicates is not None:
+        near_duplicates.set_model_version(candidate.content_hash)
+    # Process workers hold their own copy of the model
+    restart_process_workers()
+    print(f"✅ Serving model version {candidate.version}")
+
+async def reload_model(version: Optional[str] = None) -> ServingModel:
+    """Load a model version off the event loop, warm it up and swap it in"""
+    async with reload_lock:
+        candidate = await asyncio.get_running_loop().run_in_executor(None, load_model_from_disk, version)
+        if candidate is None:
+            raise FileNotFoundError(f"No model found for version {version or 'active'}")
+        activate_model(candidate)
+        return candidate
+
+async def watch_model_registry():
+    """Reload whenever the registry's active version changes, e.g. after train.py publishes"""
+    global failed_version, model_state
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            version = registry.active_version()
+        except OSError as e:
+            print(f"⚠️ Cannot read model registry: {str(e)}")
+            continue
+        if version is None or version == failed_version or model_state == "training":
+            continue
+        if model is not None and model.version == version:
+            continue
+        
+        print(f"🔄 Active model version changed to {version}, reloading")
+        try:
+            await reload_model(version)
+            model_state = "ready"
+        except Exception as e:
+            failed_version = version
+            print(f"❌ Error loading model version {version}: {str(e)}")
+
+async def train_model_in_background() -> bool:
+    """Run train.py in a child process and wait for it without blocking requests"""
+    global training_process
+    
+    print(f"⚠️ No model found, training in the background with {TRAIN_SCRIPT}")
+    started = time.perf_counter()
+    training_process = await asyncio.create_subprocess_exec(
+        sys.executable, TRAIN_SCRIPT, cwd=os.path.dirname(TRAIN_SCRIPT)
+    )
+    returncode = await training_process.wait()
+    training_process = None
+    
+    if returncode != 0:
+        print(f"❌ Training failed with exit code {returncode}")
+        return False
+    print(f"⏱️ Training finished in {time.perf_counter() - started:.0f}s")
+    return True
+
+async def prepare_model():
+    """Train if needed, then load and warm up the model off the event loop"""
+    global model_state
+    
+    if model is not None:
+        # Loaded by the pre-fork supervisor before this worker was forked
+        model_state = "ready"
+        return
+    
+    try:
+        model_exists = (
+            registry.active_version() is not None
+            or os.path.exists(MODEL_PATH)
+            or (MODEL_FORMAT != "joblib" and os.path.exists(COMPACT_MODEL_PATH))
+        )
+        if not model_exists and TRAIN_ON_STARTUP:
+            model_state = "training"
+            if not await train_model_in_background():
+                model_state = "unavailable"
+                return
+        
+        model_state = "loading"
+        await reload_model()
+        model_state = "ready"
+        print(f"✅ Model ready {(time.perf_counter() - IMPORT_STARTED):.2f}s after import")
+    except Exception as e:
+        model_state = "unavailable"
         print(f"❌ Error loading model: {str(e)}")
-        raise
+
+def load_entity_index() -> EntityIndex:
+    started = time.perf_counter()
+    index = EntityIndex.load(REGISTRY_DATA_DIR, complete=REGISTRY_COMPLETE)
+    print(f"✅ Registry index loaded: {len(index.entities)} entities in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return index
+
+async def watch_entity_registry():
+    """Build the registry index off the event loop, then rebuild it whenever a CSV changes"""
+    global entity_index
+    loop = asyncio.get_running_loop()
+    if entity_index is None:
+        try:
+            entity_index = await loop.run_in_executor(None, load_entity_index)
+        except Exception as e:
+            print(f"⚠️ Registry index unavailable: {str(e)}")
+    
+    while REGISTRY_WATCH_INTERVAL > 0:
+        await asyncio.sleep(REGISTRY_WATCH_INTERVAL)
+        if entity_index is not None and not entity_index.sources_changed():
+            continue
+        try:
+            # The old index keeps serving until the new one is complete
+            entity_index = await loop.run_in_executor(None, load_entity_index)
+            # Process workers scan with their own copy of the index
+            restart_process_workers()
+        except Exception as e:
+            if entity_index is not None:
+                print(f"⚠️ Keeping the current registry index, reload failed: {str(e)}")
+
+def model_unavailable() -> HTTPException:
+    """503 response for requests that arrive before a model is loaded"""
+    if model_state in ("loading", "training"):
+        return HTTPException(
+            status_code=503,
+            detail=f"ML model is {model_state}. Please retry shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    return HTTPException(
+        status_code=503,
+        detail="ML model not available. Please check server logs."
+    )
+
+def read_worker_status() -> Optional[dict]:
+    """Per-worker health and memory written by the pre-fork supervisor, if there is one"""
+    if WORKER_STATUS_PATH is None:
+        return None
+    try:
+        with open(WORKER_STATUS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def request_supervisor_reload():
+    """Have the pre-fork supervisor load the active version and replace every worker"""
+    os.kill(SUPERVISOR_PID, signal.SIGHUP)
+
+def init_pool_worker():
+    """Make sure a pool worker process has the model loaded"""
+    global model, entity_index
+    if model is None:
+        model = load_model_from_disk()
+    if entity_index is None:
+        try:
+            entity_index = load_entity_index()
+        except Exception as e:
+            print(f"⚠️ Registry index unavailable in pool worker: {str(e)}")
+    # A forked SQLite connection must not be reused, so each worker opens its own cache
+    open_result_cache()
+    open_near_duplicate_index()
+
+def restart_process_workers():
+    """Have worker processes that were forked with the old model or index start fresh"""
+    global job_executor
+    if inference_pool is not None and inference_pool.mode == "process":
+        inference_pool.restart()
+    if job_executor is not None:
+        # A chunk already running finishes on the old process
+        job_executor.shutdown(wait=False)
+        job_executor = None
+
+def exit_with_parent(parent: int):
+    """Exit the job process once the server that forked it is gone, so it never outlives a restart"""
+    while os.getppid() == parent:
+        time.sleep(1)
+    os._exit(0)
+
+def init_job_worker():
+    """Lower the job process's CPU priority below the interactive workers, then load the model"""
+    os.nice(JOB_NICE)
+    # The server's handlers were inherited; the server stops this process itself
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Pool workers otherwise wait forever on their task queue if the server is killed
+    threading.Thread(target=exit_with_parent, args=(os.getppid(),), daemon=True).start()
+    init_pool_worker()
+
+def run_job_chunk(worker: str) -> bool:
+    """Claim, score and store one pending job chunk in the job process; False if none was pending"""
+    claimed = job_queue.claim(worker, JOB_LEASE_SECONDS)
+    if claimed is None:
+        return False
+    job_id, chunk, start, rows, id_column = claimed
+    # bulk_score imports this module, so it cannot be imported at the top
+    import bulk_score
+    try:
+        records = bulk_score.score_chunk(start, rows, id_column)
+    except Exception as e:
+        job_queue.fail(job_id, chunk, str(e), JOB_MAX_ATTEMPTS)
+        print(f"⚠️ Job {job_id} chunk {chunk} failed: {str(e)}")
+        return True
+    job_queue.complete(job_id, chunk, records, model.version if model is not None else None)
+    return True
+
+def interactive_busy() -> bool:
+    """Whether /score or /score/batch work is running or waiting"""
+    if inference_pool is not None and inference_pool.active > 0:
+        return True
+    return micro_batcher is not None and (len(micro_batcher.queue) > 0 or micro_batcher.in_flight > 0)
+
+async def run_bulk_jobs(slot: int):
+    """Score queued job chunks one at a time, yielding to interactive scoring
+
+    A chunk only starts once no interactive work is pending, and runs in a
+    niced process, so bulk jobs take the CPU time interactive traffic leaves.
+    """
+    global job_executor
+    worker = f"{socket.gethostname()}:{os.getpid()}:{slot}"
+    loop = asyncio.get_running_loop()
+    last_prune = 0.0
+    while True:
+        if model is None or interactive_busy():
+            await asyncio.sleep(JOB_IDLE_SECONDS)
+            continue
+        if slot == 0 and time.time() - last_prune > 3600:
+            last_prune = time.time()
+            await loop.run_in_executor(None, job_queue.prune, JOB_RETENTION_SECONDS)
+        if job_executor is None:
+            # The job process reads this module's globals (job_queue, model) as they were at the fork
+            job_executor = ProcessPoolExecutor(
+                max_workers=JOB_WORKERS,
+                initializer=init_job_worker,
+                mp_context=multiprocessing.get_context("fork")
+            )
+        try:
+            claimed = await loop.run_in_executor(job_executor, run_job_chunk, worker)
+        except Exception as e:
+            print(f"⚠️ Bulk job worker failed, restarting it: {str(e)}")
+            job_executor.shutdown(wait=False)
+            job_executor = None
+            claimed = False
+        if not claimed:
+            try:
+                await asyncio.wait_for(job_submitted.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            job_submitted.clear()
+
+def open_job_queue():
+    """Open the bulk job queue and start its runners
+
+    Under serve.py every worker accepts and reports jobs, but only worker 0
+    scores them, so the pre-forked workers do not each start a job pool.
+    """
+    global job_queue, job_submitted
+    if not JOBS_ENABLED:
+        return
+    job_queue = JobQueue(JOB_DB_PATH)
+    if SUPERVISOR_PID is None:
+        # This process is the only one scoring jobs, so every claim is left over from before a restart
+        released = job_queue.release_claims()
+        if released:
+            print(f"🔄 Resuming {released} job chunks interrupted by a restart")
+    job_submitted = asyncio.Event()
+    if WORKER_INDEX in (None, 0):
+        app.state.job_tasks = [asyncio.create_task(run_bulk_jobs(slot)) for slot in range(JOB_WORKERS)]
+    print(f"✅ Bulk job queue opened: {JOB_DB_PATH}")
+
+def job_result_lines(job_id: str, output_format: str) -> Iterator[str]:
+    """Output records of a finished job as NDJSON or CSV text, one chunk at a time"""
+    import bulk_score
+    if output_format == "csv":
+        yield csv_line(bulk_score.OUTPUT_FIELDS)
+    for records in job_queue.results(job_id):
+        if output_format == "csv":
+            yield "".join(
+                csv_line([bulk_score.csv_value(field, record.get(field)) for field in bulk_score.OUTPUT_FIELDS])
+                for record in records
+            )
+        else:
+            yield "".join(json.dumps({field: record.get(field) for field in bulk_score.OUTPUT_FIELDS}) + "\n" for record in records)
+
+def csv_line(values: list) -> str:
+    line = io.StringIO()
+    csv.writer(line, lineterminator="\n").writerow(["" if v is None else v for v in values])
+    return line.getvalue()
+
+def server_busy(e: PoolSaturated) -> HTTPException:
+    """503 response telling the client when to retry"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Server busy: {str(e)}. Please retry.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+async def run_inference(fn, *args):
+    """Run CPU-bound scoring on the inference pool, answering 503 when it is saturated"""
+    if inference_pool is None:
+        return fn(*args)
+    try:
+        return await inference_pool.submit(fn, *args)
+    except PoolSaturated as e:
+        raise server_busy(e)
+
+async def score_micro_batch(requests: List[ScoreRequest]) -> List[BatchScoreItem]:
+    """Score one coalesced batch of /score requests"""
+    return await run_inference(score_batch, requests)
+
+async def score_coalesced(request: ScoreRequest) -> ScoreResponse:
+    """Score one request as part of the next micro-batch"""
+    try:
+        item = await micro_batcher.submit(request)
+    except PoolSaturated as e:
+        raise server_busy(e)
+    if item.error is not None:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error during prediction: {item.error}"
+        )
+    return item.result
+
+@app.on_event("startup")
+async def load_model():
+    """Start the inference pool and load the ML model in the background on startup"""
+    global inference_pool, micro_batcher
+    
+    open_result_cache()
+    open_near_duplicate_index()
+    
+    if POOL_WORKERS > 0:
+        inference_pool = InferencePool(
+            mode=POOL_MODE,
+            workers=POOL_WORKERS,
+            max_queue=POOL_MAX_QUEUE,
+            initializer=init_pool_worker
+        )
+        print(f"✅ Inference pool started: {POOL_WORKERS} {POOL_MODE} workers, queue {POOL_MAX_QUEUE}")
+    
+    if MICRO_BATCH_ENABLED:
+        micro_batcher = MicroBatcher(
+            score_micro_batch,
+            window_ms=MICRO_BATCH_WINDOW_MS,
+            max_batch=MICRO_BATCH_MAX_SIZE,
+            max_queue=MICRO_BATCH_MAX_QUEUE
+        )
+        print(f"✅ Micro-batching enabled: window {MICRO_BATCH_WINDOW_MS}ms, batch {MICRO_BATCH_MAX_SIZE}")
+    
+    # The server accepts connections while this runs; /health reports its progress
+    app.state.model_task = asyncio.create_task(prepare_model())
+    if MODEL_WATCH_INTERVAL > 0:
+        app.state.watch_task = asyncio.create_task(watch_model_registry())
+    app.state.registry_task = asyncio.create_task(watch_entity_registry())
+    open_job_queue()
+
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    """Stop the inference pool workers and any background training"""
+    if inference_pool is not None:
+        inference_pool.shutdown()
+    if job_executor is not None:
+        job_executor.shutdown(wait=False, cancel_futures=True)
+    if training_process is not None and training_process.returncode is None:
+        training_process.terminate()
+
+def handler_finished(http_request: Request, response):
+    """Mark the end of handler work so the metrics middleware can time serialization"""
+    http_request.state.handler_finished = time.perf_counter()
+    session = profiler_session
+    if session is not None and session.running:
+        session.request_finished()
+    return response
 
 @app.post("/score", response_model=ScoreResponse)
-async def score_text(request: ScoreRequest):
+async def score_text(request: ScoreRequest, http_request: Request):
     """Score text for fraud probability with enhanced feature extraction"""
     global model
     if model is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="ML model not available. Please check server logs."
-        )
+        raise model_unavailable()
     
     try:
         # Input validation
@@ -194,36 +971,9 @@ async def score_text(request: ScoreRequest):
                 detail="Text input cannot be empty"
             )
         
-        # Extract returns and timeframe from text if not provided
-        extracted_returns, extracted_timeframe = extract_returns_and_timeframe(request.text)
-        
-        # Use provided values or extracted ones
-        roi_percentage = request.roi_percentage or extracted_returns or 0
-        timeframe = request.timeframe or extracted_timeframe or 'unknown'
-        
-        # Prepare input data for model
-        input_data = pd.DataFrame([{
-            'text': request.text,
-            'roi_percentage': roi_percentage,
-            'timeframe': timeframe
-        }])
-        
-        # Get ML prediction
-        probabilities = model.predict_proba(input_data)[0]
-        fraud_probability = float(probabilities[1])  # Probability of fraud (class 1)
-        
-        # Get prediction and confidence
-        prediction = get_prediction_label(fraud_probability)
-        confidence_level = get_confidence_level(fraud_probability)
-        
-        # Extract risk indicators with enhanced analysis
-        risk_indicators = extract_risk_indicators(request.text, roi_percentage, timeframe)
-        return ScoreResponse(
-            fraud_probability=round(fraud_probability, 4),
-            prediction=prediction,
-            confidence_level=confidence_level,
-            risk_indicators=risk_indicators
-        )
+        if micro_batcher is not None:
+            return handler_finished(http_request, await score_coalesced(request))
+        return handler_finished(http_request, await run_inference(score_one, request))
     
     except HTTPException:
         raise
@@ -233,34 +983,314 @@ async def score_text(request: ScoreRequest):
             detail=f"Internal server error during prediction: {str(e)}"
         )
 
+@app.post("/score/batch", response_model=BatchScoreResponse)
+async def score_batch_endpoint(request: BatchScoreRequest, http_request: Request):
+    """Score a batch of texts in one vectorized model call, preserving input order"""
+    if model is None:
+        raise model_unavailable()
+    
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    
+    if len(request.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(request.items)} exceeds the maximum of {MAX_BATCH_SIZE}"
+        )
+    
+    results = await run_inference(score_batch, request.items)
+    return handler_finished(http_request, BatchScoreResponse(
+        results=results,
+        total=len(results),
+        failed=sum(1 for item in results if item.error is not None)
+    ))
+
+@app.post("/score/columnar")
+async def score_columnar_endpoint(http_request: Request):
+    """Score msgpack or Arrow IPC columns in one vectorized pass, answering in the same format"""
+    media = media_type(http_request.headers.get("content-type"))
+    if media is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Content-Type must be application/msgpack or application/vnd.apache.arrow.stream"
+        )
+    if model is None:
+        raise model_unavailable()
+    
+    body = await http_request.body()
+    try:
+        with stage_timer("decode"):
+            columns = decode_columns(body, media)
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=f"{media} is not supported by this server: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not columns.texts:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    
+    if len(columns.texts) > MAX_COLUMNAR_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(columns.texts)} exceeds the maximum of {MAX_COLUMNAR_ROWS}"
+        )
+    
+    results = await run_inference(score_columns, columns)
+    with stage_timer("encode"):
+        content = encode_columns(results, media)
+    return handler_finished(http_request, Response(content=content, media_type=media))
+
+def jobs_unavailable() -> HTTPException:
+    return HTTPException(status_code=503, detail="Bulk jobs are disabled (ML_JOBS=false)")
+
+@app.post("/jobs", status_code=202)
+async def submit_job(http_request: Request, chunk_size: int = JOB_CHUNK_ROWS, id_column: Optional[str] = "id"):
+    """Queue a CSV, NDJSON or JSON dataset for background scoring and return its job ID"""
+    if job_queue is None:
+        raise jobs_unavailable()
+    media = (http_request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if media not in DATASET_TYPES:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be one of {', '.join(DATASET_TYPES)}")
+    if not 1 <= chunk_size <= MAX_JOB_CHUNK_ROWS:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {MAX_JOB_CHUNK_ROWS}")
+    
+    body = await http_request.body()
+    loop = asyncio.get_running_loop()
+    try:
+        rows = await loop.run_in_executor(None, parse_dataset, body, media)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid dataset: {str(e)}")
+    if not rows:
+        raise HTTPException(status_code=400, detail="Dataset cannot be empty")
+    if len(rows) > JOB_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Dataset size {len(rows)} exceeds the maximum of {JOB_MAX_ROWS}"
+        )
+    
+    job = await loop.run_in_executor(None, job_queue.submit, rows, chunk_size, id_column or None)
+    job_submitted.set()
+    return job
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50):
+    """Most recently submitted jobs and their progress"""
+    if job_queue is None:
+        raise jobs_unavailable()
+    return {"jobs": await asyncio.get_running_loop().run_in_executor(None, job_queue.list, limit)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status and progress of a bulk job"""
+    if job_queue is None:
+        raise jobs_unavailable()
+    job = await asyncio.get_running_loop().run_in_executor(None, job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, format: str = "ndjson"):
+    """Download a completed job's results as NDJSON or CSV, in input order"""
+    if job_queue is None:
+        raise jobs_unavailable()
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    job = await asyncio.get_running_loop().run_in_executor(None, job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {job['status']} ({job['done_rows']}/{job['total_rows']} rows scored)"
+        )
+    return StreamingResponse(
+        job_result_lines(job_id, format),
+        media_type=CSV_TYPE if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.{format}"'}
+    )
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel a bulk job and delete its data"""
+    if job_queue is None:
+        raise jobs_unavailable()
+    if not await asyncio.get_running_loop().run_in_executor(None, job_queue.delete, job_id):
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {"job_id": job_id, "status": "deleted"}
+
+@app.post("/verify", response_model=VerifyResponse)
+async def verify_entity(request: VerifyRequest):
+    """Check a registration ID and/or name against the advisor and company registry"""
+    index = entity_index
+    if index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Registry index is not loaded. Please retry shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    
+    registration_id = (request.registration_id or "").strip()
+    name = (request.name or "").strip()
+    if not registration_id and not name:
+        raise HTTPException(status_code=400, detail="Provide a registration_id, a name or both")
+    if request.kind is not None and request.kind not in ("advisor", "company"):
+        raise HTTPException(status_code=400, detail="kind must be 'advisor' or 'company'")
+    if not 1 <= request.top_k <= MAX_VERIFY_RESULTS:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {MAX_VERIFY_RESULTS}")
+    
+    started = time.perf_counter()
+    with stage_timer("registry_lookup"):
+        registered = index.lookup_id(registration_id) if registration_id else None
+        similarity = name_similarity(name, registered["name"]) if registered is not None and name else None
+        matches = index.search(name, request.top_k, request.kind) if name else []
+    
+    if registration_id:
+        if registered is None:
+            status = "INVALID_REG_ID"
+        elif similarity is None:
+            status = "REGISTERED"
+        else:
+            status = "VERIFIED" if similarity >= VERIFY_MIN_SIMILARITY else "NAME_MISMATCH"
+    else:
+        status = "NAME_MATCH" if matches and matches[0][0] >= VERIFY_MIN_SIMILARITY else "NOT_FOUND"
+    
+    return VerifyResponse(
+        status=status,
+        registered=RegistryEntity(**registered) if registered is not None else None,
+        name_similarity=round(similarity, 4) if similarity is not None else None,
+        matches=[RegistryMatch(**entity, score=round(score, 4)) for score, entity in matches],
+        took_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    status = "healthy" if model is not None else "unhealthy"
+    if model is None and model_state in ("loading", "training"):
+        status = model_state
+    
     return {
-        "status": "healthy" if model is not None else "unhealthy",
+        "status": status,
         "service": "Financial Fraud Detection API",
         "model_loaded": model is not None,
+        "model_state": model_state,
+        "model_version": model.version if model is not None else None,
+        "model_format": model.model_format if model is not None else None,
+        "inference_pool": inference_pool.stats() if inference_pool is not None else None,
+        "micro_batching": micro_batcher.stats() if micro_batcher is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "near_duplicates": near_duplicates.stats() if near_duplicates is not None else None,
+        "entity_registry": entity_index.stats() if entity_index is not None else None,
+        # SQLite queries must not block scoring on the event loop
+        "jobs": await asyncio.get_running_loop().run_in_executor(None, job_queue.stats) if job_queue is not None else None,
+        "worker": WORKER_INDEX,
+        "workers": read_worker_status(),
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics: stage and request latencies, counters and queue sizes
+
+    Values belong to the process that answers the scrape; process-mode pool
+    workers report theirs through it. Under serve.py every pre-forked worker
+    keeps its own, so a scrape covers one worker only, named by
+    verifi_process_info; scrape each worker or aggregate by that label.
+    """
+    lines = []
+    lines += render_gauge("verifi_process_info", "Process whose metrics this scrape reports", {
+        f'worker="{"" if WORKER_INDEX is None else WORKER_INDEX}",pid="{os.getpid()}"': 1
+    })
+    lines += STAGE_SECONDS.render()
+    lines += REQUESTS_TOTAL.render()
+    lines += REQUEST_SECONDS.render()
+    lines += SCORING_TIER_TOTAL.render()
+    lines += render_gauge("verifi_http_requests_in_flight", "Requests currently being handled", {"": RequestMetricsMiddleware.in_flight})
+    
+    lines += render_gauge("verifi_model_state", "Model lifecycle state (1 for the current state)", {
+        f'state="{state}"': 1 if model_state == state else 0
+        for state in ("loading", "training", "ready", "unavailable")
+    })
+    if model is not None:
+        labels = f'version="{model.version}",format="{model.model_format}"'
+        lines += render_gauge("verifi_model_info", "Version and format of the served model", {labels: 1})
+        if model.load_seconds is not None:
+            lines += render_gauge("verifi_model_load_seconds", "Time taken to load the served model", {"": model.load_seconds})
+        if model.warm_up_seconds is not None:
+            lines += render_gauge("verifi_model_warm_up_seconds", "Time taken by the served model's warm-up predictions", {"": model.warm_up_seconds})
+    
+    if inference_pool is not None:
+        pool = inference_pool.stats()
+        lines += render_gauge("verifi_inference_pool_active", "Scoring tasks running or queued on the inference pool", {"": pool["active"]})
+        lines += render_gauge("verifi_inference_pool_queued", "Scoring tasks waiting for a pool worker", {"": pool["queued"]})
+        lines += render_gauge("verifi_inference_pool_capacity", "Maximum in-flight scoring tasks before 503s", {"": inference_pool.capacity})
+        lines += render_counter("verifi_inference_pool_rejected_total", "Scoring tasks rejected because the pool was full", {"": pool["rejected"]})
+    
+    if micro_batcher is not None:
+        lines += render_gauge("verifi_micro_batch_queued", "Requests waiting for the next micro-batch", {"": len(micro_batcher.queue)})
+        lines += render_gauge("verifi_micro_batch_in_flight", "Micro-batches currently being scored", {"": micro_batcher.in_flight})
+        lines += render_counter("verifi_micro_batch_rejected_total", "Requests rejected because the micro-batch queue was full", {"": micro_batcher.rejected})
+        lines += ["# TYPE verifi_micro_batch_size histogram"] + micro_batcher.batch_size.render("verifi_micro_batch_size")
+        lines += ["# TYPE verifi_micro_batch_queue_wait_milliseconds histogram"] + micro_batcher.queue_wait_ms.render("verifi_micro_batch_queue_wait_milliseconds")
+    
+    if result_cache is not None:
+        cache = result_cache.stats()
+        lines += render_gauge("verifi_result_cache_entries", "Entries in the in-memory result cache", {"": cache["entries"]})
+        lines += render_counter("verifi_result_cache_lookups_total", "Result cache lookups by outcome", {
+            'result="hit"': cache["hits"], 'result="miss"': cache["misses"]
+        })
+        lines += render_counter("verifi_result_cache_evictions_total", "Entries evicted from the in-memory result cache", {"": cache["evictions"]})
+        if result_cache.db is not None:
+            lines += render_counter("verifi_result_cache_disk_evictions_total", "Rows pruned from the SQLite result cache beyond its size cap", {"": cache["disk_evictions"]})
+    
+    if near_duplicates is not None:
+        near = near_duplicates.stats()
+        lines += render_gauge("verifi_near_duplicate_entries", "Scam messages in the near-duplicate index", {"": near["entries"]})
+        lines += render_gauge("verifi_near_duplicate_clusters", "Scam campaign clusters in the near-duplicate index", {"": near["clusters"]})
+        lines += render_counter("verifi_near_duplicate_cluster_members_total", "Confident scams assigned to a campaign cluster", {
+            'stored="true"': near["added"], 'stored="false"': near["duplicates"]
+        })
+        lines += render_counter("verifi_near_duplicate_lookups_total", "Near-duplicate lookups by outcome", {
+            'result="hit"': near["hits"], 'result="miss"': near["misses"], 'result="skipped"': near["skipped"]
+        })
+        lines += render_counter("verifi_near_duplicate_evictions_total", "Entries evicted from the near-duplicate index", {"": near["evictions"]})
+    
+    if entity_index is not None:
+        lines += render_gauge("verifi_entity_registry_entities", "Advisors and companies in the /verify index", {"": len(entity_index.entities)})
+    
+    if job_queue is not None:
+        jobs = await asyncio.get_running_loop().run_in_executor(None, job_queue.stats)
+        lines += render_gauge("verifi_jobs", "Bulk scoring jobs by status", {
+            f'status="{status}"': count for status, count in jobs["jobs"].items()
+        })
+        lines += render_gauge("verifi_job_rows_pending", "Rows of queued and running bulk jobs still to be scored", {"": jobs["pending_rows"]})
+    
+    workers = read_worker_status()
+    if workers is not None:
+        lines += render_gauge("verifi_worker_healthy", "Pre-forked workers sending heartbeats", {
+            f'worker="{w["worker"]}"': 1 if w["healthy"] else 0 for w in workers["workers"]
+        })
+        lines += render_counter("verifi_worker_restarts_total", "Pre-forked worker restarts, after crashes and reloads", {
+            f'worker="{w["worker"]}"': w["restarts"] for w in workers["workers"]
+        })
+        for field, help_text in (("rss_bytes", "Resident memory"), ("pss_bytes", "Proportional share of memory"), ("private_bytes", "Memory not shared with other processes")):
+            lines += render_gauge(f"verifi_worker_{field}", f"{help_text} of each pre-forked worker", {
+                f'worker="{w["worker"]}"': w[field] for w in workers["workers"] if w.get(field) is not None
+            })
+    
+    return "\n".join(lines) + "\n"
+
 @app.get("/model-info")
 async def get_model_info():
     """Get information about the loaded model"""
     if model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+        raise model_unavailable()
     
     try:
-        # Get model type
-        model_type = type(model.named_steps['classifier']).__name__
-        
-        # Get feature count
-        feature_count = len(model.named_steps['tfidf'].get_feature_names_out())
-        
         return {
-            "model_type": model_type,
-            "feature_count": feature_count,
-            "pipeline_steps": list(model.named_steps.keys()),
-            "model_path": MODEL_PATH
+            **model.info(),
+            "previous_version": previous_model.version if previous_model is not None else None
         }
     except Exception as e:
         raise HTTPException(
@@ -268,6 +1298,121 @@ async def get_model_info():
             detail=f"Error getting model info: {str(e)}"
         )
 
+def check_admin_token(token: Optional[str]):
+    """Reject admin calls without the configured token, and all of them when none is configured"""
+    if ADMIN_TOKEN is None:
+        if not ADMIN_OPEN:
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ML_ADMIN_TOKEN")
+        return
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/models")
+async def list_model_versions(x_admin_token: Optional[str] = Header(None)):
+    """List the registry's versions with their training metadata"""
+    check_admin_token(x_admin_token)
+    return {
+        "active_version": registry.active_version(),
+        "serving_version": model.version if model is not None else None,
+        "previous_version": previous_model.version if previous_model is not None else None,
+        "versions": [registry.metadata(version) for version in registry.versions()]
+    }
+
+@app.post("/admin/models/reload")
+async def reload_model_endpoint(request: ReloadRequest = None, x_admin_token: Optional[str] = Header(None)):
+    """Load the given or the active registry version in the background and swap it in"""
+    global model_state
+    check_admin_token(x_admin_token)
+    version = request.version if request is not None else None
+    active_version = registry.active_version()
+    
+    if version is not None:
+        try:
+            registry.set_active(version)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if SUPERVISOR_PID is not None:
+        # Pre-forked workers share the supervisor's model, so it loads the version and replaces them
+        request_supervisor_reload()
+        return {"status": "reloading", "version": version or active_version, "serving_version": model.version if model is not None else None}
+    
+    try:
+        loaded = await reload_model(version)
+    except Exception as e:
+        if version is not None and active_version is not None:
+            registry.set_active(active_version)
+        raise HTTPException(status_code=500, detail=f"Error loading model: {str(e)}")
+    model_state = "ready"
+    return loaded.info()
+
+@app.post("/admin/models/rollback")
+async def rollback_model(x_admin_token: Optional[str] = Header(None)):
+    """Swap back to the previously served model, which is still in memory"""
+    check_admin_token(x_admin_token)
+    async with reload_lock:
+        if previous_model is None:
+            raise HTTPException(status_code=409, detail="No previous model version to roll back to")
+        target = previous_model
+        if target.version in registry.versions():
+            # Keep the watcher and future restarts on the rolled-back version
+            registry.set_active(target.version)
+        elif SUPERVISOR_PID is not None:
+            raise HTTPException(status_code=409, detail="Only registry versions can be rolled back to in pre-fork mode")
+        if SUPERVISOR_PID is not None:
+            request_supervisor_reload()
+            return {"status": "reloading", "version": target.version, "serving_version": model.version}
+        activate_model(target)
+    return target.info()
+
+@app.post("/admin/profile", status_code=202)
+async def start_profile(request: ProfileRequest = None, x_admin_token: Optional[str] = Header(None)):
+    """Sample this process's stacks until the given seconds pass or scoring requests finish"""
+    global profiler_session
+    check_admin_token(x_admin_token)
+    request = request or ProfileRequest()
+    if profiler_session is not None and profiler_session.running:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+    if not 0 < request.seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {MAX_PROFILE_SECONDS}")
+    if request.requests is not None and request.requests < 1:
+        raise HTTPException(status_code=400, detail="requests must be at least 1")
+    if not MIN_PROFILE_INTERVAL_MS <= request.interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail=f"interval_ms must be between {MIN_PROFILE_INTERVAL_MS} and 1000")
+    
+    profiler_session = ProfileSession(request.seconds, request.requests, request.interval_ms, request.include_idle)
+    profiler_session.start()
+    print(f"🔄 Profiling for up to {request.seconds:g}s" + (f" or {request.requests} requests" if request.requests else ""))
+    return {**profiler_session.info(), "worker": WORKER_INDEX}
+
+@app.get("/admin/profile")
+async def get_profile(top: int = 20, x_admin_token: Optional[str] = Header(None)):
+    """State of the current or last profiling session and its hottest functions"""
+    check_admin_token(x_admin_token)
+    if profiler_session is None:
+        raise HTTPException(status_code=404, detail="No profiling session has run")
+    return {**profiler_session.info(), "worker": WORKER_INDEX, "top_functions": profiler_session.top_functions(top)}
+
+@app.get("/admin/profile/stacks", response_class=PlainTextResponse)
+async def download_profile(x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks of the current or last session, for flamegraph.pl or speedscope"""
+    check_admin_token(x_admin_token)
+    if profiler_session is None:
+        raise HTTPException(status_code=404, detail="No profiling session has run")
+    return PlainTextResponse(
+        profiler_session.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{int(profiler_session.started)}.collapsed"'}
+    )
+
+@app.delete("/admin/profile")
+async def stop_profile(x_admin_token: Optional[str] = Header(None)):
+    """End the running profiling session early"""
+    check_admin_token(x_admin_token)
+    if profiler_session is None or not profiler_session.running:
+        raise HTTPException(status_code=409, detail="No profiling session is running")
+    await asyncio.get_running_loop().run_in_executor(None, profiler_session.stop)
+    return profiler_session.info()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -281,7 +1426,10 @@ async def root():
 # Add error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {"error": "Endpoint not found", "available_endpoints": ["/", "/docs", "/health", "/score", "/model-info"]}
+    if request.scope.get("route") is not None:
+        # An endpoint that exists reporting an unknown resource, such as a job ID
+        return JSONResponse(status_code=404, content={"detail": exc.detail})
+    return JSONResponse(status_code=404, content={"error": "Endpoint not found", "available_endpoints": ["/", "/docs", "/health", "/score", "/score/batch", "/score/columnar", "/jobs", "/verify", "/model-info", "/metrics", "/admin/models"]})
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
@@ -0,0 +1,216 @@
+"""Parity check and micro-benchmark for the precompiled indicator engine.
+
+Compares indicators.py against the original per-pattern implementation on the
+training dataset plus randomly generated texts that mix every keyword with
+different separators, casing and line breaks, then times both.
+
+Usage: python bench_indicators.py [--fuzz N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import re
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+from indicators import build_risk_indicators, scan_text
+
+DATA_PATH = os.environ.get("TRAIN_DATA", os.path.join(os.path.dirname(__file__), "financial_advice_dataset.csv"))
+
+def reference_extract_returns_and_timeframe(text: str) -> tuple:
+    """Original implementation of extract_returns_and_timeframe"""
+    text_lower = text.lower()
+
+    returns_matches = re.findall(r'(\d+)%', text)
+    extracted_returns = None
+    if returns_matches:
+        extracted_returns = max(int(r) for r in returns_matches if r.isdigit())
+
+    extracted_timeframe = None
+    timeframe_patterns = [
+        (r'\b(\d+)\s*hours?\b', 'hours'),
+        (r'\b(\d+)\s*days?\b', 'days'),
+        (r'\b(\d+)\s*weeks?\b', 'weeks'),
+        (r'\b(\d+)\s*months?\b', 'months'),
+        (r'\b(\d+)\s*years?\b', 'years'),
+        (r'\bdaily\b', 'daily'),
+        (r'\bweekly\b', 'weekly'),
+        (r'\bmonthly\b', 'monthly'),
+        (r'\bannual(?:ly)?\b', 'annual'),
+        (r'\b24\s*hours?\b', '24 hours'),
+        (r'\b48\s*hours?\b', '48 hours'),
+        (r'\bovernight\b', 'overnight'),
+        (r'\bimmediate(?:ly)?\b', 'immediate')
+    ]
+
+    for pattern, timeframe_type in timeframe_patterns:
+        match = re.search(pattern, text_lower)
+        if match:
+            if timeframe_type in ['hours', 'days', 'weeks', 'months', 'years']:
+                extracted_timeframe = f"{match.group(1)} {timeframe_type}"
+            else:
+                extracted_timeframe = timeframe_type
+            break
+
+    return extracted_returns, extracted_timeframe
+
+def reference_extract_risk_indicators(text: str, roi_percentage: Optional[int] = None, timeframe: Optional[str] = None) -> List[str]:
+    """Original implementation of extract_risk_indicators"""
+    indicators = []
+    text_lower = text.lower()
+
+    if re.search(r'\b(guaranteed|assured|risk[-\s]?free|100%[-\s]?safe|zero[-\s]?risk)\b', text_lower):
+        indicators.append("Guaranteed/risk-free returns promised")
+
+    if re.search(r'\b(urgent|hurry|limited[-\s]?time|last[-\s]?chance|act[-\s]?now|immediate|today[-\s]?only|expires)\b', text_lower):
+        indicators.append("Urgency and pressure tactics")
+
+    if re.search(r'\b(telegram|whatsapp|join[-\s]?group|premium[-\s]?group|vip[-\s]?group)\b', text_lower):
+        indicators.append("Suspicious communication channels")
+
+    if re.search(r'\b(send[-\s]?money|pay[-\s]?now|processing[-\s]?fee|registration[-\s]?fee|@paytm|@phonepe|@upi)\b', text_lower):
+        indicators.append("Direct payment requests")
+
+    if re.search(r'\b(pre[-\s]?ipo|insider[-\s]?(trading|tips|information)|exclusive[-\s]?allocation|secret[-\s]?(tips|formula))\b', text_lower):
+        indicators.append("Pre-IPO or insider trading claims")
+
+    if roi_percentage:
+        if roi_percentage > 50:
+            indicators.append(f"Extremely unrealistic return percentage ({roi_percentage}%)")
+        elif roi_percentage > 20:
+            indicators.append(f"Unrealistic return percentage ({roi_percentage}%)")
+
+    if re.search(r'\b(daily|24[-\s]?hours?|1[-\s]?week|2[-\s]?weeks?|few[-\s]?days)\b.*\b(profit|returns?|money)\b', text_lower):
+        indicators.append("Short-term high return promises")
+
+    if timeframe:
+        timeframe_lower = timeframe.lower()
+        high_risk_timeframes = ['daily', 'hours', '24 hours', '48 hours', 'overnight', 'immediate']
+        if any(risk_tf in timeframe_lower for risk_tf in high_risk_timeframes):
+            indicators.append(f"Suspicious short timeframe ({timeframe})")
+
+        if roi_percentage and roi_percentage > 10:
+            if any(risk_tf in timeframe_lower for risk_tf in ['daily', 'hours', 'overnight']):
+                indicators.append("High returns promised in very short timeframe")
+
+    if re.search(r'\b(warren[-\s]?buffett|rbi[-\s]?governor|sebi[-\s]?insider|government[-\s]?scheme)\b', text_lower):
+        indicators.append("False authority endorsements")
+
+    if re.search(r'\b(get[-\s]?rich[-\s]?quick|become[-\s]?millionaire|double[-\s]?money|money[-\s]?doubling)\b', text_lower):
+        indicators.append("Get-rich-quick scheme indicators")
+
+    return indicators
+
+# Vocabulary for generated texts: every keyword fragment plus filler words
+FUZZ_WORDS = [
+    'guaranteed', 'assured', 'risk', 'free', '100%', 'safe', 'zero', 'urgent', 'hurry', 'limited',
+    'time', 'last', 'chance', 'act', 'now', 'immediate', 'immediately', 'today', 'only', 'expires',
+    'telegram', 'whatsapp', 'join', 'premium', 'vip', 'group', 'send', 'money', 'pay', 'processing',
+    'registration', 'fee', 'x@paytm', 'y@phonepe', 'z@upi', '@upi', 'pre', 'ipo', 'insider', 'trading',
+    'tips', 'information', 'exclusive', 'allocation', 'secret', 'formula', 'daily', '24', '48', 'hours',
+    'hour', '1', '2', '3', 'week', 'weeks', 'few', 'days', 'day', 'profit', 'profits', 'return', 'returns',
+    'warren', 'buffett', 'rbi', 'governor', 'sebi', 'government', 'scheme', 'get', 'rich', 'quick',
+    'become', 'millionaire', 'double', 'doubling', 'weekly', 'monthly', 'months', 'annual', 'annually',
+    'overnight', 'year', 'years', '25%', '300%', '7%', 'the', 'our', 'fund', 'invest', 'mutual', 'a1'
+]
+FUZZ_SEPARATORS = [' ', ' ', ' ', '', '-', '  ', '\n', ', ', '. ', '_']
+
+def fuzz_texts(count: int, seed: int = 42) -> List[str]:
+    """Generate random keyword-dense texts that exercise overlapping and split phrases"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 30)):
+            word = rng.choice(FUZZ_WORDS)
+            if rng.random() < 0.2:
+                word = word.upper() if rng.random() < 0.5 else word.title()
+            parts.append(word)
+            parts.append(rng.choice(FUZZ_SEPARATORS))
+        texts.append(''.join(parts))
+    return texts
+
+def load_corpus() -> tuple:
+    """Load dataset texts and long messages built by concatenating them"""
+    texts = pd.read_csv(DATA_PATH)['text'].fillna("").astype(str).tolist()
+    long_texts = [' '.join(texts[i:i + 25]) for i in range(0, len(texts), 25)]
+    return texts, long_texts
+
+def compare(text: str) -> tuple:
+    """(expected, actual) returns, timeframe and indicators of one text, as app.py resolves them"""
+    scan = scan_text(text)
+    expected_returns, expected_timeframe = reference_extract_returns_and_timeframe(text)
+    roi_percentage = expected_returns or 0
+    timeframe = expected_timeframe or 'unknown'
+    expected = (
+        expected_returns,
+        expected_timeframe,
+        reference_extract_risk_indicators(text, roi_percentage, timeframe)
+    )
+    actual = (
+        scan.returns,
+        scan.timeframe,
+        build_risk_indicators(scan.keywords, roi_percentage, timeframe)
+    )
+    return expected, actual
+
+def check_parity(texts: List[str]) -> int:
+    """Compare the engine against the reference implementation and return the mismatch count"""
+    mismatches = 0
+    for text in texts:
+        expected, actual = compare(text)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ Mismatch for {text!r}")
+                print(f"   expected: {expected}")
+                print(f"   actual:   {actual}")
+    return mismatches
+
+def time_per_text(func, texts: List[str], repeat: int) -> float:
+    """Return the best mean time per text in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+def reference_scan(text: str):
+    returns, timeframe = reference_extract_returns_and_timeframe(text)
+    return reference_extract_risk_indicators(text, returns, timeframe)
+
+def engine_scan(text: str):
+    scan = scan_text(text)
+    return build_risk_indicators(scan.keywords, scan.returns, scan.timeframe)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fuzz', type=int, default=20000, help='number of generated texts to check')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    dataset, long_texts = load_corpus()
+    generated = fuzz_texts(args.fuzz)
+    texts = dataset + long_texts + generated
+
+    print(f"Checking parity on {len(texts)} texts...")
+    mismatches = check_parity(texts)
+    if mismatches:
+        print(f"❌ {mismatches} mismatches")
+        raise SystemExit(1)
+    print("✅ Engine matches the reference implementation")
+
+
+    print("\nMean time per text (µs):")
+    print("-" * 60)
+    for label, sample in [("dataset", dataset), ("long", long_texts), ("generated", generated[:2000])]:
+        reference = time_per_text(reference_scan, sample, args.repeat)
+        engine = time_per_text(engine_scan, sample, args.repeat)
+        print(f"{label:10s} reference {reference:9.1f}   engine {engine:9.1f}   speedup {reference / engine:5.2f}x")
+
+if __name__ == "__main__":
+    main()
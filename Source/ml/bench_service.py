@@ -0,0 +1,396 @@
+"""Offline latency/throughput benchmark for the scoring service and train.py.
+
+Starts app.py under uvicorn on a free localhost port (or targets --url),
+replays corpora built from the training dataset against /score at each
+concurrency level and reports p50/p95/p99 latency and requests per second.
+It also measures the CPU time of the extraction, vectorization and prediction
+stages in-process and times the train.py stages. Results are written as JSON
+and can be compared against a stored baseline.
+
+Corpora:
+  dataset     dataset texts, each request made unique so the result cache misses
+  long        25 dataset texts joined per request, also unique
+  duplicates  a few texts repeated with a skewed distribution, cache-friendly
+
+Usage: python bench_service.py [--concurrency 1,4,16] [--requests N]
+           [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+
+DATA_PATH = os.environ.get("TRAIN_DATA", os.path.join(os.path.dirname(__file__), "financial_advice_dataset.csv"))
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Corpora whose requests get a unique suffix so the result cache never answers them
+UNIQUE_CORPORA = {"dataset", "long"}
+# Relative change, in percent, below which a difference from the baseline is treated as noise
+NOISE_PERCENT = 5.0
+# Metrics compared against a baseline, and whether a higher value is better
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "requests_per_second": True}
+
+def build_corpora(count: int, seed: int) -> Dict[str, List[str]]:
+    """Request texts for every corpus, deterministic for a given seed"""
+    rng = random.Random(seed)
+    texts = pd.read_csv(DATA_PATH)['text'].fillna("").astype(str).tolist()
+    texts = [t for t in texts if t.strip()]
+
+    dataset = [rng.choice(texts) for _ in range(count)]
+    long_texts = [' '.join(rng.sample(texts, min(25, len(texts)))) for _ in range(count)]
+    popular = rng.sample(texts, min(20, len(texts)))
+    weights = [1.0 / (rank + 1) for rank in range(len(popular))]
+    duplicates = rng.choices(popular, weights=weights, k=count)
+
+    return {"dataset": dataset, "long": long_texts, "duplicates": duplicates}
+
+def request_texts(name: str, texts: List[str], run_tag: str) -> List[str]:
+    """Texts to send for one run; a trailing "#tag" yields no token, ROI or timeframe, only a new cache key"""
+    if name not in UNIQUE_CORPORA:
+        return texts
+    return [f"{text} #{run_tag}.{i}" for i, text in enumerate(texts)]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU time of a process, when /proc is available"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+class ScoreClient:
+    """Keep-alive HTTP connection per thread"""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.local = threading.local()
+
+    def connection(self) -> http.client.HTTPConnection:
+        if not hasattr(self.local, "connection"):
+            self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return self.local.connection
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> tuple:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            conn = self.connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (ConnectionError, http.client.HTTPException, OSError):
+            # Drop the broken connection so the next request reconnects
+            self.local.__dict__.pop("connection", None)
+            raise
+
+    def timed_score(self, text: str) -> tuple:
+        started = time.perf_counter()
+        try:
+            status, _ = self.request("POST", "/score", {"text": text})
+        except (ConnectionError, http.client.HTTPException, OSError):
+            status = 0
+        return (time.perf_counter() - started) * 1000, status
+
+def start_server(port: int, env_overrides: Dict[str, str], timeout: float) -> subprocess.Popen:
+    """Run the service under uvicorn and wait until it reports healthy"""
+    env = {**os.environ, **env_overrides}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    client = ScoreClient(f"http://127.0.0.1:{port}")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            status, body = client.request("GET", "/health")
+            if status == 200 and json.loads(body).get("status") == "healthy":
+                return server
+        except (ConnectionError, http.client.HTTPException, OSError):
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise TimeoutError(f"Server was not healthy within {timeout}s")
+
+def run_load(url: str, texts: List[str], concurrency: int, warmup: int, server_pid: Optional[int]) -> dict:
+    """Send the first warmup texts unmeasured, then the rest with a fixed number of concurrent clients"""
+    client = ScoreClient(url)
+    warmup_texts, texts = texts[:warmup], texts[warmup:]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client.timed_score, warmup_texts))
+
+        cpu_before = process_cpu_seconds(server_pid) if server_pid else None
+        started = time.perf_counter()
+        results = list(pool.map(client.timed_score, texts))
+        elapsed = time.perf_counter() - started
+        cpu_after = process_cpu_seconds(server_pid) if server_pid else None
+
+    latencies = sorted(latency for latency, status in results if status == 200)
+    statuses: Dict[str, int] = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(texts),
+        "succeeded": len(latencies),
+        "status_counts": statuses,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "server_cpu_ms_per_request": (
+            (cpu_after - cpu_before) * 1000 / len(texts)
+            if cpu_before is not None and cpu_after is not None else None
+        )
+    }
+
+def cpu_per_item(func, items: list, repeat: int) -> float:
+    """Best CPU time per item in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        for item in items:
+            func(item)
+        best = min(best, time.process_time() - started)
+    return best / len(items) * 1e6
+
+def stage_breakdown(corpora: Dict[str, List[str]], sample_size: int, repeat: int) -> dict:
+    """CPU time per request for extraction, vectorization and prediction, measured in-process"""
+    import app
+    from indicators import scan_text
+
+    serving = app.load_model_from_disk()
+    if serving is None:
+        raise FileNotFoundError("No model available for the stage breakdown")
+
+    breakdown = {"model_version": serving.version, "model_format": serving.model_format, "corpora": {}}
+    for name, texts in corpora.items():
+        sample = texts[:sample_size]
+        rows = []
+        for text in sample:
+            scan = scan_text(text)
+            rows.append({'text': text, 'roi_percentage': scan.returns or 0, 'timeframe': scan.timeframe or 'unknown'})
+
+        extraction = cpu_per_item(scan_text, sample, repeat)
+        total_prediction = cpu_per_item(lambda row: serving.predict_fraud_probabilities([row]), rows, repeat)
+        stages = {"extraction_us": extraction}
+        if serving.fast_scorer is not None:
+            vectorization = cpu_per_item(lambda row: serving.fast_scorer.transform([row]), rows, repeat)
+            stages["vectorization_us"] = vectorization
+            stages["prediction_us"] = max(0.0, total_prediction - vectorization)
+        else:
+            # The DataFrame pipeline cannot be split without re-implementing it
+            stages["vectorization_and_prediction_us"] = total_prediction
+        stages["total_us"] = extraction + total_prediction
+        breakdown["corpora"][name] = stages
+    return breakdown
+
+def timed_stage(results: dict, name: str, func, *args):
+    """Run func quietly and record its wall and CPU time under name"""
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = func(*args)
+    results[name] = {
+        "wall_seconds": time.perf_counter() - wall_started,
+        "cpu_seconds": time.process_time() - cpu_started
+    }
+    return value
+
+def train_breakdown(include_tuning: bool) -> dict:
+    """Wall and CPU time of the train.py stages, without saving or publishing a model"""
+    import tempfile
+
+    from sklearn.model_selection import train_test_split
+    import train
+
+    stages = {}
+    df = timed_stage(stages, "load_data", train.load_and_prepare_data)
+    X = df[['text', 'roi_percentage', 'timeframe']].copy()
+    X['text'] = X['text'].fillna("").astype(str)
+    y = df['label'].astype(int)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    timed_stage(stages, "feature_fit", lambda: train.create_feature_pipeline().fit_transform(X_train))
+    # Same shared preprocessing cache as train.main
+    feature_cache = train.create_feature_cache()
+    try:
+        best_model, best_name, _ = timed_stage(
+            stages, "evaluate_models", train.evaluate_models, X_train, X_test, y_train, y_test,
+            train.create_feature_pipeline(), feature_cache
+        )
+        if include_tuning:
+            timed_stage(stages, "hyperparameter_tuning", train.hyperparameter_tuning, X_train, y_train, feature_cache)
+    finally:
+        train.remove_feature_cache(feature_cache)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timed_stage(
+            stages, "compact_export",
+            lambda: train.export_compact(best_model, os.path.join(tmp, "model.compact"), train.SAMPLE_INPUTS)
+        )
+    return {"best_model": best_name, "training_samples": len(X_train), "stages": stages}
+
+def change_marker(improvement: float) -> str:
+    if abs(improvement) <= NOISE_PERCENT:
+        return "  "
+    return "✅" if improvement > 0 else "⚠️"
+
+def compare(results: dict, baseline: dict) -> List[str]:
+    """Human-readable relative changes against a baseline run"""
+    lines = []
+    for corpus, runs in results.get("service", {}).get("corpora", {}).items():
+        base_runs = {run["concurrency"]: run for run in baseline.get("service", {}).get("corpora", {}).get(corpus, [])}
+        for run in runs:
+            base = base_runs.get(run["concurrency"])
+            if base is None:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                if not base.get(metric):
+                    continue
+                change = (run[metric] - base[metric]) / base[metric] * 100
+                marker = change_marker(change if higher_is_better else -change)
+                lines.append(f"{marker} {corpus:10s} c={run['concurrency']:<3d} {metric:20s} {base[metric]:10.2f} -> {run[metric]:10.2f} ({change:+.1f}%)")
+
+    base_stages = baseline.get("train", {}).get("stages", {})
+    for stage, timing in results.get("train", {}).get("stages", {}).items():
+        base = base_stages.get(stage)
+        if base and base["wall_seconds"]:
+            change = (timing["wall_seconds"] - base["wall_seconds"]) / base["wall_seconds"] * 100
+            marker = change_marker(-change)
+            lines.append(f"{marker} train {stage:28s} {base['wall_seconds']:8.2f}s -> {timing['wall_seconds']:8.2f}s ({change:+.1f}%)")
+    return lines
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark an already running service instead of starting one')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated client concurrency levels')
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per corpus and level')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured requests before each run')
+    parser.add_argument('--corpora', default='dataset,long,duplicates', help='comma-separated corpora to replay')
+    parser.add_argument('--seed', type=int, default=42, help='seed for corpus generation')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='environment override for the started service, e.g. ML_POOL_WORKERS=2')
+    parser.add_argument('--stage-sample', type=int, default=200, help='requests per corpus for the stage breakdown')
+    parser.add_argument('--repeat', type=int, default=3, help='stage timing repetitions (best is reported)')
+    parser.add_argument('--tuning', action='store_true', help='also time hyperparameter tuning (slow)')
+    parser.add_argument('--skip-service', action='store_true', help='do not run the HTTP load test')
+    parser.add_argument('--skip-stages', action='store_true', help='do not run the in-process stage breakdown')
+    parser.add_argument('--skip-train', action='store_true', help='do not benchmark train.py')
+    parser.add_argument('--startup-timeout', type=float, default=600, help='seconds to wait for the service')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous JSON result')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    names = [name for name in args.corpora.split(',') if name]
+    corpora = build_corpora(args.requests + args.warmup, args.seed)
+    corpora = {name: corpora[name] for name in names}
+    results = {"environment": environment(), "config": vars(args)}
+
+    if not args.skip_service:
+        env_overrides = dict(item.split('=', 1) for item in args.env)
+        server = None
+        url = args.url
+        if url is None:
+            port = free_port()
+            print(f"Starting service on port {port}...")
+            server = start_server(port, env_overrides, args.startup_timeout)
+            url = f"http://127.0.0.1:{port}"
+        try:
+            status, body = ScoreClient(url).request("GET", "/health")
+            health = json.loads(body) if status == 200 else {}
+            service = {"url": url, "env": env_overrides, "model_version": health.get("model_version"), "corpora": {}}
+            print(f"\n{'corpus':10s} {'conc':>4s} {'rps':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>6s}")
+            print("-" * 60)
+            for name, texts in corpora.items():
+                service["corpora"][name] = []
+                for level in levels:
+                    run = run_load(
+                        url, request_texts(name, texts, f"{args.seed}.{level}"), level, args.warmup,
+                        server.pid if server else None
+                    )
+                    service["corpora"][name].append(run)
+                    errors = run["requests"] - run["succeeded"]
+                    print(f"{name:10s} {level:4d} {run['requests_per_second']:9.1f} {run['p50_ms']:8.2f} {run['p95_ms']:8.2f} {run['p99_ms']:8.2f} {errors:6d}")
+            results["service"] = service
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    if not args.skip_stages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["stages"] = stage_breakdown(corpora, args.stage_sample, args.repeat)
+        print(f"\nCPU per request, µs ({results['stages']['model_format']} model):")
+        print("-" * 60)
+        for name, stages in results["stages"]["corpora"].items():
+            print(f"{name:10s} " + "  ".join(f"{stage[:-3]} {value:9.1f}" for stage, value in stages.items()))
+
+    if not args.skip_train:
+        print("\nBenchmarking train.py stages...")
+        results["train"] = train_breakdown(args.tuning)
+        for stage, timing in results["train"]["stages"].items():
+            print(f"{stage:24s} wall {timing['wall_seconds']:8.2f}s   cpu {timing['cpu_seconds']:8.2f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nChanges against {args.baseline}:")
+        print("-" * 60)
+        for line in compare(results, baseline):
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Bulk scoring of large CSV or NDJSON files with the API's scoring logic.
+
+Rows are read in chunks and scored by a pool of forked worker processes
+through ``app.score_batch``, so features, predictions and risk indicators
+are exactly what /score/batch returns. The model is loaded once before the
+workers fork: its arrays are memory-mapped, so every worker reads the same
+pages instead of holding its own copy. Only a bounded number of chunks is
+in flight, which keeps memory flat however large the input is.
+
+Results are appended to the output as each chunk finishes, in input order,
+and a ``<output>.progress`` checkpoint records how many rows and bytes are
+complete. ``--resume`` truncates any partly written chunk and continues
+after the last checkpoint.
+
+    python bulk_score.py dump.ndjson -o scores.ndjson --workers 8
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import app
+from columnar import as_roi
+
+CHUNK_ROWS = int(os.environ.get("ML_BULK_CHUNK_ROWS", "1000"))
+OUTPUT_FIELDS = ["row", "id", "fraud_probability", "prediction", "confidence_level", "tier", "risk_indicators", "entity_mentions", "error"]
+
+def detect_format(path: str, requested: str = "auto") -> str:
+    if requested != "auto":
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+def read_rows(path: str, input_format: str, skip: int = 0) -> Iterator[dict]:
+    """Input rows as dicts, after skipping the first ``skip`` rows"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if input_format == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json_row(line) for line in f if line.strip())
+        for index, row in enumerate(rows):
+            if index >= skip:
+                yield row
+
+def json_row(line: str):
+    """Decoded NDJSON line, or None so the row is reported as invalid instead of stopping the run"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def read_chunks(path: str, input_format: str, chunk_rows: int, skip: int = 0) -> Iterator[tuple]:
+    """(first row index, rows) pairs of at most chunk_rows rows"""
+    chunk = []
+    start = skip
+    for row in read_rows(path, input_format, skip):
+        chunk.append(row)
+        if len(chunk) == chunk_rows:
+            yield start, chunk
+            start += len(chunk)
+            chunk = []
+    if chunk:
+        yield start, chunk
+
+# A CSV cell holding a whole number, as written by spreadsheets ("12") or pandas ("12.0")
+WHOLE_NUMBER_RE = re.compile(r"[+-]?\d+(?:\.0*)?")
+
+def parse_roi(value) -> Optional[int]:
+    """Whole-number ROI from a CSV cell or JSON value; 12.9 or 1e3 is rejected, as by /score"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        if not WHOLE_NUMBER_RE.fullmatch(value.strip()):
+            raise ValueError(f"roi_percentage must be a whole number, got {value!r}")
+        return int(value.strip().split(".")[0])
+    return as_roi(value)
+
+def parse_request(row: dict) -> app.ScoreRequest:
+    """ScoreRequest from an input row; empty CSV cells count as missing"""
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object with a text field")
+    timeframe = row.get("timeframe")
+    return app.ScoreRequest(
+        text=row.get("text") or "",
+        roi_percentage=parse_roi(row.get("roi_percentage")),
+        timeframe=timeframe or None
+    )
+
+def score_chunk(start: int, rows: List[dict], id_column: Optional[str]) -> List[dict]:
+    """Score one chunk in a worker, returning one output record per input row"""
+    records = [
+        {"row": start + i, "id": row.get(id_column) if id_column and isinstance(row, dict) else None, "error": None}
+        for i, row in enumerate(rows)
+    ]
+    requests = []
+    positions = []
+    for i, row in enumerate(rows):
+        try:
+            requests.append(parse_request(row))
+            positions.append(i)
+        except Exception as e:
+            records[i]["error"] = f"Invalid row: {str(e)}"
+
+    for position, item in zip(positions, app.score_batch(requests)):
+        record = records[position]
+        if item.result is None:
+            record["error"] = item.error
+            continue
+        record.update(
+            fraud_probability=item.result.fraud_probability,
+            prediction=item.result.prediction,
+            confidence_level=item.result.confidence_level,
+            tier=item.result.tier,
+            risk_indicators=item.result.risk_indicators,
+            entity_mentions=[mention.model_dump() for mention in item.result.entity_mentions]
+        )
+    return records
+
+def csv_value(field: str, value):
+    """Flatten list fields into one CSV cell"""
+    if value is None:
+        return None
+    if field == "risk_indicators":
+        return "; ".join(value)
+    if field == "entity_mentions":
+        return json.dumps(value)
+    return value
+
+class ResultWriter:
+    """Appends records to the output and checkpoints progress after each chunk"""
+
+    def __init__(self, path: str, output_format: str, input_path: str, resume: bool):
+        self.path = path
+        self.output_format = output_format
+        self.progress_path = f"{path}.progress"
+        self.rows = 0
+        offset = 0
+
+        if resume and os.path.exists(self.progress_path):
+            with open(self.progress_path) as f:
+                progress = json.load(f)
+            if progress.get("input") != os.path.abspath(input_path):
+                raise ValueError(f"{self.progress_path} belongs to {progress.get('input')}, not {input_path}")
+            self.rows = progress["rows"]
+            offset = progress["offset"]
+
+        self.file = open(path, "r+b" if offset else "wb")
+        # Anything after the checkpoint is a partly written chunk that will be scored again
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.input_path = os.path.abspath(input_path)
+        if offset == 0 and output_format == "csv":
+            self._write_csv_row(OUTPUT_FIELDS)
+
+    def _write_csv_row(self, values: list):
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(["" if v is None else v for v in values])
+        self.file.write(line.getvalue().encode("utf-8"))
+
+    def write(self, records: List[dict]):
+        for record in records:
+            if self.output_format == "csv":
+                self._write_csv_row([csv_value(field, record.get(field)) for field in OUTPUT_FIELDS])
+            else:
+                self.file.write((json.dumps({field: record.get(field) for field in OUTPUT_FIELDS}) + "\n").encode("utf-8"))
+        self.rows += len(records)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._checkpoint()
+
+    def _checkpoint(self):
+        partial_path = f"{self.progress_path}.partial"
+        with open(partial_path, "w") as f:
+            json.dump({"input": self.input_path, "rows": self.rows, "offset": self.file.tell()}, f)
+        os.replace(partial_path, self.progress_path)
+
+    def close(self):
+        self.file.close()
+
+def run(input_path: str, output_path: str, input_format: str = "auto", output_format: str = "auto",
+        workers: int = os.cpu_count() or 1, chunk_rows: int = CHUNK_ROWS, resume: bool = False,
+        id_column: Optional[str] = "id") -> dict:
+    """Score input_path into output_path, returning row counts and throughput"""
+    input_format = detect_format(input_path, input_format)
+    output_format = detect_format(output_path, output_format)
+
+    # Loaded before the workers fork, so they share the model's pages
+    app.model = app.load_model_from_disk()
+    if app.model is None:
+        raise RuntimeError("No model available; run train.py first")
+    try:
+        app.entity_index = app.load_entity_index()
+    except Exception as e:
+        print(f"⚠️ Scoring without entity mentions, registry index unavailable: {str(e)}")
+
+    writer = ResultWriter(output_path, output_format, input_path, resume)
+    skipped = writer.rows
+    if skipped:
+        print(f"🔄 Resuming after {skipped} rows")
+
+    started = time.perf_counter()
+    failed = 0
+    last_report = started
+
+    def finish(records: List[dict]):
+        nonlocal failed, last_report
+        writer.write(records)
+        failed += sum(1 for record in records if record["error"])
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            done = writer.rows - skipped
+            print(f"⏱️ {writer.rows} rows scored ({done / (now - started):.0f} rows/s)")
+            last_report = now
+
+    chunks = read_chunks(input_path, input_format, chunk_rows, skipped)
+    try:
+        if workers <= 0:
+            app.open_result_cache()
+            app.open_near_duplicate_index()
+            for start, rows in chunks:
+                finish(score_chunk(start, rows, id_column))
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=app.init_pool_worker
+            )
+            # A couple of chunks per worker keeps every core busy while bounding memory
+            pending = deque()
+            try:
+                for start, rows in chunks:
+                    pending.append(pool.submit(score_chunk, start, rows, id_column))
+                    if len(pending) >= workers * 2:
+                        finish(pending.popleft().result())
+                while pending:
+                    finish(pending.popleft().result())
+            finally:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    scored = writer.rows - skipped
+    summary = {
+        "rows": writer.rows,
+        "scored": scored,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(scored / elapsed, 1) if elapsed > 0 else None
+    }
+    print(f"✅ Scored {scored} rows in {elapsed:.1f}s ({summary['rows_per_second']} rows/s, {failed} failed); output: {output_path}")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or NDJSON file of messages with the fraud model")
+    parser.add_argument("input", help="CSV with a header row, or NDJSON; needs a text field, roi_percentage and timeframe are optional")
+    parser.add_argument("-o", "--output", required=True, help="output file; .csv writes CSV, anything else NDJSON")
+    parser.add_argument("--input-format", choices=["auto", "csv", "ndjson"], default="auto")
+    parser.add_argument("--output-format", choices=["auto", "csv", "ndjson"], default="auto")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes; 0 scores in this process")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_ROWS, help="rows per chunk handed to a worker")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run from its checkpoint")
+    parser.add_argument("--id-column", default="id", help="input field copied to the output to identify rows")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, args.input_format, args.output_format,
+            args.workers, args.chunk_size, args.resume, args.id_column)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ Bulk scoring failed: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
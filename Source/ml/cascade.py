@@ -0,0 +1,185 @@
+"""Rule pre-screen that answers obvious cases before the full model runs.
+
+The first tier is a logistic model over the rule indicators that scoring
+extracts anyway (keyword hits, ROI and timeframe), optionally extended with
+hashed words of the text. Its probability costs a dot product of a few dozen
+weights. When it is at or above ``high`` or at or below ``low`` the verdict
+is final; anything in between goes to the full model.
+
+``train.py`` fits the weights on the training split and picks ``low`` and
+``high`` on the test split so that exiting early costs at most a target
+accuracy loss against the full model. The result is saved as JSON next to
+the model it was calibrated for and is ignored by any other model.
+"""
+import json
+import math
+import os
+import re
+import zlib
+from typing import FrozenSet, List, Optional
+
+from indicators import HIGH_RISK_TIMEFRAMES, KEYWORD_INDICATORS, VERY_SHORT_TIMEFRAMES
+
+CASCADE_FORMAT = 1
+# Thresholds no probability reaches, for a side without early exits
+NEVER_LOW = -1.0
+NEVER_HIGH = 2.0
+MAX_THRESHOLD_CANDIDATES = 256
+WORD_RE = re.compile(r"[a-z]{2,}")
+
+RULE_FEATURES = [indicator for _, indicator in KEYWORD_INDICATORS] + [
+    "roi > 10", "roi > 20", "roi > 50", "roi > 100", "no roi",
+    "high-risk timeframe", "very short timeframe"
+]
+
+def rule_features(keywords: FrozenSet[str], roi_percentage, timeframe: Optional[str]) -> List[float]:
+    """0/1 values of RULE_FEATURES for one message"""
+    roi = roi_percentage or 0
+    timeframe_lower = (timeframe or "").lower()
+    return [float(indicator in keywords) for _, indicator in KEYWORD_INDICATORS] + [
+        float(roi > 10), float(roi > 20), float(roi > 50), float(roi > 100), float(roi == 0),
+        float(any(risk_tf in timeframe_lower for risk_tf in HIGH_RISK_TIMEFRAMES)),
+        float(any(risk_tf in timeframe_lower for risk_tf in VERY_SHORT_TIMEFRAMES))
+    ]
+
+def hashed_words(text: str, hash_features: int) -> List[int]:
+    """Distinct hash buckets of the text's words, offset past the rule features"""
+    if not hash_features:
+        return []
+    return sorted({
+        len(RULE_FEATURES) + zlib.crc32(word.encode("utf-8")) % hash_features
+        for word in WORD_RE.findall(text.lower())
+    })
+
+def feature_row(text: str, keywords: FrozenSet[str], roi_percentage, timeframe: Optional[str], hash_features: int = 0) -> List[float]:
+    """Dense first-tier features: rule values followed by the hashed-word buckets"""
+    row = rule_features(keywords, roi_percentage, timeframe) + [0.0] * hash_features
+    for column in hashed_words(text, hash_features):
+        row[column] = 1.0
+    return row
+
+class RuleCascade:
+    def __init__(self, weights: List[float], bias: float, low: float, high: float,
+                 hash_features: int = 0, source_hash: Optional[str] = None, calibration: Optional[dict] = None):
+        if len(weights) != len(RULE_FEATURES) + hash_features:
+            raise ValueError(f"Expected {len(RULE_FEATURES) + hash_features} weights, got {len(weights)}")
+        self.weights = weights
+        self.rule_weights = weights[:len(RULE_FEATURES)]
+        self.bias = bias
+        self.low = low
+        self.high = high
+        self.hash_features = hash_features
+        self.source_hash = source_hash
+        self.calibration = calibration or {}
+
+    def probability(self, text: str, roi_percentage, timeframe: Optional[str], keywords: FrozenSet[str]) -> float:
+        """First-tier fraud probability of one resolved message"""
+        values = rule_features(keywords, roi_percentage, timeframe)
+        score = self.bias + sum(w * v for w, v in zip(self.rule_weights, values))
+        for column in hashed_words(text, self.hash_features):
+            score += self.weights[column]
+        # Clamped so exp() cannot overflow on extreme weights
+        return 1.0 / (1.0 + math.exp(-max(min(score, 50.0), -50.0)))
+
+    def decide(self, text: str, roi_percentage, timeframe: Optional[str], keywords: FrozenSet[str]) -> Optional[float]:
+        """The first-tier probability if it is confident enough to skip the full model"""
+        probability = self.probability(text, roi_percentage, timeframe, keywords)
+        if probability >= self.high or probability <= self.low:
+            return probability
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "format": CASCADE_FORMAT,
+            "features": RULE_FEATURES,
+            "hash_features": self.hash_features,
+            "weights": self.weights,
+            "bias": self.bias,
+            "low": self.low,
+            "high": self.high,
+            "source_hash": self.source_hash,
+            "calibration": self.calibration
+        }
+
+    def save(self, path: str):
+        partial_path = f"{path}.partial"
+        with open(partial_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(partial_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RuleCascade":
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("format") != CASCADE_FORMAT or data.get("features") != RULE_FEATURES:
+            raise ValueError("it was calibrated for a different rule set")
+        return cls(data["weights"], data["bias"], data["low"], data["high"],
+                   data.get("hash_features", 0), data.get("source_hash"), data.get("calibration"))
+
+    def info(self) -> dict:
+        return {
+            "low": self.low,
+            "high": self.high,
+            "hash_features": self.hash_features,
+            "calibration": self.calibration
+        }
+
+def load_cascade(path: str, content_hash: str) -> Optional[RuleCascade]:
+    """The cascade calibrated for the model with content_hash, or None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        cascade = RuleCascade.load(path)
+    except Exception as e:
+        print(f"⚠️ Ignoring cascade {path}: {str(e)}")
+        return None
+    if cascade.source_hash != content_hash:
+        print(f"⚠️ Ignoring cascade {path}: it was calibrated for a different model")
+        return None
+    print(f"✅ Cascade loaded from: {path} (exits below {cascade.low:.3f} and above {cascade.high:.3f})")
+    return cascade
+
+def threshold_candidates(rows, min_confidence: float, descending: bool) -> List[tuple]:
+    """(threshold, rows exiting, accuracy lost) for thresholds on one side
+
+    Rows are (probability, loss if the row exits) sorted by probability.
+    Thresholds fall between groups of equal probabilities, since serving
+    exits every row at the threshold, and are thinned to a bounded count.
+    """
+    candidates = []
+    exits = loss = 0
+    ordered = list(reversed(rows)) if descending else rows
+    for i, (probability, delta) in enumerate(ordered):
+        if (probability < min_confidence) if descending else (probability > 1 - min_confidence):
+            break
+        exits += 1
+        loss += delta
+        if i + 1 == len(ordered) or ordered[i + 1][0] != probability:
+            candidates.append((probability, exits, loss))
+    step = max(1, len(candidates) // MAX_THRESHOLD_CANDIDATES)
+    return candidates[step - 1::step] + candidates[-1:]
+
+def choose_thresholds(probabilities, tier_correct, model_correct, max_accuracy_loss: float, min_confidence: float) -> tuple:
+    """(low, high) that let the most rows exit early within max_accuracy_loss
+
+    A row that exits loses accuracy when the model was right and the first
+    tier is wrong, and gains it in the opposite case. The losses of the two
+    sides add up, so each side's thresholds are scored once and the best
+    pair within the budget is picked. ``high`` never goes below
+    min_confidence and ``low`` never above 1 - min_confidence.
+    """
+    n = len(probabilities)
+    rows = sorted(zip(probabilities, [int(m) - int(t) for t, m in zip(tier_correct, model_correct)]))
+    # Out-of-range thresholds mean no early exits on that side
+    highs = [(NEVER_HIGH, 0, 0)] + threshold_candidates(rows, min_confidence, descending=True)
+    lows = [(NEVER_LOW, 0, 0)] + threshold_candidates(rows, min_confidence, descending=False)
+
+    best = None
+    for high, high_exits, high_loss in highs:
+        for low, low_exits, low_loss in lows:
+            if low >= high or (high_loss + low_loss) / n > max_accuracy_loss:
+                continue
+            key = (high_exits + low_exits, -(high_loss + low_loss))
+            if best is None or key > best[0]:
+                best = (key, low, high)
+    return best[1], best[2]
@@ -0,0 +1,143 @@
+"""Binary columnar bodies for high-throughput scoring.
+
+``/score/columnar`` takes the same inputs as ``/score/batch``, but as
+columns rather than a list of JSON objects, and answers with columns in the
+same format:
+
+- ``application/msgpack``: a map of column name to array, e.g.
+  ``{"text": [...], "roi_percentage": [...], "timeframe": [...]}``
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream whose record
+  batches have those columns
+
+``text`` is required; ``roi_percentage`` and ``timeframe`` may be left out
+or hold nulls, which are then extracted from the text as for JSON requests.
+Columns go straight into the vectorized scoring path, so no request or
+response object is built per row.
+
+msgpack and pyarrow are optional (``pip install -r requirements-columnar.txt``);
+a format whose library is missing is answered with 415 instead of failing
+the service.
+"""
+from typing import List, NamedTuple, Optional
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+INPUT_COLUMNS = ("text", "roi_percentage", "timeframe")
+RESULT_COLUMNS = (
+    "fraud_probability", "prediction", "confidence_level", "tier", "risk_indicators",
+    "entity_mentions", "near_duplicate_cluster", "near_duplicate_similarity", "error"
+)
+MENTION_FIELDS = ("kind", "name", "registration_id", "status", "matched_text")
+
+class ScoringColumns(NamedTuple):
+    texts: List[Optional[str]]
+    roi_percentages: List[Optional[int]]
+    timeframes: List[Optional[str]]
+
+def media_type(content_type: Optional[str]) -> Optional[str]:
+    """The supported binary format named by a Content-Type header, or None"""
+    value = (content_type or "").split(";")[0].strip().lower()
+    if value in MSGPACK_TYPES:
+        return MSGPACK_TYPES[0]
+    if value == ARROW_STREAM_TYPE:
+        return ARROW_STREAM_TYPE
+    return None
+
+def as_roi(value) -> Optional[int]:
+    """Whole-number ROI, like the JSON API's integer field"""
+    if value is None or isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"roi_percentage must be a whole number, got {value!r}")
+
+def checked_columns(texts: list, roi_percentages: Optional[list], timeframes: Optional[list]) -> ScoringColumns:
+    """Validate decoded columns and fill in the optional ones"""
+    n_rows = len(texts)
+    if roi_percentages is None:
+        roi_percentages = [None] * n_rows
+    if timeframes is None:
+        timeframes = [None] * n_rows
+    if len(roi_percentages) != n_rows or len(timeframes) != n_rows:
+        raise ValueError("Columns must all have the same length")
+    if any(text is not None and not isinstance(text, str) for text in texts):
+        raise ValueError("text must be a column of strings")
+    if any(timeframe is not None and not isinstance(timeframe, str) for timeframe in timeframes):
+        raise ValueError("timeframe must be a column of strings")
+    return ScoringColumns(texts, roi_percentages, timeframes)
+
+def decode_msgpack(body: bytes) -> ScoringColumns:
+    import msgpack
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(f"Invalid msgpack body: {str(e)}")
+    if not isinstance(data, dict) or not isinstance(data.get("text"), list):
+        raise ValueError("Body must be a map with a text array")
+    columns = {}
+    for name in INPUT_COLUMNS[1:]:
+        column = data.get(name)
+        if column is not None and not isinstance(column, list):
+            raise ValueError(f"{name} must be an array")
+        columns[name] = column
+    roi_percentages = columns["roi_percentage"]
+    if roi_percentages is not None:
+        roi_percentages = [as_roi(value) for value in roi_percentages]
+    return checked_columns(data["text"], roi_percentages, columns["timeframe"])
+
+def decode_arrow(body: bytes) -> ScoringColumns:
+    import pyarrow as pa
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except Exception as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {str(e)}")
+    if "text" not in table.column_names:
+        raise ValueError("Record batches must have a text column")
+    try:
+        texts = table.column("text").cast(pa.string()).to_pylist()
+        roi_percentages = timeframes = None
+        if "roi_percentage" in table.column_names:
+            # A safe cast rejects fractional values
+            roi_percentages = table.column("roi_percentage").cast(pa.int64()).to_pylist()
+        if "timeframe" in table.column_names:
+            timeframes = table.column("timeframe").cast(pa.string()).to_pylist()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"Unsupported column type: {str(e)}")
+    return checked_columns(texts, roi_percentages, timeframes)
+
+def decode_columns(body: bytes, media: str) -> ScoringColumns:
+    """Input columns of a msgpack or Arrow IPC body
+
+    Raises ValueError for a malformed body and ImportError when the format's
+    library is not installed.
+    """
+    if media == ARROW_STREAM_TYPE:
+        return decode_arrow(body)
+    return decode_msgpack(body)
+
+def encode_arrow(results: dict) -> bytes:
+    import pyarrow as pa
+    mention = pa.struct([(field, pa.string()) for field in MENTION_FIELDS])
+    schema = pa.schema([
+        ("fraud_probability", pa.float64()),
+        ("prediction", pa.string()),
+        ("confidence_level", pa.string()),
+        ("tier", pa.string()),
+        ("risk_indicators", pa.list_(pa.string())),
+        ("entity_mentions", pa.list_(mention)),
+        ("near_duplicate_cluster", pa.string()),
+        ("near_duplicate_similarity", pa.float64()),
+        ("error", pa.string())
+    ])
+    batch = pa.record_batch([results[name] for name in RESULT_COLUMNS], schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def encode_columns(results: dict, media: str) -> bytes:
+    """Result columns in the format the request came in"""
+    if media == ARROW_STREAM_TYPE:
+        return encode_arrow(results)
+    import msgpack
+    return msgpack.packb(results, use_bin_type=True)
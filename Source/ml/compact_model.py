@@ -0,0 +1,428 @@
+"""Compact, memory-mapped inference artifact for the trained pipeline.
+
+``export_compact`` flattens a fitted Pipeline([preprocessor, classifier]) from
+train.py into plain arrays: the TF-IDF vocabulary as a sorted byte-string
+array, the IDF vector, the scaler and encoder parameters, and either flat
+tree-node arrays (GradientBoosting, RandomForest) or linear coefficients
+(LogisticRegression). ``CompactModel.load`` memory-maps that file, so worker
+processes share its pages, and scores with vectorized NumPy without
+unpickling any scikit-learn objects.
+
+File layout: MAGIC, a little-endian uint64 header length, a JSON header
+(metadata plus dtype/shape/offset of every array), then the arrays, each
+aligned to 64 bytes.
+"""
+import json
+import math
+import os
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+MAGIC = b"VERIFI\x00\x01"
+ALIGNMENT = 64
+# Rows densified at once when walking trees
+TREE_CHUNK_ROWS = 512
+
+def strip_accents_unicode(s: str) -> str:
+    """Same as sklearn.feature_extraction.text.strip_accents_unicode"""
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+def strip_accents_ascii(s: str) -> str:
+    """Same as sklearn.feature_extraction.text.strip_accents_ascii"""
+    nkfd_form = unicodedata.normalize("NFKD", s)
+    return nkfd_form.encode("ASCII", "ignore").decode("ASCII")
+
+def write_arrays(path: str, meta: dict, arrays: Dict[str, np.ndarray]):
+    """Write metadata and arrays in the compact container format"""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"meta": meta, "arrays": layout}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+
+def read_arrays(path: str) -> tuple:
+    """Memory-map a compact container and return (meta, arrays)"""
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(mapped[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a compact model file")
+    header_length = int.from_bytes(bytes(mapped[len(MAGIC):len(MAGIC) + 8]), "little")
+    header_end = len(MAGIC) + 8 + header_length
+    header = json.loads(bytes(mapped[len(MAGIC) + 8:header_end]).decode("utf-8"))
+    data_start = -(-header_end // ALIGNMENT) * ALIGNMENT
+
+    arrays = {
+        name: np.ndarray(
+            shape=tuple(spec["shape"]),
+            dtype=np.dtype(spec["dtype"]),
+            buffer=mapped,
+            offset=data_start + spec["offset"]
+        )
+        for name, spec in header["arrays"].items()
+    }
+    return header["meta"], arrays
+
+def _flatten_trees(trees: list, n_classes: int) -> dict:
+    """Concatenate fitted sklearn trees into flat node arrays with global child indices"""
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        left = t.children_left.astype(np.int64)
+        right = t.children_right.astype(np.int64)
+        is_leaf = left == -1
+        lefts.append(np.where(is_leaf, -1, left + offset))
+        rights.append(np.where(is_leaf, -1, right + offset))
+        features.append(np.where(is_leaf, 0, t.feature).astype(np.int64))
+        thresholds.append(t.threshold.astype(np.float64))
+        values.append(t.value[:, 0, :n_classes].astype(np.float64))
+        roots.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+
+    return {
+        "tree_left": np.concatenate(lefts),
+        "tree_right": np.concatenate(rights),
+        "tree_feature": np.concatenate(features),
+        "tree_threshold": np.concatenate(thresholds),
+        "tree_value": np.concatenate(values),
+        "tree_roots": np.array(roots, dtype=np.int64),
+        "max_depth": max_depth
+    }
+
+def export_compact(pipeline, path: str, samples: List[dict], source_hash: str = None) -> dict:
+    """Flatten a fitted training pipeline into a compact artifact at path"""
+    import pandas as pd
+    from sklearn.dummy import DummyClassifier
+    from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    preprocessor = pipeline.named_steps['preprocessor']
+    classifier = pipeline.named_steps['classifier']
+    transformers = {name: transformer for name, transformer, _ in preprocessor.transformers_}
+    order = [name for name, _, _ in preprocessor.transformers_ if name != 'remainder']
+    if order != ['text', 'returns', 'timeframe'] or transformers.get('remainder', 'drop') != 'drop':
+        raise ValueError(f"Unsupported preprocessor layout: {order}")
+
+    vectorizer = transformers['text']
+    if not hasattr(vectorizer, 'vocabulary_'):
+        raise ValueError(f"{type(vectorizer).__name__} has no vocabulary to export")
+    if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Only the default word analyzer can be exported")
+    if vectorizer.strip_accents not in (None, 'unicode', 'ascii') or vectorizer.binary or vectorizer.norm not in (None, 'l2'):
+        raise ValueError("Unsupported TF-IDF settings")
+
+    scaler = transformers['returns']
+    encoder = transformers['timeframe']
+    if encoder.drop is not None or getattr(encoder, '_infrequent_enabled', False):
+        raise ValueError("Only plain one-hot encoding can be exported")
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    if terms != sorted(terms):
+        raise ValueError("Vocabulary indices are not in sorted order")
+    encoded_terms = [term.encode("utf-8") for term in terms]
+    vocabulary = np.array(encoded_terms, dtype=f"S{max(len(t) for t in encoded_terms)}")
+    stop_words = vectorizer.get_stop_words()
+
+    arrays = {
+        "vocabulary": vocabulary,
+        "idf": vectorizer.idf_.astype(np.float64),
+        "roi_mean": np.array([scaler.mean_[0] if scaler.with_mean else 0.0]),
+        "roi_scale": np.array([scaler.scale_[0] if scaler.with_std else 1.0])
+    }
+    meta = {
+        "format_version": 1,
+        "source_hash": source_hash,
+        "lowercase": bool(vectorizer.lowercase),
+        "strip_accents": vectorizer.strip_accents,
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "stop_words": sorted(stop_words) if stop_words else None,
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "norm": vectorizer.norm,
+        "use_idf": bool(vectorizer.use_idf),
+        "roi_centered": bool(scaler.with_mean),
+        "roi_scaled": bool(scaler.with_std),
+        "timeframe_categories": [str(c) for c in encoder.categories_[0]],
+        "classes": [int(c) for c in classifier.classes_],
+        "classifier_type": type(classifier).__name__
+    }
+    if len(meta["classes"]) != 2:
+        raise ValueError("Only binary classifiers can be exported")
+
+    if isinstance(classifier, GradientBoostingClassifier):
+        if not (classifier.init_ == 'zero' or isinstance(classifier.init_, DummyClassifier)):
+            raise ValueError("Only constant GradientBoosting init estimators can be exported")
+        probe = preprocessor.transform(pd.DataFrame(samples[:1]))
+        trees = _flatten_trees(classifier.estimators_[:, 0], n_classes=1)
+        meta.update(kind="boosting", learning_rate=float(classifier.learning_rate), max_depth=trees.pop("max_depth"))
+        arrays.update(trees)
+        arrays["init_raw"] = np.array([classifier._raw_predict_init(probe)[0, 0]])
+    elif isinstance(classifier, (RandomForestClassifier, ExtraTreesClassifier)):
+        trees = _flatten_trees(classifier.estimators_, n_classes=2)
+        meta.update(kind="forest", max_depth=trees.pop("max_depth"))
+        arrays.update(trees)
+    elif isinstance(classifier, LogisticRegression):
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression can be exported")
+        meta.update(kind="linear")
+        arrays["coef"] = classifier.coef_[0].astype(np.float64)
+        arrays["intercept"] = classifier.intercept_.astype(np.float64)
+    else:
+        raise ValueError(f"{type(classifier).__name__} cannot be exported to the compact format")
+
+    # Reference outputs let the loader check itself without scikit-learn
+    meta["verify_samples"] = samples
+    meta["verify_probabilities"] = pipeline.predict_proba(pd.DataFrame(samples))[:, 1].tolist()
+
+    # Written beside the target and renamed, so a running service never maps a partial file
+    partial_path = f"{path}.partial"
+    write_arrays(partial_path, meta, arrays)
+    try:
+        CompactModel.load(partial_path).verify()
+    except Exception:
+        os.remove(partial_path)
+        raise
+    os.replace(partial_path, path)
+    return meta
+
+class CompactModel:
+    """Scores feature rows from a memory-mapped compact artifact"""
+
+    def __init__(self, meta: dict, arrays: Dict[str, np.ndarray], path: str = None):
+        self.meta = meta
+        self.arrays = arrays
+        self.path = path
+        self.kind = meta["kind"]
+        self.lowercase = meta["lowercase"]
+        self.accent_function = {
+            "unicode": strip_accents_unicode,
+            "ascii": strip_accents_ascii
+        }.get(meta["strip_accents"])
+        self.token_re = re.compile(meta["token_pattern"])
+        self.min_n, self.max_n = meta["ngram_range"]
+        self.stop_words = frozenset(meta["stop_words"] or ())
+
+        self.vocabulary = arrays["vocabulary"]
+        self.term_width = self.vocabulary.dtype.itemsize
+        self.idf = arrays["idf"]
+        self.n_text = len(self.vocabulary)
+        self.roi_mean = float(arrays["roi_mean"][0])
+        self.roi_scale = float(arrays["roi_scale"][0])
+        self.timeframe_index = {c: i for i, c in enumerate(meta["timeframe_categories"])}
+        self.n_features = self.n_text + 1 + len(self.timeframe_index)
+
+        if self.kind in ("boosting", "forest"):
+            feature = arrays["tree_feature"]
+            # Trees only read a small subset of columns; densify just those
+            self.used_features = np.unique(feature[arrays["tree_left"] != -1])
+            self.used_position = np.full(self.n_features, -1, dtype=np.int64)
+            self.used_position[self.used_features] = np.arange(len(self.used_features))
+            self.node_column = self.used_position[feature].clip(min=0)
+
+    @classmethod
+    def load(cls, path: str) -> "CompactModel":
+        meta, arrays = read_arrays(path)
+        if meta.get("format_version") != 1:
+            raise ValueError(f"Unsupported compact model version: {meta.get('format_version')}")
+        return cls(meta, arrays, path)
+
+    def analyze(self, doc: str) -> List[str]:
+        """Tokenize and build n-grams like the fitted TfidfVectorizer"""
+        if self.lowercase:
+            doc = doc.lower()
+        if self.accent_function is not None:
+            doc = self.accent_function(doc)
+        tokens = [w for w in self.token_re.findall(doc) if w not in self.stop_words]
+
+        min_n, max_n = self.min_n, self.max_n
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                grams.append(" ".join(tokens[i:i + n]))
+        return grams
+
+    def text_features(self, texts: List[str]) -> sparse.csr_matrix:
+        """TF-IDF rows, bit-identical to the fitted vectorizer"""
+        doc_ids = []
+        encoded = []
+        for i, text in enumerate(texts):
+            for gram in self.analyze(text):
+                term = gram.encode("utf-8")
+                # Longer grams cannot be in the vocabulary and would be truncated by the S dtype
+                if len(term) <= self.term_width:
+                    encoded.append(term)
+                    doc_ids.append(i)
+
+        n_rows = len(texts)
+        if encoded:
+            terms = np.array(encoded, dtype=self.vocabulary.dtype)
+            columns = np.searchsorted(self.vocabulary, terms)
+            columns[columns == self.n_text] = 0
+            found = self.vocabulary[columns] == terms
+            keys, counts = np.unique(
+                np.asarray(doc_ids, dtype=np.int64)[found] * self.n_text + columns[found],
+                return_counts=True
+            )
+        else:
+            keys = np.empty(0, dtype=np.int64)
+            counts = np.empty(0, dtype=np.int64)
+
+        rows = keys // self.n_text
+        indices = keys % self.n_text
+        data = counts.astype(np.float64)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+
+        if self.meta["sublinear_tf"]:
+            np.log(data, data)
+            data += 1.0
+        if self.meta["use_idf"]:
+            data *= self.idf[indices]
+        if self.meta["norm"] == "l2":
+            squares = data * data
+            for i in range(n_rows):
+                start, end = indptr[i], indptr[i + 1]
+                # Sequential sum, matching sklearn's inplace_csr_row_normalize_l2
+                total = 0.0
+                for value in squares[start:end].tolist():
+                    total += value
+                if total != 0.0:
+                    data[start:end] /= math.sqrt(total)
+
+        return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, self.n_text))
+
+    def transform(self, rows: List[dict]) -> sparse.csr_matrix:
+        """Full classifier input: TF-IDF, scaled ROI and timeframe one-hot"""
+        return self.transform_columns(
+            [row['text'] for row in rows], [row['roi_percentage'] for row in rows], [row['timeframe'] for row in rows]
+        )
+
+    def transform_columns(self, texts: List[str], roi_percentages, timeframes: List[str]) -> sparse.csr_matrix:
+        """Classifier input from separate text, roi_percentage and timeframe columns"""
+        text = self.text_features(texts)
+        roi = np.array(roi_percentages, dtype=np.float64)
+        if self.meta["roi_centered"]:
+            roi -= self.roi_mean
+        if self.meta["roi_scaled"]:
+            roi /= self.roi_scale
+        timeframe = np.array([self.timeframe_index.get(value, -1) for value in timeframes], dtype=np.int64)
+
+        n_rows = len(texts)
+        text_counts = np.diff(text.indptr)
+        has_roi = roi != 0
+        has_timeframe = timeframe >= 0
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(text_counts + has_roi + has_timeframe, out=indptr[1:])
+        indices = np.empty(indptr[-1], dtype=np.int64)
+        data = np.empty(indptr[-1], dtype=np.float64)
+
+        text_positions = np.arange(text.nnz) + np.repeat(indptr[:-1] - text.indptr[:-1], text_counts)
+        indices[text_positions] = text.indices
+        data[text_positions] = text.data
+        roi_positions = (indptr[:-1] + text_counts)[has_roi]
+        indices[roi_positions] = self.n_text
+        data[roi_positions] = roi[has_roi]
+        timeframe_positions = (indptr[:-1] + text_counts + has_roi)[has_timeframe]
+        indices[timeframe_positions] = self.n_text + 1 + timeframe[has_timeframe]
+        data[timeframe_positions] = 1.0
+
+        return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, self.n_features))
+
+    def _leaf_values(self, X: sparse.csr_matrix) -> np.ndarray:
+        """Leaf value of every tree for every row, shape (rows, trees, outputs)"""
+        a = self.arrays
+        roots = a["tree_roots"]
+        results = []
+        for start in range(0, X.shape[0], TREE_CHUNK_ROWS):
+            chunk = X[start:start + TREE_CHUNK_ROWS]
+            # Trees compare float32 feature values, as sklearn casts X to float32
+            dense = np.zeros((chunk.shape[0], len(self.used_features)), dtype=np.float32)
+            rows = np.repeat(np.arange(chunk.shape[0]), np.diff(chunk.indptr))
+            positions = self.used_position[chunk.indices]
+            used = positions >= 0
+            dense[rows[used], positions[used]] = chunk.data[used]
+
+            node = np.broadcast_to(roots, (chunk.shape[0], len(roots))).copy()
+            row_index = np.arange(chunk.shape[0])[:, None]
+            for _ in range(self.meta["max_depth"]):
+                left = a["tree_left"][node]
+                internal = left != -1
+                if not internal.any():
+                    break
+                go_left = dense[row_index, self.node_column[node]] <= a["tree_threshold"][node]
+                node = np.where(internal, np.where(go_left, left, a["tree_right"][node]), node)
+            results.append(a["tree_value"][node])
+        return np.concatenate(results) if results else np.empty((0, len(roots), a["tree_value"].shape[1]))
+
+    def predict_proba(self, rows: List[dict]) -> np.ndarray:
+        """Class probabilities for feature rows, matching the exported pipeline"""
+        return self.predict_proba_features(self.transform(rows))
+
+    def predict_proba_features(self, X: sparse.csr_matrix) -> np.ndarray:
+        """Class probabilities for an already transformed feature matrix"""
+        if self.kind == "linear":
+            decision = (X @ self.arrays["coef"][:, None]).ravel() + self.arrays["intercept"][0]
+            positive = expit(decision)
+        elif self.kind == "boosting":
+            leaves = self._leaf_values(X)[:, :, 0]
+            raw = np.full(X.shape[0], self.arrays["init_raw"][0])
+            learning_rate = self.meta["learning_rate"]
+            # Stage by stage, the same accumulation order as sklearn's predict_stages
+            for stage in range(leaves.shape[1]):
+                raw += learning_rate * leaves[:, stage]
+            positive = expit(raw)
+        else:
+            leaves = self._leaf_values(X)
+            proba = np.zeros((X.shape[0], 2))
+            for tree in range(leaves.shape[1]):
+                proba += leaves[:, tree, :]
+            proba /= leaves.shape[1]
+            return proba
+
+        proba = np.empty((X.shape[0], 2))
+        proba[:, 1] = positive
+        proba[:, 0] = 1 - positive
+        return proba
+
+    def verify(self):
+        """Check the artifact reproduces the probabilities recorded at export"""
+        expected = np.array(self.meta["verify_probabilities"])
+        actual = self.predict_proba(self.meta["verify_samples"])[:, 1]
+        # Forest averages are summed in thread order by sklearn, so allow rounding noise there
+        tolerance = 1e-12 if self.kind == "forest" else 0.0
+        if not np.allclose(actual, expected, rtol=0.0, atol=tolerance):
+            raise ValueError(f"Compact model {self.path} does not reproduce its reference probabilities")
+
+    def info(self) -> dict:
+        return {
+            "model_type": self.meta["classifier_type"],
+            "feature_count": self.n_text,
+            "pipeline_steps": ["preprocessor", "classifier"],
+            "format": "compact",
+            "size_bytes": int(sum(a.nbytes for a in self.arrays.values()))
+        }
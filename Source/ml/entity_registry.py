@@ -0,0 +1,346 @@
+"""In-memory index of registered advisors, companies and IPOs.
+
+The registry CSVs (``advisors.csv`` and ``companies.csv``, as mounted for
+the database) are read once into two structures: a hash map from
+registration ID to entity, and an inverted index from name trigrams to
+entities. A name lookup counts shared trigrams over the query's rarest
+posting lists only, within a fixed budget, and scores just the entities
+sharing the most, so its cost is bounded rather than growing with the
+registry size.
+
+For /score, the same tables are compiled into a word-level Aho-Corasick
+automaton over every entity and IPO name, so one pass over a message's
+words finds all the names it mentions, however many names are indexed.
+Words shaped like SEBI registration IDs are looked up during the same pass.
+An ID missing from the tables is reported as ``UNKNOWN``, since the
+mounted tables may be partial; only an index loaded as complete reports it
+as ``UNREGISTERED`` and raises a risk indicator for it.
+
+The index is immutable; a reload builds a new one and the service swaps
+the reference.
+"""
+import csv
+import os
+import re
+import time
+import heapq
+from collections import Counter, defaultdict, deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+REGISTRY_FILES = {"advisor": "advisors.csv", "company": "companies.csv"}
+IPO_FILE = "ipos.csv"
+# Column that holds each kind's category
+CATEGORY_COLUMNS = {"advisor": "category", "company": "company_type"}
+# Posting-list entries a lookup may count, rarest trigrams first; the rarest list is always counted
+MAX_POSTINGS = 5000
+# Entities sharing the most trigrams with the query that are scored exactly, per requested match
+CANDIDATES_PER_MATCH = 8
+
+# Spelling variants in registered names, mapped to one form before comparing
+ABBREVIATIONS = {
+    "pvt": "private",
+    "ltd": "limited",
+    "co": "company",
+    "corp": "corporation",
+    "inc": "incorporated",
+    "advisors": "advisers",
+    "advisor": "adviser",
+    "svcs": "services"
+}
+WORD_RE = re.compile(r"\w+|&")
+# SEBI registration numbers: IN, a letter for the intermediary type, nine digits
+REGISTRATION_ID_RE = re.compile(r"in[a-z]\d{9}")
+# Trailing words dropped to get the name people actually write ("Grip Broking" for "Grip Broking Private Limited")
+LEGAL_SUFFIXES = {"private", "limited", "llp", "incorporated", "corporation", "company"}
+# A short name reduced to one of these words alone would match far too much text
+GENERIC_WORDS = {
+    "capital", "finance", "financial", "securities", "investment", "investments", "advisers", "adviser",
+    "services", "wealth", "broking", "india", "global", "management", "consultants", "partners"
+}
+
+def word_token(word: str) -> str:
+    word = word.lower()
+    return "and" if word == "&" else ABBREVIATIONS.get(word, word)
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation and expand common abbreviations"""
+    return " ".join(word_token(word) for word in WORD_RE.findall(name))
+
+def name_trigrams(normalized: str) -> FrozenSet[str]:
+    """Trigrams of each word padded like pg_trgm, so word starts weigh more"""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+def trigram_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+def name_similarity(name: str, registered_name: str) -> float:
+    """Similarity of two names in [0, 1]
+
+    Trigram similarity, except that a name contained word-for-word in the
+    other (a missing "Private Limited") scores at least 0.8, as in the web
+    service's check.
+    """
+    a = normalize_name(name)
+    b = normalize_name(registered_name)
+    return normalized_similarity(a, b, name_trigrams(a), name_trigrams(b))
+
+def normalized_similarity(a: str, b: str, grams_a: FrozenSet[str], grams_b: FrozenSet[str]) -> float:
+    """name_similarity for names that are already normalized, with their trigrams"""
+    if a == b:
+        return 1.0
+    score = trigram_similarity(grams_a, grams_b)
+    shorter, longer = sorted((a, b), key=len)
+    if shorter and f" {shorter} " in f" {longer} ":
+        score = max(score, 0.8, len(shorter) / len(longer))
+    return score
+
+def read_registry_csv(path: str, kind: str) -> List[dict]:
+    """Entities from one registry CSV; the files pad fields with spaces"""
+    entities = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [column.strip().lower() for column in next(reader, [])]
+        for values in reader:
+            row = dict(zip(header, (value.strip() for value in values)))
+            if not row.get("registration_id") and not row.get("name"):
+                continue
+            entities.append({
+                "registration_id": row.get("registration_id", ""),
+                "name": row.get("name", ""),
+                "kind": kind,
+                "status": row.get("status") or None,
+                "category": row.get(CATEGORY_COLUMNS[kind]) or None
+            })
+    return entities
+
+def read_ipo_csv(path: str) -> List[dict]:
+    """IPOs with their subscription or listing status"""
+    ipos = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [column.strip().lower() for column in next(reader, [])]
+        for values in reader:
+            row = dict(zip(header, (value.strip() for value in values)))
+            if row.get("name"):
+                status = row.get("status") or None
+                # Listed issues carry their exchanges in the status column
+                if status and set(status.split()) <= {"BSE", "NSE", "SME"}:
+                    status = "LISTED"
+                ipos.append({"kind": "ipo", "name": row["name"], "registration_id": None, "status": status})
+    return ipos
+
+def name_phrases(name: str) -> List[Tuple[str, ...]]:
+    """Word sequences that count as a mention of a name: in full and without legal suffixes"""
+    words = tuple(name.split())
+    phrases = [words] if words else []
+    short = words
+    while short and short[-1] in LEGAL_SUFFIXES:
+        short = short[:-1]
+    if short and short != words and (len(short) > 1 or (len(short[0]) >= 5 and short[0] not in GENERIC_WORDS)):
+        phrases.append(short)
+    return phrases
+
+class PhraseScanner:
+    """Aho-Corasick automaton over words: reports every known phrase in one pass over a word list"""
+
+    def __init__(self, phrases: Dict[Tuple[str, ...], List[int]]):
+        # Trie of phrases; output holds (phrase length, payload) for phrases ending at each state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, int]]] = [[]]
+        for words, payloads in phrases.items():
+            state = 0
+            for word in words:
+                next_state = self.goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][word] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state] = self.output[state] + [(len(words), payload) for payload in payloads]
+
+        # Failure links point at the longest proper suffix that is also a trie path
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def scan(self, words: List[str]):
+        """Yield (first word, end word, payload) for every phrase occurrence"""
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for length, payload in self.output[state]:
+                yield i - length + 1, i + 1, payload
+
+def mention_indicators(mentions: List[dict], keywords: FrozenSet[str]) -> List[str]:
+    """Risk indicators raised by the entities a message names"""
+    indicators = []
+    for mention in mentions:
+        if mention["kind"] == "registration_id" and mention["status"] == "UNREGISTERED":
+            indicators.append(f"Unregistered SEBI registration ID cited ({mention['registration_id']})")
+        elif mention["kind"] in REGISTRY_FILES and mention["status"] not in (None, "ACTIVE"):
+            indicators.append(f"Registration of {mention['name']} is {mention['status']}")
+        elif (mention["kind"] == "ipo" and mention["status"] in ("LISTED", "CLOSED")
+              and "Pre-IPO or insider trading claims" in keywords):
+            indicators.append(f"Pre-IPO offer for an IPO that is already {mention['status']} ({mention['name']})")
+    return indicators
+
+class EntityIndex:
+    def __init__(self, entities: List[dict], sources: Dict[str, tuple], ipos: Optional[List[dict]] = None,
+                 complete: bool = False):
+        started = time.perf_counter()
+        self.entities = entities
+        # Whether the tables list every registered entity, so an unlisted ID is unregistered
+        self.complete = complete
+        self.ipos = ipos or []
+        self.sources = sources
+        self.by_id: Dict[str, int] = {
+            entity["registration_id"].upper(): i for i, entity in enumerate(entities) if entity["registration_id"]
+        }
+        self.names: List[str] = [normalize_name(entity["name"]) for entity in entities]
+        self.grams: List[FrozenSet[str]] = [name_trigrams(name) for name in self.names]
+        postings = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings: Dict[str, Tuple[int, ...]] = {gram: tuple(ids) for gram, ids in postings.items()}
+
+        # Payloads index self.entities, then self.ipos after them
+        phrases = defaultdict(list)
+        for i, name in enumerate(self.names + [normalize_name(ipo["name"]) for ipo in self.ipos]):
+            for phrase in name_phrases(name):
+                phrases[phrase].append(i)
+        self.scanner = PhraseScanner(phrases)
+        self.loaded_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+
+    @classmethod
+    def load(cls, directory: str, complete: bool = False) -> "EntityIndex":
+        """Index every registry CSV found in directory"""
+        entities = []
+        sources = {}
+        for kind, filename in REGISTRY_FILES.items():
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            sources[path] = (stat.st_mtime_ns, stat.st_size)
+            entities += read_registry_csv(path, kind)
+        ipos = []
+        ipo_path = os.path.join(directory, IPO_FILE)
+        if os.path.exists(ipo_path):
+            stat = os.stat(ipo_path)
+            sources[ipo_path] = (stat.st_mtime_ns, stat.st_size)
+            ipos = read_ipo_csv(ipo_path)
+        if not sources:
+            raise FileNotFoundError(f"No registry CSVs in {directory}")
+        return cls(entities, sources, ipos, complete)
+
+    def sources_changed(self) -> bool:
+        """Whether any indexed CSV was modified, replaced or removed since loading"""
+        for path, signature in self.sources.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return True
+            if (stat.st_mtime_ns, stat.st_size) != signature:
+                return True
+        return False
+
+    def lookup_id(self, registration_id: str) -> Optional[dict]:
+        i = self.by_id.get(registration_id.strip().upper())
+        return self.entities[i] if i is not None else None
+
+    def search(self, name: str, top_k: int = 5, kind: Optional[str] = None) -> List[Tuple[float, dict]]:
+        """Best matches for a name as (name_similarity, entity), highest first"""
+        normalized = normalize_name(name)
+        query = name_trigrams(normalized)
+        known = [gram for gram in query if gram in self.postings]
+        # Rare trigrams first: they single out the likely matches for the least counting
+        known.sort(key=lambda gram: len(self.postings[gram]))
+        shared = Counter()
+        budget = MAX_POSTINGS
+        for gram in known:
+            posting = self.postings[gram]
+            if shared and len(posting) > budget:
+                break
+            shared.update(posting)
+            budget -= len(posting)
+
+        candidates = heapq.nlargest(
+            top_k * CANDIDATES_PER_MATCH,
+            (i for i in shared if kind is None or self.entities[i]["kind"] == kind),
+            key=shared.__getitem__
+        )
+        scored = sorted(
+            ((normalized_similarity(normalized, self.names[i], query, self.grams[i]), i) for i in candidates),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [(score, self.entities[i]) for score, i in scored[:top_k]]
+
+    def scan(self, text: str) -> List[dict]:
+        """Entities, IPOs and registration IDs mentioned in text, in order of first mention"""
+        matches = list(WORD_RE.finditer(text))
+        words = [word_token(match.group()) for match in matches]
+        mentions = {}
+        for start, end, payload in self.scanner.scan(words):
+            record = self.entities[payload] if payload < len(self.entities) else self.ipos[payload - len(self.entities)]
+            key = (record["kind"], record["registration_id"] or record["name"])
+            # Keep each entity's first mention, in its longest form ("Grip Broking Pvt Ltd" over "Grip Broking")
+            if key in mentions and (mentions[key][0], -mentions[key][1]) <= (start, -end):
+                continue
+            mentions[key] = (start, end, {
+                "kind": record["kind"],
+                "name": record["name"],
+                "registration_id": record["registration_id"],
+                "status": record["status"],
+                "matched_text": text[matches[start].start():matches[end - 1].end()]
+            })
+        for i, word in enumerate(words):
+            if len(word) == 12 and REGISTRATION_ID_RE.fullmatch(word):
+                registration_id = word.upper()
+                entity = self.lookup_id(registration_id)
+                if ("registration_id", registration_id) not in mentions:
+                    mentions[("registration_id", registration_id)] = (i, i + 1, {
+                        "kind": "registration_id",
+                        "name": entity["name"] if entity is not None else None,
+                        "registration_id": registration_id,
+                        "status": (entity["status"] or "REGISTERED") if entity is not None else ("UNREGISTERED" if self.complete else "UNKNOWN"),
+                        "matched_text": matches[i].group()
+                    })
+        return [mention for _, _, mention in sorted(mentions.values(), key=lambda item: item[:2])]
+
+    def stats(self) -> dict:
+        counts = defaultdict(int)
+        for entity in self.entities:
+            counts[entity["kind"]] += 1
+        return {
+            "entities": len(self.entities),
+            "by_kind": dict(counts),
+            "ipos": len(self.ipos),
+            "complete": self.complete,
+            "scanner_states": len(self.scanner.goto),
+            "trigrams": len(self.postings),
+            "sources": list(self.sources),
+            "loaded_at": self.loaded_at,
+            "build_seconds": round(self.build_seconds, 4)
+        }
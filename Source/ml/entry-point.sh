@@ -1,12 +1,19 @@
-# check if the model.joblib file exists
+# the API starts right away; without model.joblib it trains in the background
+# and reports "training" on /health until the new model is swapped in
 ml_path="$(pwd)/model.joblib"
 
 # echo $ml_path
 
-if [ ! -f "$ml_path" ]; then
-  echo "Model file not found! Executing training script."
-  exec python3.10 train.py
+# export the memory-mapped artifact for models trained before it existed;
+# it is written atomically and picked up on the next start
+if [ -f "$ml_path" ] && [ ! -f "$(pwd)/model.compact" ]; then
+  (python3.10 train.py --export-compact || echo "Compact export failed, serving model.joblib") &
 fi
 
 
+# ML_WORKERS > 1 serves from pre-forked workers that share one loaded model
+if [ "${ML_WORKERS:-1}" -gt 1 ]; then
+  exec python3.10 serve.py --host 0.0.0.0 --port 8001 --workers "$ML_WORKERS"
+fi
+
 exec uvicorn app:app --host 0.0.0.0 --port 8001
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""DataFrame-free inference for the fitted training pipeline.
+
+The pipeline from train.py is Pipeline([preprocessor, classifier]) where the
+preprocessor is a ColumnTransformer over one text column (TF-IDF), one numeric
+column (StandardScaler) and one categorical column (OneHotEncoder). For a
+handful of rows, pandas column selection and the ColumnTransformer machinery
+cost more than the features themselves, so FastScorer rebuilds the same
+feature matrix directly from the fitted transformers and hands it to the
+classifier.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from model_registry import SAMPLE_INPUTS
+
+class FastScorer:
+    """Scores feature rows with the fitted transformers of a training pipeline"""
+
+    def __init__(self, pipeline):
+        preprocessor = pipeline.named_steps['preprocessor']
+        self.classifier = pipeline.named_steps['classifier']
+
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        if set(transformers) - {'remainder'} != {'text', 'returns', 'timeframe'}:
+            raise ValueError(f"Unsupported preprocessor layout: {list(transformers)}")
+        if transformers.get('remainder', ('drop',))[0] != 'drop':
+            raise ValueError("Preprocessor remainder must be dropped")
+
+        # Output order of the ColumnTransformer
+        self.order = [name for name, _, _ in preprocessor.transformers_ if name != 'remainder']
+        self.sparse_output = preprocessor.sparse_output_
+
+        self.vectorizer = transformers['text'][0]
+
+        scaler = transformers['returns'][0]
+        self.roi_mean = scaler.mean_[0] if scaler.with_mean else None
+        self.roi_scale = scaler.scale_[0] if scaler.with_std else None
+
+        encoder = transformers['timeframe'][0]
+        if encoder.drop is not None or getattr(encoder, '_infrequent_enabled', False):
+            raise ValueError("Only plain one-hot encoding without drop or infrequent categories is supported")
+        if encoder.handle_unknown not in ('ignore', 'infrequent_if_exist'):
+            raise ValueError(f"Unsupported handle_unknown={encoder.handle_unknown!r}")
+        self.timeframe_index: Dict[str, int] = {
+            category: i for i, category in enumerate(encoder.categories_[0])
+        }
+        self.timeframe_width = len(encoder.categories_[0])
+        self.timeframe_dtype = encoder.dtype
+
+    def transform(self, rows: List[dict]):
+        """Build the preprocessor output for rows of text, roi_percentage and timeframe"""
+        return self.transform_columns(
+            [row['text'] for row in rows], [row['roi_percentage'] for row in rows], [row['timeframe'] for row in rows]
+        )
+
+    def transform_columns(self, texts: List[str], roi_percentages, timeframes: List[str]):
+        """Build the preprocessor output from separate text, roi_percentage and timeframe columns"""
+        n_rows = len(texts)
+        text_features = self.vectorizer.transform(texts)
+
+        roi = np.array(roi_percentages, dtype=np.float64)
+        if self.roi_mean is not None:
+            roi -= self.roi_mean
+        if self.roi_scale is not None:
+            roi /= self.roi_scale
+
+        # Unknown timeframes get -1 and stay all-zero, like handle_unknown='ignore'
+        timeframe_columns = np.array(
+            [self.timeframe_index.get(timeframe, -1) for timeframe in timeframes], dtype=np.int64
+        )
+
+        if self.sparse_output and self.order == ['text', 'returns', 'timeframe']:
+            return self._stack_csr(text_features, roi, timeframe_columns)
+
+        timeframe_features = np.zeros((n_rows, self.timeframe_width), dtype=self.timeframe_dtype)
+        known = timeframe_columns >= 0
+        timeframe_features[np.flatnonzero(known), timeframe_columns[known]] = 1
+        blocks = {'text': text_features, 'returns': roi[:, None], 'timeframe': timeframe_features}
+        if self.sparse_output:
+            return sparse.hstack([blocks[name] for name in self.order]).tocsr()
+        return np.hstack([
+            block.toarray() if sparse.issparse(block) else block
+            for block in (blocks[name] for name in self.order)
+        ])
+
+    def _stack_csr(self, text_features, roi: np.ndarray, timeframe_columns: np.ndarray):
+        """Append the ROI and timeframe columns to the TF-IDF rows without sparse.hstack"""
+        n_rows, text_width = text_features.shape
+        text_counts = np.diff(text_features.indptr)
+        # Zeros are left implicit, as sparse.hstack does for dense blocks
+        has_roi = roi != 0
+        has_timeframe = timeframe_columns >= 0
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(text_counts + has_roi + has_timeframe, out=indptr[1:])
+        indices = np.empty(indptr[-1], dtype=np.int64)
+        data = np.empty(indptr[-1], dtype=np.float64)
+
+        # Text entries keep their order at the start of each row
+        text_positions = np.arange(text_features.nnz) + np.repeat(indptr[:-1] - text_features.indptr[:-1], text_counts)
+        indices[text_positions] = text_features.indices
+        data[text_positions] = text_features.data
+
+        roi_positions = (indptr[:-1] + text_counts)[has_roi]
+        indices[roi_positions] = text_width
+        data[roi_positions] = roi[has_roi]
+
+        timeframe_positions = (indptr[:-1] + text_counts + has_roi)[has_timeframe]
+        indices[timeframe_positions] = text_width + 1 + timeframe_columns[has_timeframe]
+        data[timeframe_positions] = 1
+
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(n_rows, text_width + 1 + self.timeframe_width)
+        )
+
+    def predict_proba(self, rows: List[dict]) -> np.ndarray:
+        """Class probabilities for rows, identical to pipeline.predict_proba on a DataFrame"""
+        return self.predict_proba_features(self.transform(rows))
+
+    def predict_proba_features(self, X) -> np.ndarray:
+        """Class probabilities for an already transformed feature matrix"""
+        return self.classifier.predict_proba(X)
+
+def build_fast_scorer(pipeline) -> Optional[FastScorer]:
+    """Build a FastScorer and confirm it matches the pipeline, or return None"""
+    import pandas as pd
+
+    try:
+        scorer = FastScorer(pipeline)
+        expected = pipeline.predict_proba(pd.DataFrame(SAMPLE_INPUTS))
+        actual = scorer.predict_proba(SAMPLE_INPUTS)
+    except Exception as e:
+        print(f"⚠️ Fast inference path unavailable: {str(e)}")
+        return None
+
+    if not np.array_equal(expected, actual):
+        print("⚠️ Fast inference path disabled: probabilities differ from the pipeline")
+        return None
+    return scorer
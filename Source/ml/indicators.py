@@ -0,0 +1,191 @@
+"""Precompiled single-pass risk indicator and ROI/timeframe extraction.
+
+All patterns are compiled once at import time and merged into two combined
+expressions (timeframes and keywords), and percentages are found with a plain
+substring scan, so each text is lowercased once and scanned a fixed number of
+times instead of running ~25 separate regex calls.
+"""
+import re
+from typing import FrozenSet, List, NamedTuple, Optional
+
+# Timeframes, in the priority order the first matching pattern wins. The leading
+# lookahead lets the scanner skip positions that cannot start any alternative.
+TIMEFRAME_RE = re.compile(
+    r'(?=[\ddwmaoi])(?:'
+    r'\b(?P<number>\d+)\s*(?P<unit>hour|day|week|month|year)s?\b'
+    r'|\b(?P<daily>daily)\b'
+    r'|\b(?P<weekly>weekly)\b'
+    r'|\b(?P<monthly>monthly)\b'
+    r'|\b(?P<annual>annual(?:ly)?)\b'
+    r'|\b(?P<overnight>overnight)\b'
+    r'|\b(?P<immediate>immediate(?:ly)?)\b'
+    r')'
+)
+TIMEFRAME_PRIORITY = {
+    'hour': 0, 'day': 1, 'week': 2, 'month': 3, 'year': 4,
+    'daily': 5, 'weekly': 6, 'monthly': 7, 'annual': 8,
+    'overnight': 9, 'immediate': 10
+}
+
+# Keyword indicators. Each alternative consumes only its first word and checks
+# the rest with a lookahead, so overlapping phrases from different indicators
+# ("sebi insider trading", "send money doubling") are all still seen.
+SEP = r'[-\s]?'
+# First characters of every keyword alternative below
+KEYWORD_FIRST_CHARS = '[abdefghijlmprstuvwz12@]'
+KEYWORD_RE = re.compile(f'(?={KEYWORD_FIRST_CHARS})(?:' + '|'.join([
+    # Guaranteed returns and risk-free promises
+    r'\b(?:guaranteed|assured)\b(?P<guaranteed>)',
+    rf'\brisk(?={SEP}free\b)(?P<guaranteed_risk>)',
+    rf'\b100%(?={SEP}safe\b)(?P<guaranteed_safe>)',
+    rf'\bzero(?={SEP}risk\b)(?P<guaranteed_zero>)',
+    # Urgency and pressure tactics
+    r'\b(?:urgent|hurry|immediate|expires)\b(?P<urgency>)',
+    rf'\b(?:limited(?={SEP}time\b)|last(?={SEP}chance\b)|act(?={SEP}now\b)|today(?={SEP}only\b))(?P<urgency_phrase>)',
+    # Suspicious communication channels
+    r'\b(?:telegram|whatsapp)\b(?P<channels>)',
+    rf'\b(?:join|premium|vip)(?={SEP}group\b)(?P<channels_group>)',
+    # Direct payment requests
+    rf'\b(?:send(?={SEP}money\b)|pay(?={SEP}now\b)|(?:processing|registration)(?={SEP}fee\b))(?P<payment>)',
+    r'\b@(?:paytm|phonepe|upi)\b(?P<payment_handle>)',
+    # Pre-IPO and insider trading claims
+    rf'\b(?:pre(?={SEP}ipo\b)|insider(?={SEP}(?:trading|tips|information)\b)|exclusive(?={SEP}allocation\b)|secret(?={SEP}(?:tips|formula)\b))(?P<insider>)',
+    # Celebrity or authority false endorsements
+    rf'\b(?:warren(?={SEP}buffett\b)|rbi(?={SEP}governor\b)|sebi(?={SEP}insider\b)|government(?={SEP}scheme\b))(?P<authority>)',
+    # Get-rich-quick schemes ("money" doubles as a short-term return target)
+    rf'\b(?:get(?={SEP}rich{SEP}quick\b)|become(?={SEP}millionaire\b)|double(?={SEP}money\b))(?P<get_rich>)',
+    rf'\b(?P<money>money)(?:(?={SEP}doubling\b)(?P<get_rich_doubling>))?(?:\b(?P<target_money>))?',
+    # Short timeframe promises: a short timeframe followed by a return target on the same line
+    rf'\b(?:daily\b|24(?={SEP}hours?\b)|1(?={SEP}week\b)|2(?={SEP}weeks?\b)|few(?={SEP}days\b))(?P<short_term>)',
+    r'\b(?:profit|returns?)\b(?P<target>)'
+]) + ')')
+
+# Rest of each short timeframe phrase after its consumed first word
+SHORT_TERM_TAILS = {
+    'daily': re.compile(''),
+    '24': re.compile(rf'{SEP}hours?\b'),
+    '1': re.compile(rf'{SEP}week\b'),
+    '2': re.compile(rf'{SEP}weeks?\b'),
+    'few': re.compile(rf'{SEP}days\b')
+}
+MONEY_GROUPS = ('money', 'get_rich_doubling', 'target_money')
+
+# Keyword groups mapped to the indicator they raise, in response order
+KEYWORD_INDICATORS = [
+    (('guaranteed', 'guaranteed_risk', 'guaranteed_safe', 'guaranteed_zero'), "Guaranteed/risk-free returns promised"),
+    (('urgency', 'urgency_phrase'), "Urgency and pressure tactics"),
+    (('channels', 'channels_group'), "Suspicious communication channels"),
+    (('payment', 'payment_handle'), "Direct payment requests"),
+    (('insider',), "Pre-IPO or insider trading claims"),
+    (('short_term',), "Short-term high return promises"),
+    (('authority',), "False authority endorsements"),
+    (('get_rich', 'get_rich_doubling'), "Get-rich-quick scheme indicators")
+]
+KEYWORD_GROUP_INDICATOR = {
+    group: indicator for groups, indicator in KEYWORD_INDICATORS for group in groups
+}
+HIGH_RISK_TIMEFRAMES = ['daily', 'hours', '24 hours', '48 hours', 'overnight', 'immediate']
+VERY_SHORT_TIMEFRAMES = ['daily', 'hours', 'overnight']
+
+class TextScan(NamedTuple):
+    returns: Optional[int]
+    timeframe: Optional[str]
+    keywords: FrozenSet[str]
+
+def scan_returns(text_lower: str) -> Optional[int]:
+    """Return the highest percentage mentioned in the text"""
+    # Walk back from each "%" over its digits; same matches as findall(r'(\d+)%')
+    best = None
+    end = text_lower.find('%')
+    while end != -1:
+        start = end
+        while start > 0 and text_lower[start - 1].isdecimal():
+            start -= 1
+        if start < end:
+            value = int(text_lower[start:end])
+            if best is None or value > best:
+                best = value
+        end = text_lower.find('%', end + 1)
+    return best
+
+def scan_timeframe(text_lower: str) -> Optional[str]:
+    """Return the highest-priority timeframe mentioned in the text"""
+    best_rank = len(TIMEFRAME_PRIORITY)
+    best = None
+    for match in TIMEFRAME_RE.finditer(text_lower):
+        unit = match.group('unit')
+        kind = unit or match.lastgroup
+        rank = TIMEFRAME_PRIORITY[kind]
+        if rank < best_rank:
+            best_rank = rank
+            best = f"{match.group('number')} {unit}s" if unit else kind
+            if rank == 0:
+                break
+    return best
+
+def scan_keywords(text_lower: str) -> FrozenSet[str]:
+    """Return the keyword indicators found in one pass over the text"""
+    found = set()
+    # End of the latest short timeframe phrase, waiting for a return target on its line
+    short_term_end = None
+    for match in KEYWORD_RE.finditer(text_lower):
+        group = match.lastgroup
+        if group == 'short_term':
+            word = match.group()
+            short_term_end = SHORT_TERM_TAILS[word].match(text_lower, match.end()).end()
+            continue
+        if group in MONEY_GROUPS:
+            if match.group('get_rich_doubling') is not None:
+                found.add("Get-rich-quick scheme indicators")
+            if match.group('target_money') is None:
+                continue
+            group = 'target'
+        if group == 'target':
+            if short_term_end is not None and '\n' not in text_lower[short_term_end:match.start()]:
+                found.add("Short-term high return promises")
+        else:
+            found.add(KEYWORD_GROUP_INDICATOR[group])
+    return frozenset(found)
+
+def scan_text(text: str) -> TextScan:
+    """Lowercase the text once and run every extraction over it"""
+    text_lower = text.lower()
+    return TextScan(
+        returns=scan_returns(text_lower),
+        timeframe=scan_timeframe(text_lower),
+        keywords=scan_keywords(text_lower)
+    )
+
+def build_risk_indicators(keywords: FrozenSet[str], roi_percentage: Optional[int] = None, timeframe: Optional[str] = None) -> List[str]:
+    """Order keyword hits and add ROI/timeframe indicators like the rule set always has"""
+    indicators = []
+    for _, indicator in KEYWORD_INDICATORS[:5]:
+        if indicator in keywords:
+            indicators.append(indicator)
+
+    # Unrealistic return percentages (>20% in short timeframe)
+    if roi_percentage:
+        if roi_percentage > 50:
+            indicators.append(f"Extremely unrealistic return percentage ({roi_percentage}%)")
+        elif roi_percentage > 20:
+            indicators.append(f"Unrealistic return percentage ({roi_percentage}%)")
+
+    if "Short-term high return promises" in keywords:
+        indicators.append("Short-term high return promises")
+
+    # Timeframe-based risk analysis
+    if timeframe:
+        timeframe_lower = timeframe.lower()
+        if any(risk_tf in timeframe_lower for risk_tf in HIGH_RISK_TIMEFRAMES):
+            indicators.append(f"Suspicious short timeframe ({timeframe})")
+
+        # Check for unrealistic returns in short timeframes
+        if roi_percentage and roi_percentage > 10:
+            if any(risk_tf in timeframe_lower for risk_tf in VERY_SHORT_TIMEFRAMES):
+                indicators.append("High returns promised in very short timeframe")
+
+    for _, indicator in KEYWORD_INDICATORS[6:]:
+        if indicator in keywords:
+            indicators.append(indicator)
+
+    return indicators
@@ -0,0 +1,90 @@
+"""Bounded worker pool that keeps CPU-bound scoring off the asyncio event loop.
+
+Work is handed to a thread or process pool. At most ``workers + max_queue``
+tasks may be in flight; beyond that ``submit`` raises ``PoolSaturated``
+immediately so the API can answer 503 instead of letting latency pile up.
+The counters are only touched from the event loop thread, so no locking is
+needed. Process workers send their scoring metrics back with each result,
+so /metrics in the serving process covers the work they did.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from metrics import replay, run_recorded
+
+class PoolSaturated(Exception):
+    """Raised when the pool already holds its maximum number of pending tasks"""
+
+class InferencePool:
+    def __init__(self, mode: str = "thread", workers: int = 4, max_queue: int = 64, initializer: Optional[Callable] = None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.executor: Executor = self._create_executor()
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.active - self.workers)
+
+    async def submit(self, fn: Callable, *args):
+        """Run fn(*args) on the pool, or raise PoolSaturated if the queue is full"""
+        if self.active >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturated(f"Inference queue is full ({self.capacity} pending tasks)")
+
+        self.active += 1
+        self.submitted += 1
+        try:
+            if self.mode == "process":
+                result, observations = await asyncio.get_running_loop().run_in_executor(self.executor, run_recorded, fn, *args)
+                replay(observations)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Pool size, current load and lifetime counters"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def restart(self):
+        """Start fresh workers for new tasks; tasks already submitted finish on the old ones"""
+        old_executor = self.executor
+        self.executor = self._create_executor()
+        old_executor.shutdown(wait=False)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,243 @@
+"""SQLite-backed queue of asynchronous bulk scoring jobs.
+
+A submitted dataset is split into chunks and stored with its job in one
+transaction. Workers claim one pending chunk at a time under a lease,
+score it and store its output records, which also advances the job's
+progress. Nothing is kept in memory, so jobs survive a restart: completed
+chunks stay done, and a chunk whose worker died is claimed again once its
+lease runs out (or straight away by ``release_claims`` when a single
+process owns the queue).
+
+Every call opens its own connection, so one queue object can be used from
+the event loop, from threads and from forked worker processes.
+"""
+import csv
+import io
+import json
+import os
+import secrets
+import sqlite3
+import time
+from contextlib import closing
+from typing import Iterator, List, Optional
+
+CSV_TYPE = "text/csv"
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+JSON_TYPE = "application/json"
+DATASET_TYPES = (CSV_TYPE, JSON_TYPE) + NDJSON_TYPES
+
+def json_line(line: str):
+    """Decoded NDJSON line, or None so the row is reported as invalid instead of failing the upload"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def parse_dataset(body: bytes, media: str) -> list:
+    """Input rows of an uploaded CSV, NDJSON or JSON ({"items": [...]} or a list) dataset"""
+    text = body.decode("utf-8-sig")
+    if media == CSV_TYPE:
+        return list(csv.DictReader(io.StringIO(text)))
+    if media in NDJSON_TYPES:
+        return [json_line(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("JSON datasets must be a list or an object with an items list")
+    return items
+
+class JobQueue:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, id_column TEXT, "
+                "total_rows INTEGER NOT NULL, chunk_count INTEGER NOT NULL, "
+                "done_chunks INTEGER NOT NULL DEFAULT 0, done_rows INTEGER NOT NULL DEFAULT 0, "
+                "failed_rows INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "created REAL NOT NULL, started REAL, finished REAL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "job_id TEXT NOT NULL, chunk INTEGER NOT NULL, start_row INTEGER NOT NULL, "
+                "rows TEXT NOT NULL, results TEXT, model_version TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, claimed_by TEXT, lease_until REAL, "
+                "PRIMARY KEY (job_id, chunk))"
+            )
+            # Claims only ever look at chunks that still need scoring
+            db.execute("CREATE INDEX IF NOT EXISTS pending_chunks ON chunks (job_id, chunk) WHERE results IS NULL")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def submit(self, rows: list, chunk_rows: int, id_column: Optional[str]) -> dict:
+        """Store a dataset as a new queued job"""
+        job_id = secrets.token_hex(8)
+        chunks = [
+            (job_id, index, start, json.dumps(rows[start:start + chunk_rows]))
+            for index, start in enumerate(range(0, len(rows), chunk_rows))
+        ]
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT INTO jobs (id, status, id_column, total_rows, chunk_count, created) VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, id_column, len(rows), len(chunks), time.time())
+            )
+            db.executemany("INSERT INTO chunks (job_id, chunk, start_row, rows) VALUES (?, ?, ?, ?)", chunks)
+            db.execute("COMMIT")
+        return self.get(job_id)
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[tuple]:
+        """(job id, chunk, first row, rows, id column) of the oldest unclaimed chunk, or None"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT c.job_id, c.chunk, c.start_row, c.rows, j.id_column FROM chunks c "
+                "JOIN jobs j ON j.id = c.job_id "
+                "WHERE c.results IS NULL AND (c.lease_until IS NULL OR c.lease_until < ?) "
+                "AND j.status IN ('queued', 'running') "
+                "ORDER BY j.created, c.chunk LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            job_id, chunk, start_row, rows, id_column = row
+            db.execute(
+                "UPDATE chunks SET claimed_by = ?, lease_until = ?, attempts = attempts + 1 WHERE job_id = ? AND chunk = ?",
+                (worker, now + lease_seconds, job_id, chunk)
+            )
+            db.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ? AND status = 'queued'", (now, job_id))
+            db.execute("COMMIT")
+        return job_id, chunk, start_row, json.loads(rows), id_column
+
+    def complete(self, job_id: str, chunk: int, records: List[dict], model_version: Optional[str]):
+        """Store a chunk's output records and advance its job, finishing it after the last chunk"""
+        failed = sum(1 for record in records if record.get("error"))
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            # A chunk scored twice after a lapsed lease only counts once
+            stored = db.execute(
+                "UPDATE chunks SET results = ?, model_version = ?, claimed_by = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND chunk = ? AND results IS NULL",
+                (json.dumps(records), model_version, job_id, chunk)
+            ).rowcount
+            if stored:
+                db.execute(
+                    "UPDATE jobs SET done_chunks = done_chunks + 1, done_rows = done_rows + ?, failed_rows = failed_rows + ?, "
+                    "status = CASE WHEN done_chunks + 1 = chunk_count THEN 'completed' ELSE status END, "
+                    "finished = CASE WHEN done_chunks + 1 = chunk_count THEN ? ELSE finished END "
+                    "WHERE id = ?",
+                    (len(records), failed, time.time(), job_id)
+                )
+            db.execute("COMMIT")
+
+    def fail(self, job_id: str, chunk: int, error: str, max_attempts: int):
+        """Release a chunk that could not be scored, failing its job after max_attempts tries"""
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT attempts FROM chunks WHERE job_id = ? AND chunk = ?", (job_id, chunk)).fetchone()
+            db.execute("UPDATE chunks SET claimed_by = NULL, lease_until = NULL WHERE job_id = ? AND chunk = ?", (job_id, chunk))
+            if row is not None and row[0] >= max_attempts:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+                    (f"Chunk {chunk} failed {row[0]} times: {error}", time.time(), job_id)
+                )
+            db.execute("COMMIT")
+
+    def release_claims(self) -> int:
+        """Make every claimed chunk available again; only safe when no other process is scoring"""
+        with closing(self._connect()) as db:
+            return db.execute(
+                "UPDATE chunks SET claimed_by = NULL, lease_until = NULL WHERE claimed_by IS NOT NULL AND results IS NULL"
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT id, status, total_rows, done_rows, failed_rows, chunk_count, done_chunks, error, created, started, finished "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            versions = [version for version, in db.execute(
+                "SELECT DISTINCT model_version FROM chunks WHERE job_id = ? AND model_version IS NOT NULL", (job_id,)
+            )]
+        job = self._job(row)
+        job["model_versions"] = versions
+        return job
+
+    def list(self, limit: int = 50) -> List[dict]:
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT id, status, total_rows, done_rows, failed_rows, chunk_count, done_chunks, error, created, started, finished "
+                "FROM jobs ORDER BY created DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    @staticmethod
+    def _job(row: tuple) -> dict:
+        job_id, status, total_rows, done_rows, failed_rows, chunk_count, done_chunks, error, created, started, finished = row
+        elapsed = (finished or time.time()) - started if started else None
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total_rows": total_rows,
+            "done_rows": done_rows,
+            "failed_rows": failed_rows,
+            "chunks": chunk_count,
+            "done_chunks": done_chunks,
+            "progress": round(done_rows / total_rows, 4) if total_rows else 1.0,
+            "rows_per_second": round(done_rows / elapsed, 1) if elapsed else None,
+            "error": error,
+            "created": created,
+            "started": started,
+            "finished": finished
+        }
+
+    def results(self, job_id: str) -> Iterator[List[dict]]:
+        """Output records of each completed chunk, in input order"""
+        with closing(self._connect()) as db:
+            for results, in db.execute(
+                "SELECT results FROM chunks WHERE job_id = ? AND results IS NOT NULL ORDER BY chunk", (job_id,)
+            ):
+                yield json.loads(results)
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a job and its data; a chunk still being scored is dropped when it finishes"""
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            deleted = db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount
+            db.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            db.execute("COMMIT")
+        return bool(deleted)
+
+    def prune(self, retention_seconds: float) -> int:
+        """Delete finished jobs older than retention_seconds"""
+        if retention_seconds <= 0:
+            return 0
+        with closing(self._connect()) as db:
+            expired = [job_id for job_id, in db.execute(
+                "SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?", (time.time() - retention_seconds,)
+            )]
+        for job_id in expired:
+            self.delete(job_id)
+        return len(expired)
+
+    def stats(self) -> dict:
+        with closing(self._connect()) as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            pending_rows, = db.execute(
+                "SELECT COALESCE(SUM(total_rows - done_rows), 0) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()
+        return {
+            "db_path": self.db_path,
+            "db_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            "jobs": {status: counts.get(status, 0) for status in ("queued", "running", "completed", "failed")},
+            "pending_rows": pending_rows
+        }
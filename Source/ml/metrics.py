@@ -0,0 +1,223 @@
+"""Lightweight in-process metrics for the scoring service.
+
+Metrics are plain counters and fixed-bucket histograms rendered in the
+Prometheus text format by ``/metrics``. Recording is a dict lookup, a bisect
+and a few increments, without locks: the GIL keeps a lost update rare and a
+scrape only needs approximate counts. Values are per process: work run in
+a process pool goes through ``run_recorded``, which sends the worker's
+observations back with the result so the serving process records them.
+"""
+import bisect
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from 50µs to 10s
+LATENCY_BUCKETS = [
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10
+]
+
+# Set by run_recorded in a pool worker: observations are collected here instead of recorded
+recording: Optional[list] = None
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two increments"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets: List[float] = sorted(buckets)
+        # One extra slot for observations above the last bucket (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts keyed by upper bound, plus sum and count"""
+        cumulative = {}
+        total = 0
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            total += count
+            cumulative['+Inf' if bound == float('inf') else f'{bound:g}'] = total
+        return {
+            "buckets": cumulative,
+            "sum": self.sum,
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0
+        }
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        """Prometheus _bucket/_sum/_count samples; labels is a rendered label list without braces"""
+        snapshot = self.snapshot()
+        prefix = f"{labels}," if labels else ""
+        lines = [
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in snapshot["buckets"].items()
+        ]
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {snapshot['sum']:.9g}")
+        lines.append(f"{name}_count{suffix} {snapshot['count']}")
+        return lines
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Sequence[str], values: Sequence) -> str:
+    return ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+
+class LabeledHistogram:
+    """One Histogram per combination of label values, created on first use"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.children: Dict[Tuple, Histogram] = {}
+
+    def observe(self, label_values: Tuple, value: float):
+        if recording is not None:
+            recording.append((self.name, label_values, value))
+            return
+        child = self.children.get(label_values)
+        if child is None:
+            child = self.children.setdefault(label_values, Histogram(self.buckets))
+        child.observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, child in sorted(self.children.items()):
+            lines.extend(child.render(self.name, format_labels(self.label_names, label_values)))
+        return lines
+
+class LabeledCounter:
+    """Monotonic counter per combination of label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, label_values: Tuple, amount: float = 1):
+        if recording is not None:
+            recording.append((self.name, label_values, amount))
+            return
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{{{format_labels(self.label_names, label_values)}}} {value:g}")
+        return lines
+
+def render_samples(name: str, help_text: str, metric_type: str, samples: Dict[str, float]) -> List[str]:
+    """A metric with one sample per rendered label list ("" for no labels)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{{{labels}}} {value:.9g}" if labels else f"{name} {value:.9g}")
+    return lines
+
+def render_gauge(name: str, help_text: str, samples: Dict[str, float]) -> List[str]:
+    return render_samples(name, help_text, "gauge", samples)
+
+def render_counter(name: str, help_text: str, samples: Dict[str, float]) -> List[str]:
+    """Counters kept elsewhere, e.g. in stats() dicts, exposed at scrape time"""
+    return render_samples(name, help_text, "counter", samples)
+
+# Time per scoring stage; observed from wherever the stage runs
+STAGE_SECONDS = LabeledHistogram(
+    "verifi_stage_seconds",
+    "Time spent in each stage of scoring, per call (a whole batch for /score/batch)",
+    ["stage"]
+)
+
+class stage_timer:
+    """Context manager that records the elapsed time of a block under a stage name"""
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = (stage,)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+# Which tier of the scoring cascade produced each verdict
+SCORING_TIER_TOTAL = LabeledCounter(
+    "verifi_scoring_tier_total", "Scored messages by the tier that produced the verdict", ["tier"]
+)
+
+REQUESTS_TOTAL = LabeledCounter(
+    "verifi_http_requests_total", "HTTP requests by method, route and response status", ["method", "route", "status"]
+)
+REQUEST_SECONDS = LabeledHistogram(
+    "verifi_http_request_seconds", "Time from receiving a request to finishing its response, by route", ["route"]
+)
+
+# Metrics that scoring records and process pool workers send back, by name
+POOL_METRICS = {
+    STAGE_SECONDS.name: STAGE_SECONDS.observe,
+    SCORING_TIER_TOTAL.name: SCORING_TIER_TOTAL.inc
+}
+
+def run_recorded(fn, *args):
+    """Run fn in a pool worker process, returning its result and the metric observations it made"""
+    global recording
+    recording = []
+    try:
+        return fn(*args), recording
+    finally:
+        recording = None
+
+def replay(observations: list):
+    """Record observations sent back by run_recorded in this process"""
+    for name, label_values, value in observations:
+        POOL_METRICS[name](label_values, value)
+
+class RequestMetricsMiddleware:
+    """ASGI middleware counting requests by status and timing them, including serialization
+
+    Handlers that set ``request.state.handler_finished`` to a perf_counter()
+    value get the time from there to the response start recorded as the
+    "serialization" stage.
+    """
+    # Requests currently inside the application, across instances
+    in_flight = 0
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                handler_finished = scope.get("state", {}).get("handler_finished")
+                if handler_finished is not None:
+                    STAGE_SECONDS.observe(("serialization",), time.perf_counter() - handler_finished)
+            await send(message)
+
+        RequestMetricsMiddleware.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            RequestMetricsMiddleware.in_flight -= 1
+            route = scope.get("route")
+            # Route templates keep the label set bounded
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUESTS_TOTAL.inc((scope["method"], route_path, str(status[0])))
+            REQUEST_SECONDS.observe((route_path,), time.perf_counter() - started)
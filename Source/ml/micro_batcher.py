@@ -0,0 +1,96 @@
+"""Dynamic micro-batching of concurrent single-item scoring calls.
+
+Requests arriving within ``window_ms`` of the first queued request (or until
+``max_batch`` requests are waiting) are scored together by one call to
+``process_batch``, and each caller's future is resolved with its own result.
+Everything runs on the event loop thread, so the queue needs no locking.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from inference_pool import PoolSaturated
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+QUEUE_WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+class MicroBatcher:
+    def __init__(self, process_batch: Callable[[List], Awaitable[List]], window_ms: float = 5.0, max_batch: int = 32, max_queue: int = 1024):
+        self.process_batch = process_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.queue: List[tuple] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+        self.batches = 0
+        self.rejected = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    async def submit(self, item):
+        """Queue one item and wait for its result from the next batch"""
+        if len(self.queue) >= self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(f"Micro-batch queue is full ({self.max_queue} waiting requests)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.append((item, future, time.perf_counter()))
+
+        if len(self.queue) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+
+        return await future
+
+    def flush(self):
+        """Start scoring everything queued so far, in batches of at most max_batch"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        while self.queue:
+            batch = self.queue[:self.max_batch]
+            del self.queue[:self.max_batch]
+
+            now = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait_ms.observe((now - enqueued) * 1000.0)
+            self.batch_size.observe(len(batch))
+            self.batches += 1
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[tuple]):
+        self.in_flight += 1
+        try:
+            results = await self.process_batch([item for item, _, _ in batch])
+        except BaseException as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for (_, future, _), result in zip(batch, results):
+                # The caller may have disconnected and cancelled its future
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Queue state, configuration and batch-size / queue-wait histograms"""
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "queued": len(self.queue),
+            "in_flight_batches": self.in_flight,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
@@ -0,0 +1,268 @@
+"""Versioned model directory and the loaded-model handle the API serves from.
+
+Every training run is published as ``<root>/<version>/`` holding
+``model.joblib``, the optional ``model.compact`` and ``metadata.json``
+(content hash, training details and metrics). The ``ACTIVE`` file names the
+version the service should serve. Versions are written to a temporary
+directory and renamed, and ``ACTIVE`` is replaced atomically, so a reader
+never sees a half-published model.
+
+A version may also hold ``cascade.json``, the rule pre-screen calibrated
+for that model (see cascade.py), and ``holdout.csv``, a bounded sample of
+rows the model was not trained on that ``train.py --update`` checks new
+versions against.
+
+``ServingModel`` bundles everything needed to score with one loaded version,
+so the API can switch versions by replacing a single reference.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import List, Optional
+
+from metrics import stage_timer
+
+ACTIVE_FILE = "ACTIVE"
+METADATA_FILE = "metadata.json"
+JOBLIB_FILE = "model.joblib"
+COMPACT_FILE = "model.compact"
+CASCADE_FILE = "cascade.json"
+HOLDOUT_FILE = "holdout.csv"
+
+# Sample messages printed by train.test_sample_predictions, scored to warm up new versions and
+# used to check that the fast path and the compact export reproduce the pipeline. The last
+# two cover a timeframe no model was trained on and an empty text.
+SAMPLE_INPUTS = [
+    {"text": "SEBI registered investment advisor. Mutual funds subject to market risks", "roi_percentage": 0, "timeframe": "unknown"},
+    {"text": "Guaranteed 25% returns in 2 weeks! Join our Telegram group", "roi_percentage": 25, "timeframe": "2 weeks"},
+    {"text": "ICICI Securities - diversified equity investments for long-term goals", "roi_percentage": 12, "timeframe": "annual"},
+    {"text": "Pre-IPO shares available! Send money to paytm@insider immediately", "roi_percentage": 300, "timeframe": "1 month"},
+    {"text": "Systematic investment in mutual funds helps achieve financial goals", "roi_percentage": 10, "timeframe": "annual"},
+    {"text": "URGENT: 300% returns in 3 days confirmed. Send money now!", "roi_percentage": 300, "timeframe": "3 days"},
+    {"text": "Angel One Limited - SEBI registered broker providing research reports", "roi_percentage": 0, "timeframe": "unknown"},
+    {"text": "Risk-free trading! Our AI guarantees 50% daily returns", "roi_percentage": 50, "timeframe": "daily"},
+    {"text": "Past performance is not indicative of future returns", "roi_percentage": 0, "timeframe": "unknown"},
+    {"text": "BREAKING: Secret billionaire strategy revealed! 500% returns guaranteed!", "roi_percentage": 500, "timeframe": "monthly"},
+    {"text": "Past performance is not indicative of future returns", "roi_percentage": 0, "timeframe": "never seen"},
+    {"text": "", "roi_percentage": 7, "timeframe": "unknown"}
+]
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+
+    def version_dir(self, version: str) -> str:
+        if not version or os.sep in version or version.startswith("."):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, METADATA_FILE))
+        )
+
+    def metadata(self, version: str) -> dict:
+        with open(os.path.join(self.version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version in self.versions() else None
+
+    def set_active(self, version: str):
+        """Point ACTIVE at a published version"""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        partial_path = os.path.join(self.root, f".{ACTIVE_FILE}.partial")
+        with open(partial_path, "w") as f:
+            f.write(version)
+        os.replace(partial_path, os.path.join(self.root, ACTIVE_FILE))
+
+    def publish(self, joblib_path: str, compact_path: Optional[str] = None, metadata: Optional[dict] = None,
+                activate: bool = True, cascade_path: Optional[str] = None, holdout_path: Optional[str] = None) -> str:
+        """Copy a trained model into a new version directory and optionally activate it"""
+        content_hash = file_digest(joblib_path)
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{content_hash[:12]}"
+        os.makedirs(self.root, exist_ok=True)
+
+        partial_dir = os.path.join(self.root, f".{version}.partial")
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        os.makedirs(partial_dir)
+        shutil.copy2(joblib_path, os.path.join(partial_dir, JOBLIB_FILE))
+        if compact_path and os.path.exists(compact_path):
+            shutil.copy2(compact_path, os.path.join(partial_dir, COMPACT_FILE))
+        if cascade_path and os.path.exists(cascade_path):
+            shutil.copy2(cascade_path, os.path.join(partial_dir, CASCADE_FILE))
+        if holdout_path and os.path.exists(holdout_path):
+            shutil.copy2(holdout_path, os.path.join(partial_dir, HOLDOUT_FILE))
+        with open(os.path.join(partial_dir, METADATA_FILE), "w") as f:
+            json.dump({**(metadata or {}), "version": version, "content_hash": content_hash}, f, indent=2)
+        os.replace(partial_dir, self.version_dir(version))
+
+        if activate:
+            self.set_active(version)
+        return version
+
+    def add_artifact(self, version: str, path: str, name: str):
+        """Copy a file derived from a published model, such as a recalibrated cascade, into its version"""
+        directory = self.version_dir(version)
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        partial_path = os.path.join(directory, f".{name}.partial")
+        shutil.copy2(path, partial_path)
+        os.replace(partial_path, os.path.join(directory, name))
+
+class ServingModel:
+    """One loaded model version together with the scorer used to serve it"""
+
+    def __init__(self, predictor, version: str, content_hash: str, model_format: str, path: str,
+                 fast_scorer=None, lowercase: bool = False, metadata: Optional[dict] = None):
+        self.predictor = predictor
+        self.version = version
+        self.content_hash = content_hash
+        self.model_format = model_format
+        self.path = path
+        self.fast_scorer = fast_scorer
+        self.lowercase = lowercase
+        self.metadata = metadata or {}
+        # Rule pre-screen calibrated for this model, attached by the loader when cascade mode is on
+        self.cascade = None
+        self.loaded_at = time.time()
+        # Filled in by the loader: seconds to load and to warm up
+        self.load_seconds = None
+        self.warm_up_seconds = None
+
+    def predict_fraud_probabilities(self, rows: List[dict]):
+        """Fraud probability for each feature row, via the fast path when available"""
+        return self.predict_fraud_probabilities_columns(
+            [row['text'] for row in rows], [row['roi_percentage'] for row in rows], [row['timeframe'] for row in rows]
+        )
+
+    def predict_fraud_probabilities_columns(self, texts: List[str], roi_percentages, timeframes: List[str]):
+        """Fraud probability for each row of separate feature columns"""
+        if self.fast_scorer is not None:
+            with stage_timer("features"):
+                X = self.fast_scorer.transform_columns(texts, roi_percentages, timeframes)
+            with stage_timer("predict_proba"):
+                return self.fast_scorer.predict_proba_features(X)[:, 1]
+
+        import pandas as pd
+        with stage_timer("features"):
+            frame = pd.DataFrame({'text': texts, 'roi_percentage': roi_percentages, 'timeframe': timeframes})
+        # The pipeline vectorizes inside predict_proba
+        with stage_timer("predict_proba"):
+            return self.predictor.predict_proba(frame)[:, 1]
+
+    def warm_up(self, samples: List[dict] = SAMPLE_INPUTS) -> float:
+        """Score the samples once, returning the elapsed milliseconds"""
+        started = time.perf_counter()
+        probabilities = self.predict_fraud_probabilities(samples)
+        elapsed = (time.perf_counter() - started) * 1000
+        if len(probabilities) != len(samples) or not all(0 <= p <= 1 for p in probabilities):
+            raise ValueError(f"Model {self.version} produced invalid probabilities during warm-up")
+        return elapsed
+
+    def info(self) -> dict:
+        if self.model_format == "compact":
+            details = self.predictor.info()
+        else:
+            steps = self.predictor.named_steps
+            vectorizer = steps['preprocessor'].named_transformers_['text']
+            details = {
+                "model_type": type(steps['classifier']).__name__,
+                # Hashing vectorizers have a fixed width instead of a vocabulary
+                "feature_count": len(vectorizer.vocabulary_) if hasattr(vectorizer, 'vocabulary_') else vectorizer.n_features,
+                "pipeline_steps": list(steps.keys()),
+                "format": "joblib"
+            }
+        return {
+            **details,
+            "version": self.version,
+            "content_hash": self.content_hash,
+            "model_path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "warm_up_seconds": self.warm_up_seconds,
+            "cascade": self.cascade.info() if self.cascade is not None else None,
+            "metadata": self.metadata
+        }
+
+def load_compact_model(compact_path: str, joblib_path: Optional[str], model_format: str = "auto", metadata: Optional[dict] = None, version: Optional[str] = None) -> Optional[ServingModel]:
+    """Load the compact artifact if it is present and was exported from joblib_path"""
+    from compact_model import CompactModel
+
+    if model_format == "joblib" or not os.path.exists(compact_path):
+        return None
+
+    try:
+        compact = CompactModel.load(compact_path)
+        compact.verify()
+    except Exception as e:
+        if model_format == "compact":
+            raise
+        print(f"⚠️ Ignoring compact model {compact_path}: {str(e)}")
+        return None
+
+    source_hash = compact.meta.get("source_hash")
+    if model_format == "auto" and joblib_path and os.path.exists(joblib_path) and source_hash != file_digest(joblib_path)[:16]:
+        print(f"⚠️ Ignoring compact model {compact_path}: it was not exported from {joblib_path}")
+        return None
+
+    content_hash = source_hash or file_digest(compact_path)[:16]
+    print(f"✅ Compact model loaded successfully from: {compact_path}")
+    return ServingModel(
+        compact, version or content_hash[:16], content_hash[:16], "compact", compact_path,
+        fast_scorer=compact, lowercase=compact.lowercase, metadata=metadata
+    )
+
+def load_joblib_model(joblib_path: str, mmap: bool = True, fast_path: bool = True, metadata: Optional[dict] = None, version: Optional[str] = None) -> Optional[ServingModel]:
+    """Load the scikit-learn pipeline and build its fast inference path"""
+    if not os.path.exists(joblib_path):
+        print(f"❌ Model file not found at: {joblib_path}")
+        return None
+
+    import joblib
+    from fastpath import build_fast_scorer
+
+    pipeline = joblib.load(joblib_path, mmap_mode="r" if mmap else None)
+    content_hash = file_digest(joblib_path)[:16]
+    scorer = None
+    if fast_path:
+        scorer = build_fast_scorer(pipeline)
+        if scorer is not None:
+            print("✅ Fast inference path enabled")
+    try:
+        lowercase = bool(pipeline.named_steps['preprocessor'].named_transformers_['text'].lowercase)
+    except (AttributeError, KeyError):
+        lowercase = False
+    print(f"✅ Model loaded successfully from: {joblib_path}")
+    return ServingModel(
+        pipeline, version or content_hash, content_hash, "joblib", joblib_path,
+        fast_scorer=scorer, lowercase=lowercase, metadata=metadata
+    )
+
+def load_serving_model(joblib_path: str, compact_path: str, model_format: str = "auto", mmap: bool = True,
+                       fast_path: bool = True, metadata: Optional[dict] = None, version: Optional[str] = None) -> Optional[ServingModel]:
+    """Load the compact artifact when usable, otherwise the joblib pipeline"""
+    return (
+        load_compact_model(compact_path, joblib_path, model_format, metadata, version)
+        or load_joblib_model(joblib_path, mmap, fast_path, metadata, version)
+    )
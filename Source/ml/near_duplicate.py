@@ -0,0 +1,223 @@
+"""Near-duplicate index of recently scored scam messages.
+
+Scam templates are reposted with small edits (a new UPI handle, another
+percentage, extra emojis), which the exact result cache never matches.
+Messages the model scored as fraud with high confidence are kept here as
+MinHash signatures over word bigrams, with digits folded together and
+emojis and punctuation dropped. The signatures are split into LSH bands,
+so a lookup only compares a message with entries that share at least one
+band; candidates are confirmed by the exact Jaccard similarity of their
+bigram sets. A match above the threshold returns the stored verdict and
+the campaign cluster the entry belongs to. A scam that already matches a
+stored message is not stored again but counted as a member of that
+message's cluster, so a campaign's reposts cost one entry rather than one
+per copy, lookups compare against few candidates, and the cluster still
+reports how many messages the campaign produced.
+
+Memory is bounded like the result cache: an LRU over at most
+``max_entries`` messages with an optional TTL, emptied whenever a
+different model is loaded.
+"""
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Messages with fewer bigrams than this are too short to call near-duplicates
+MIN_SHINGLES = 5
+MERSENNE_PRIME = (1 << 61) - 1
+
+TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+
+# Fixed seed, so every worker process hashes messages the same way
+_random = np.random.RandomState(1)
+PERMUTATION_A = _random.randint(1, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+PERMUTATION_B = _random.randint(0, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+class Sketch(NamedTuple):
+    shingles: np.ndarray
+    bands: List[bytes]
+
+class NearDuplicateMatch(NamedTuple):
+    cluster_id: str
+    similarity: float
+    fraud_probability: float
+
+def message_shingles(text: str) -> np.ndarray:
+    """Sorted 32-bit hashes of the message's word bigrams, with every number read as 0"""
+    words = ["0" if token[0].isdigit() else token for token in TOKEN_RE.findall(text.lower())]
+    shingles = {zlib.crc32(f"{a} {b}".encode("utf-8", "surrogatepass")) for a, b in zip(words, words[1:])}
+    return np.array(sorted(shingles), dtype=np.uint64)
+
+def minhash(shingles: np.ndarray) -> np.ndarray:
+    """MinHash signature: the smallest value of each universal hash over the shingles"""
+    # a, b < 2**31 and shingles < 2**32, so a * x + b cannot overflow 64 bits
+    hashed = (np.outer(PERMUTATION_A, shingles) + PERMUTATION_B[:, None]) % MERSENNE_PRIME
+    return hashed.min(axis=1)
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.7, min_probability: float = 0.9,
+                 max_entries: int = 5000, ttl_seconds: float = 86400.0):
+        self.threshold = threshold
+        self.min_probability = min_probability
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        # entry id -> (sketch, fraud probability, cluster id, created)
+        self.entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.buckets = [dict() for _ in range(BANDS)]
+        # cluster id -> [stored entries, member messages, hits]
+        self.clusters = {}
+        self.next_id = 0
+        self.model_version: Optional[str] = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.added = 0
+        self.duplicates = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set_model_version(self, version: str):
+        """Forget every verdict that was produced by a different model"""
+        with self.lock:
+            if version == self.model_version:
+                return
+            self.model_version = version
+            self.entries.clear()
+            self.buckets = [dict() for _ in range(BANDS)]
+            self.clusters.clear()
+
+    def sketch(self, text: str) -> Optional[Sketch]:
+        """Shingles and LSH band keys of a message, or None if it is too short to compare"""
+        shingles = message_shingles(text)
+        if len(shingles) < MIN_SHINGLES:
+            return None
+        signature = minhash(shingles)
+        return Sketch(shingles, [
+            signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes() for band in range(BANDS)
+        ])
+
+    def _best_match(self, sketch: Sketch, now: float) -> Optional[tuple]:
+        """(entry id, similarity) of the closest stored message at or above the threshold"""
+        candidates = set()
+        for bucket, key in zip(self.buckets, sketch.bands):
+            candidates.update(bucket.get(key, ()))
+        best = None
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            if self._expired(entry[3], now):
+                self._remove(entry_id)
+                self.expirations += 1
+                continue
+            similarity = jaccard(sketch.shingles, entry[0].shingles)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (entry_id, similarity)
+                if similarity == 1.0:
+                    break
+        return best
+
+    def lookup(self, sketch: Optional[Sketch]) -> Optional[NearDuplicateMatch]:
+        """Verdict of the closest known scam, if the message is a near-duplicate of one"""
+        if sketch is None:
+            with self.lock:
+                self.skipped += 1
+            return None
+        with self.lock:
+            best = self._best_match(sketch, time.time())
+            if best is None:
+                self.misses += 1
+                return None
+            entry_id, similarity = best
+            _, fraud_probability, cluster_id, _ = self.entries[entry_id]
+            # An active campaign keeps its entries from being evicted
+            self.entries.move_to_end(entry_id)
+            self.clusters[cluster_id][2] += 1
+            self.hits += 1
+            return NearDuplicateMatch(cluster_id, round(similarity, 4), fraud_probability)
+
+    def add(self, sketch: Optional[Sketch], fraud_probability: float) -> Optional[str]:
+        """Remember a model verdict if it is a confident scam not covered yet, returning its cluster id"""
+        if sketch is None or fraud_probability < self.min_probability:
+            return None
+        now = time.time()
+        with self.lock:
+            best = self._best_match(sketch, now)
+            if best is not None:
+                # Lookups already match it through the stored message, so storing it would
+                # only lengthen the candidate lists every later message is compared against
+                self.entries.move_to_end(best[0])
+                self.duplicates += 1
+                cluster_id = self.entries[best[0]][2]
+                self.clusters[cluster_id][1] += 1
+                return cluster_id
+            # Named after the message that started it, so every worker agrees on the id
+            cluster_id = hashlib.blake2b(sketch.shingles.tobytes(), digest_size=6).hexdigest()
+            self.clusters.setdefault(cluster_id, [0, 0, 0])
+
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = (sketch, fraud_probability, cluster_id, now)
+            for bucket, key in zip(self.buckets, sketch.bands):
+                bucket.setdefault(key, []).append(entry_id)
+            self.clusters[cluster_id][0] += 1
+            self.clusters[cluster_id][1] += 1
+            self.added += 1
+
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+            return cluster_id
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    def _remove(self, entry_id: int):
+        sketch, _, cluster_id, _ = self.entries.pop(entry_id)
+        for bucket, key in zip(self.buckets, sketch.bands):
+            members = bucket[key]
+            members.remove(entry_id)
+            if not members:
+                del bucket[key]
+        cluster = self.clusters[cluster_id]
+        cluster[0] -= 1
+        if cluster[0] == 0:
+            del self.clusters[cluster_id]
+
+    def stats(self, top_clusters: int = 5) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            largest = sorted(self.clusters.items(), key=lambda item: (item[1][2], item[1][1]), reverse=True)[:top_clusters]
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "threshold": self.threshold,
+                "min_probability": self.min_probability,
+                "model_version": self.model_version,
+                "clusters": len(self.clusters),
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "added": self.added,
+                "duplicates": self.duplicates,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "top_clusters": [
+                    {"cluster_id": cluster_id, "entries": entries, "members": members, "hits": hits}
+                    for cluster_id, (entries, members, hits) in largest
+                ]
+            }
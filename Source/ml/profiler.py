@@ -0,0 +1,164 @@
+"""On-demand sampling profiler for live traffic.
+
+A session starts a daemon thread that reads every other thread's Python
+stack through ``sys._current_frames()`` at a fixed interval and counts
+identical stacks. Nothing is installed in the interpreter, so there is no
+cost outside a session, and during one the cost is a stack walk per
+interval rather than a hook on every call. The counts are written as
+collapsed stacks (``frame;frame;frame count`` per line), which
+flamegraph.pl, speedscope and inferno read directly.
+
+Stacks of threads that are only waiting (the event loop's selector, idle
+pool threads, lock waits) are left out unless ``include_idle`` is set, so
+the profile shows where scoring spends CPU time.
+
+The sampler needs the GIL to read stacks, so by default it would only get
+to run when a busy thread releases the GIL (mostly inside numpy), and
+samples would pile up at those few points. During a session the GIL
+switch interval is lowered so a busy thread gives way every fraction of
+a millisecond wherever it is; the old interval is restored afterwards.
+Time inside a C call that holds the GIL, such as a regex match, is
+counted on the Python function that made the call. Only the threads of this
+process are sampled: with ``ML_POOL_MODE=process`` scoring runs in other
+processes and is not visible.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+MAX_STACK_DEPTH = 128
+# GIL switch interval during a session; see the module docstring
+SAMPLING_SWITCH_INTERVAL = 0.0002
+# (file name, function) of innermost frames that mean a thread is waiting, not working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    # uvloop runs the event loop in C, so an idle loop thread shows only this frame
+    ("runners.py", "run"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queues.py", "get"),
+    ("queue.py", "get"),
+    ("connection.py", "_recv"),
+    ("connection.py", "wait"),
+    ("process.py", "_process_worker"),
+}
+
+def frame_label(code) -> str:
+    """Function name with its file and first line, so same-named functions stay apart"""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class ProfileSession:
+    def __init__(self, seconds: float, max_requests: Optional[int] = None,
+                 interval_ms: float = 5.0, include_idle: bool = False):
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.requests = 0
+        self.started = None
+        self.finished = None
+        self.stop_reason = None
+        self.switch_interval = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self.started is not None and self.finished is None
+
+    def start(self):
+        self.started = time.time()
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, SAMPLING_SWITCH_INTERVAL))
+        self.thread.start()
+
+    def stop(self, reason: str = "stopped"):
+        """End the session early; the sampler finishes its current sample first"""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        self.stop_event.set()
+        if threading.current_thread() is not self.thread:
+            self.thread.join()
+
+    def request_finished(self):
+        """Count a profiled request, ending the session after max_requests"""
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop_reason = self.stop_reason or "requests"
+            self.stop_event.set()
+
+    def _run(self):
+        deadline = self.started + self.seconds
+        own_id = threading.get_ident()
+        names = {}
+        while not self.stop_event.wait(self.interval):
+            if time.time() >= deadline:
+                self.stop_reason = self.stop_reason or "seconds"
+                break
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(names.get(thread_id, str(thread_id)), frame)
+        sys.setswitchinterval(self.switch_interval)
+        self.finished = time.time()
+
+    def _sample(self, thread_name: str, frame):
+        code = frame.f_code
+        if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            self.idle_samples += 1
+            return
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, heaviest first"""
+        # Copied first, since the sampler may still be adding stacks
+        stacks = self.stacks.copy()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> list:
+        """Functions by samples spent in them (self) and under them (total)"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.copy().items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        return [
+            {"function": label, "self_samples": own[label], "total_samples": samples}
+            for label, samples in total.most_common(limit)
+        ]
+
+    def info(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "state": "running" if self.running else "finished",
+            "seconds": self.seconds,
+            "max_requests": self.max_requests,
+            "interval_ms": self.interval * 1000,
+            "include_idle": self.include_idle,
+            "started": self.started,
+            "finished": self.finished,
+            "elapsed_seconds": round(end - self.started, 3) if self.started else 0.0,
+            "stop_reason": self.stop_reason,
+            "requests": self.requests,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "distinct_stacks": len(self.stacks)
+        }
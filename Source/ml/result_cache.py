@@ -0,0 +1,154 @@
+"""Content-addressed cache of fraud probabilities.
+
+Keys are a hash of the normalized text plus the effective ``roi_percentage``
+and ``timeframe`` that were fed to the model, so forwarded copies of the same
+message skip prediction entirely. The in-memory tier is an LRU bounded by
+entry count with an optional TTL; an optional SQLite tier keeps results
+across restarts. The SQLite tier is bounded too: every ``prune_every``
+writes, expired rows and the oldest rows beyond ``max_disk_entries`` are
+deleted. Keys include the model version, entries are tagged with it
+and the cache empties itself when a different model is loaded, so results
+from a model that was just swapped out are never served.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+def normalize_text(text: str, lowercase: bool = True) -> str:
+    """Normalization that cannot change the prediction
+
+    Surrounding whitespace never produces a token, and case only matters when
+    the model's vectorizer does not lowercase its input.
+    """
+    text = text.strip()
+    return text.lower() if lowercase else text
+
+def cache_key(text: str, roi_percentage, timeframe: str, lowercase: bool = True, model_version: str = "") -> str:
+    payload = f"{model_version}\x00{normalize_text(text, lowercase)}\x00{roi_percentage}\x00{timeframe}".encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+class ResultCache:
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0, db_path: Optional[str] = None,
+                 max_disk_entries: int = 100000, prune_every: int = 1000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self.ttl = ttl_seconds
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.model_version: Optional[str] = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_writes = 0
+        self.disk_evictions = 0
+
+        self.db_path = db_path
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, model_version TEXT NOT NULL, "
+                "fraud_probability REAL NOT NULL, created REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+
+    def set_model_version(self, version: str):
+        """Drop every cached result that was produced by a different model"""
+        with self.lock:
+            if version == self.model_version:
+                return
+            self.model_version = version
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM results WHERE model_version != ?", (version,))
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self.entries[key]
+                self.expirations += 1
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT fraud_probability, created FROM results WHERE key = ? AND model_version = ?",
+                    (key, self.model_version)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, fraud_probability: float):
+        now = time.time()
+        with self.lock:
+            self._remember(key, fraud_probability, now)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO results (key, model_version, fraud_probability, created) VALUES (?, ?, ?, ?)",
+                    (key, self.model_version, fraud_probability, now)
+                )
+                self.disk_writes += 1
+                if self.disk_writes % self.prune_every == 0:
+                    self._prune_disk(now)
+
+    def _remember(self, key: str, fraud_probability: float, created: float):
+        self.entries[key] = (fraud_probability, created)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def prune_disk(self):
+        """Delete expired rows and the oldest rows beyond max_disk_entries from the SQLite tier"""
+        if self.db is None:
+            return
+        with self.lock:
+            self._prune_disk(time.time())
+
+    def _prune_disk(self, now: float):
+        if self.ttl > 0:
+            self.db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        evicted = self.db.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        self.disk_evictions += max(evicted, 0)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk_path": self.db_path,
+            "max_disk_entries": self.max_disk_entries if self.db is not None else None,
+            "model_version": self.model_version,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "expirations": self.expirations
+        }
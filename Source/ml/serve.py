@@ -0,0 +1,375 @@
+"""Pre-fork multi-worker server with one copy-on-write shared model.
+
+``uvicorn --workers N`` runs the startup hook in every worker, so each one
+loads its own copy of the model. Here the parent process loads and warms
+up the model and the registry index once, freezes the garbage collector's
+view of them, binds the listening socket and then forks the workers. The
+workers inherit the loaded objects and share their memory pages with the
+parent until something writes to them.
+
+``gc.freeze()`` moves everything loaded so far to a generation the
+collector never scans, so collections in a worker do not write to the
+shared objects' GC headers. Reference counting still dirties the pages of
+the few objects scoring touches; the compact model format and the
+memory-mapped joblib arrays keep the bulk of the model in file-backed
+pages that stay shared.
+
+The parent supervises the workers and does not serve requests:
+
+- each worker reports a heartbeat from its event loop; a worker that exits
+  or stops beating for ``ML_WORKER_TIMEOUT`` seconds is replaced, with a
+  back-off when workers keep crashing right after start;
+- RSS, PSS and shared/private memory of every worker are written to a
+  status file that ``/health`` and ``/metrics`` report;
+- model versions (registry watcher, ``/admin/models/reload``, rollback) and
+  registry CSV changes are loaded once in the parent, and the workers are
+  then replaced one at a time so they share the new objects.
+
+Every worker accepts bulk jobs, but only worker 0 runs the niced job
+process that scores them.
+
+    python serve.py --workers 4 --port 8001
+"""
+import argparse
+import gc
+import json
+import mmap
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import uvicorn
+
+import app
+
+WORKERS = int(os.environ.get("ML_WORKERS", str(os.cpu_count() or 1)))
+# Seconds without a heartbeat before a worker is considered hung and replaced
+WORKER_TIMEOUT = float(os.environ.get("ML_WORKER_TIMEOUT", "30"))
+# Seconds a stopping worker gets to finish its requests before it is killed
+WORKER_STOP_TIMEOUT = float(os.environ.get("ML_WORKER_STOP_TIMEOUT", "30"))
+HEARTBEAT_INTERVAL = 1.0
+STATUS_INTERVAL = 5.0
+# Workers that die sooner than this after starting are restarted with a growing delay
+MIN_WORKER_UPTIME = 5.0
+MAX_RESTART_DELAY = 30.0
+
+def process_memory(pid: int) -> Optional[dict]:
+    """Resident, proportional, shared and private memory of a process in bytes"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss_bytes": fields.get("Rss"),
+        "pss_bytes": fields.get("Pss"),
+        "shared_bytes": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_bytes": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+class Worker:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.pid: Optional[int] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.crashes = 0
+        self.model_version: Optional[str] = None
+        # No restart before this time, after a crash right at start
+        self.not_before = 0.0
+
+class Supervisor:
+    def __init__(self, workers: int, host: str, port: int, status_path: str):
+        self.host = host
+        self.port = port
+        self.status_path = status_path
+        self.workers = [Worker(slot) for slot in range(workers)]
+        # One float per worker in anonymous shared memory, written by the worker's event loop
+        self.heartbeat_memory = mmap.mmap(-1, 8 * workers)
+        self.heartbeats = memoryview(self.heartbeat_memory).cast("d")
+        self.socket: Optional[socket.socket] = None
+        self.stopping = False
+        self.reload_requested = False
+        # The parent runs the watchers; workers must not load anything themselves
+        self.model_watch_interval = app.MODEL_WATCH_INTERVAL
+        self.registry_watch_interval = app.REGISTRY_WATCH_INTERVAL
+        app.MODEL_WATCH_INTERVAL = 0
+        app.REGISTRY_WATCH_INTERVAL = 0
+
+    def load(self):
+        """Load the model and registry index that every worker will share"""
+        candidate = app.load_model_from_disk()
+        if candidate is None and app.TRAIN_ON_STARTUP:
+            print(f"⚠️ No model found, training with {app.TRAIN_SCRIPT} before starting workers")
+            import subprocess
+            subprocess.run([sys.executable, app.TRAIN_SCRIPT], cwd=os.path.dirname(app.TRAIN_SCRIPT), check=True)
+            candidate = app.load_model_from_disk()
+        if candidate is None:
+            raise RuntimeError("No model available; run train.py first")
+        app.activate_model(candidate)
+        app.model_state = "ready"
+        try:
+            app.entity_index = app.load_entity_index()
+        except Exception as e:
+            print(f"⚠️ Registry index unavailable: {str(e)}")
+
+    def bind(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(2048)
+        self.socket.set_inheritable(True)
+
+    def spawn(self, worker: Worker):
+        self.heartbeats[worker.slot] = 0.0
+        # Collect now and freeze the survivors, so nothing the workers inherit is scanned by their GC
+        gc.collect()
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            self.run_worker(worker.slot)
+        worker.pid = pid
+        worker.started_at = time.time()
+        worker.model_version = app.model.version
+        print(f"✅ Worker {worker.slot} started (pid {pid})")
+
+    def run_worker(self, slot: int):
+        """Child side of the fork: serve on the inherited socket until told to stop"""
+        code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            gc.enable()
+            app.WORKER_INDEX = slot
+            app.SUPERVISOR_PID = os.getppid()
+            app.WORKER_STATUS_PATH = self.status_path
+            heartbeats = self.heartbeats
+
+            async def start_heartbeat():
+                import asyncio
+
+                async def beat():
+                    while True:
+                        heartbeats[slot] = time.time()
+                        await asyncio.sleep(HEARTBEAT_INTERVAL)
+                app.app.state.heartbeat_task = asyncio.create_task(beat())
+
+            app.app.router.on_startup.append(start_heartbeat)
+            server = uvicorn.Server(uvicorn.Config(app.app, lifespan="on", log_level="info"))
+            server.run(sockets=[self.socket])
+        except BaseException as e:
+            print(f"❌ Worker {slot} failed: {str(e)}", file=sys.stderr)
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Never return into the supervisor loop inherited from the parent
+            os._exit(code)
+
+    def stop(self, worker: Worker, timeout: float = WORKER_STOP_TIMEOUT):
+        """Ask a worker to finish its requests and exit, killing it after timeout"""
+        if worker.pid is None:
+            return
+        try:
+            os.kill(worker.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.time() + timeout
+        try:
+            while time.time() < deadline:
+                if os.waitpid(worker.pid, os.WNOHANG)[0] != 0:
+                    break
+                time.sleep(0.05)
+            else:
+                os.kill(worker.pid, signal.SIGKILL)
+                os.waitpid(worker.pid, 0)
+        except ChildProcessError:
+            pass
+        worker.pid = None
+
+    def wait_ready(self, worker: Worker, timeout: float) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.heartbeats[worker.slot] > 0:
+                return True
+            if os.waitpid(worker.pid, os.WNOHANG)[0] != 0:
+                worker.pid = None
+                return False
+            time.sleep(0.05)
+        return False
+
+    def roll(self):
+        """Replace the workers one at a time so they share the parent's newly loaded objects"""
+        for worker in self.workers:
+            if self.stopping:
+                return
+            self.stop(worker)
+            self.spawn(worker)
+            worker.restarts += 1
+            if not self.wait_ready(worker, WORKER_TIMEOUT):
+                print(f"⚠️ Worker {worker.slot} did not become ready after the reload")
+
+    def reap(self):
+        """Restart workers that exited or stopped sending heartbeats"""
+        now = time.time()
+        for worker in self.workers:
+            if worker.pid is not None:
+                reason = None
+                pid, status = os.waitpid(worker.pid, os.WNOHANG)
+                if pid != 0:
+                    reason = f"exited with status {os.waitstatus_to_exitcode(status)}"
+                    worker.pid = None
+                elif now - max(self.heartbeats[worker.slot], worker.started_at) > WORKER_TIMEOUT:
+                    reason = f"sent no heartbeat for {WORKER_TIMEOUT:.0f}s"
+                    os.kill(worker.pid, signal.SIGKILL)
+                    os.waitpid(worker.pid, 0)
+                    worker.pid = None
+                if reason is None:
+                    continue
+                print(f"⚠️ Worker {worker.slot} {reason}, restarting")
+                worker.crashes = worker.crashes + 1 if now - worker.started_at < MIN_WORKER_UPTIME else 0
+                worker.not_before = now + min(MAX_RESTART_DELAY, 2 ** worker.crashes - 1) if worker.crashes else now
+            if worker.pid is None and now >= worker.not_before and not self.stopping:
+                self.spawn(worker)
+                worker.restarts += 1
+
+    def check_sources(self, now: float, last_model_check: float, last_registry_check: float) -> tuple:
+        """Load a new active model version or registry index in the parent and roll the workers"""
+        reload_model = self.reload_requested
+        self.reload_requested = False
+        if self.model_watch_interval > 0 and now - last_model_check >= self.model_watch_interval:
+            last_model_check = now
+            try:
+                version = app.registry.active_version()
+                reload_model |= version is not None and version != app.model.version and version != app.failed_version
+            except OSError as e:
+                print(f"⚠️ Cannot read model registry: {str(e)}")
+
+        changed = False
+        if reload_model:
+            try:
+                candidate = app.load_model_from_disk()
+                if candidate is not None and candidate.version != app.model.version:
+                    app.activate_model(candidate)
+                    changed = True
+            except Exception as e:
+                app.failed_version = app.registry.active_version()
+                print(f"❌ Error loading model version {app.failed_version}: {str(e)}")
+
+        if self.registry_watch_interval > 0 and now - last_registry_check >= self.registry_watch_interval:
+            last_registry_check = now
+            if app.entity_index is None or app.entity_index.sources_changed():
+                try:
+                    app.entity_index = app.load_entity_index()
+                    changed = True
+                except Exception as e:
+                    print(f"⚠️ Keeping the current registry index, reload failed: {str(e)}")
+
+        if changed:
+            print("🔄 Restarting workers to share the reloaded model and registry")
+            # Objects frozen for earlier forks are never collected, so the replaced model's
+            # cycles would stay in the parent and be inherited by every new worker
+            gc.unfreeze()
+            gc.collect()
+            self.roll()
+        return last_model_check, last_registry_check
+
+    def status(self) -> dict:
+        now = time.time()
+        workers = []
+        for worker in self.workers:
+            heartbeat = self.heartbeats[worker.slot]
+            alive = worker.pid is not None
+            workers.append({
+                "worker": worker.slot,
+                "pid": worker.pid,
+                "alive": alive,
+                "healthy": alive and heartbeat > 0 and now - heartbeat <= WORKER_TIMEOUT,
+                "heartbeat_age_seconds": round(now - heartbeat, 3) if heartbeat > 0 else None,
+                "started_at": worker.started_at,
+                "restarts": worker.restarts,
+                "model_version": worker.model_version,
+                **((process_memory(worker.pid) if alive else None) or {})
+            })
+        return {
+            "supervisor_pid": os.getpid(),
+            "updated_at": now,
+            "model_version": app.model.version if app.model is not None else None,
+            "supervisor_memory": process_memory(os.getpid()),
+            "workers": workers
+        }
+
+    def write_status(self):
+        partial_path = f"{self.status_path}.partial"
+        with open(partial_path, "w") as f:
+            json.dump(self.status(), f)
+        os.replace(partial_path, self.status_path)
+
+    def handle_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self.reload_requested = True
+        else:
+            self.stopping = True
+
+    def run(self):
+        # No collections while the model is built; spawn() collects once before freezing it
+        gc.disable()
+        try:
+            self.load()
+        finally:
+            gc.enable()
+        self.bind()
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.handle_signal)
+        print(f"✅ Serving on http://{self.host}:{self.port} with {len(self.workers)} pre-forked workers")
+        for worker in self.workers:
+            self.spawn(worker)
+
+        last_model_check = last_registry_check = time.time()
+        last_status = 0.0
+        try:
+            while not self.stopping:
+                time.sleep(0.5)
+                now = time.time()
+                self.reap()
+                last_model_check, last_registry_check = self.check_sources(now, last_model_check, last_registry_check)
+                if now - last_status >= STATUS_INTERVAL:
+                    self.write_status()
+                    last_status = now
+        finally:
+            print("🔄 Stopping workers")
+            for worker in self.workers:
+                if worker.pid is not None:
+                    try:
+                        os.kill(worker.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+            for worker in self.workers:
+                self.stop(worker)
+            self.socket.close()
+            if os.path.exists(self.status_path):
+                os.remove(self.status_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the fraud detection API from pre-forked workers sharing one model")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--status-file", default=os.environ.get("ML_WORKER_STATUS"),
+                        help="JSON file with per-worker health and memory, read by /health")
+    args = parser.parse_args(argv)
+
+    status_path = args.status_file or os.path.join(tempfile.gettempdir(), f"verifi-workers-{os.getpid()}.json")
+    Supervisor(max(1, args.workers), args.host, args.port, status_path).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
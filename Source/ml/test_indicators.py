@@ -0,0 +1,77 @@
+"""Parity of the precompiled indicator engine with the original per-pattern rules.
+
+The reference functions in bench_indicators.py are verbatim copies of the
+regex loop app.py used before indicators.py; run with ``python -m pytest``
+from this directory.
+"""
+import pytest
+
+from bench_indicators import compare, fuzz_texts, load_corpus
+from indicators import scan_keywords, scan_text
+
+EDGE_CASES = [
+    "",
+    " ",
+    "\n\n",
+    "%",
+    "100%",
+    "returns of %",
+    # Accented and other non-ASCII text
+    "Rendement garanti 25% en 2 semaines — guaranteed, sûr et assuré",
+    "Garantía: 300% en 3 días. Únete a nuestro grupo de Telegram 🚀🚀",
+    "İnsider trading tips: İmmediate 50% returns",
+    "ＧＵＡＲＡＮＴＥＥＤ 25% returns daily",
+    "Returns of ٥٠% in ٣ days, send money now",
+    "guaranteed returns in 2 weeks",
+    "naïve investors: risk‐free profit in 24 hours",
+    # Overlapping phrases from different indicators
+    "sebi insider trading tips",
+    "send money doubling scheme",
+    "double money doubling",
+    "get rich quick money",
+    "daily money",
+    "daily\nprofit",
+    "2 weeks of daily returns\nmoney",
+    "1 week 2 weeks few days profit",
+    "risk-free100% safe zero risk",
+    "pre-ipo insider information secret formula exclusive allocation",
+    "pay@paytm pay now @upi processing-fee",
+    "warren buffett rbi governor government scheme",
+    "limited time last chance act now today only",
+    "join group premium group vip group whatsapp",
+    "24hours 48 hours overnight immediately annually",
+    "5% 25% 300% in 1 year, 6 months, 3 weeks, 10 days and 12 hours",
+]
+
+def mismatched(texts):
+    """Texts on which the engine and the reference implementation disagree"""
+    mismatches = []
+    for text in texts:
+        expected, actual = compare(text)
+        if actual != expected:
+            mismatches.append(text)
+    return mismatches
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_case_parity(text):
+    expected, actual = compare(text)
+    assert actual == expected
+
+def test_generated_text_parity():
+    assert mismatched(fuzz_texts(3000)) == []
+
+def test_dataset_parity():
+    dataset, long_texts = load_corpus()
+    assert mismatched(dataset + long_texts) == []
+
+def test_empty_text_has_no_indicators():
+    scan = scan_text("")
+    assert (scan.returns, scan.timeframe, scan.keywords) == (None, None, frozenset())
+
+def test_overlapping_phrases_raise_every_indicator():
+    assert scan_keywords("sebi insider trading") == {
+        "False authority endorsements", "Pre-IPO or insider trading claims"
+    }
+    assert scan_keywords("send money doubling") == {
+        "Direct payment requests", "Get-rich-quick scheme indicators"
+    }
@@ -1,9 +1,18 @@
 import os, pandas as pd, joblib
+import argparse
+import shutil
+import tempfile
+import time
+import sklearn
 import numpy as np
+from scipy import sparse
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
+from sklearn.dummy import DummyClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.svm import SVC
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
@@ -12,9 +21,48 @@ from sklearn.metrics import classification_report, confusion_matrix, roc_auc_sco
 import warnings
 warnings.filterwarnings('ignore')
 
+from cascade import RuleCascade, choose_thresholds, feature_row
+from compact_model import export_compact
+from indicators import scan_keywords
+from model_registry import CASCADE_FILE, HOLDOUT_FILE, JOBLIB_FILE, SAMPLE_INPUTS, ModelRegistry, file_digest
+
 # Paths
 DATA_PATH = os.environ.get("TRAIN_DATA", os.path.join(os.path.dirname(__file__), "financial_advice_dataset.csv"))
 MODEL_PATH = os.environ.get("ML_MODEL_PATH", os.path.join(os.path.dirname(__file__), "model.joblib"))
+COMPACT_MODEL_PATH = os.environ.get("ML_COMPACT_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".compact")
+CASCADE_MODEL_PATH = os.environ.get("ML_CASCADE_PATH", os.path.splitext(MODEL_PATH)[0] + ".cascade.json")
+# Held-out rows saved with each model for the regression check of --update
+HOLDOUT_PATH = os.path.splitext(MODEL_PATH)[0] + ".holdout.csv"
+MODEL_REGISTRY_PATH = os.environ.get("ML_MODEL_REGISTRY", os.path.join(os.path.dirname(__file__), "models"))
+# Fitted preprocessors are cached here so they are reused across runs; unset uses a temporary directory per run
+FEATURE_CACHE_PATH = os.environ.get("TRAIN_FEATURE_CACHE")
+
+# Parallelism and hyperparameter search budget. TRAIN_JOBS candidates or CV fits run at once,
+# each single-threaded so the cores are not oversubscribed; TRAIN_JOBS=1 gives every fit all cores
+TRAIN_JOBS = int(os.environ.get("TRAIN_JOBS", "-1"))
+TUNING_MODE = os.environ.get("TRAIN_TUNING", "halving").lower()  # halving | grid
+# Successive halving grows the forest up to this many trees, keeping 1/factor of the candidates each round
+TUNING_MAX_ESTIMATORS = int(os.environ.get("TRAIN_TUNING_MAX_ESTIMATORS", "300"))
+TUNING_FACTOR = int(os.environ.get("TRAIN_TUNING_FACTOR", "3"))
+
+# Streaming (out-of-core) training: the CSV is read this many rows at a time
+STREAM_CHUNK_ROWS = int(os.environ.get("TRAIN_CHUNK_ROWS", "50000"))
+STREAM_EPOCHS = int(os.environ.get("TRAIN_EPOCHS", "5"))
+STREAM_HASH_FEATURES = 2 ** int(os.environ.get("TRAIN_HASH_BITS", "20"))
+# Every Nth row is held out for evaluation, which needs no shuffled copy of the data
+STREAM_HOLDOUT_EVERY = 5
+# Incremental updates: trees or boosting stages added per update, the number of held-out
+# rows saved with each model for their regression check and the accuracy drop it tolerates
+UPDATE_ESTIMATORS = int(os.environ.get("TRAIN_UPDATE_ESTIMATORS", "50"))
+UPDATE_CHECK_ROWS = int(os.environ.get("TRAIN_UPDATE_CHECK_ROWS", "5000"))
+UPDATE_MAX_REGRESSION = float(os.environ.get("TRAIN_UPDATE_MAX_REGRESSION", "0.01"))
+# Held-out probabilities are binned for ROC-AUC so memory does not grow with the dataset
+STREAM_AUC_BINS = 10000
+# Cascade calibration: accuracy the rule pre-screen may cost against the full model,
+# the confidence it needs before answering alone, and its hashed-word features (0 for rules only)
+CASCADE_MAX_ACCURACY_LOSS = float(os.environ.get("TRAIN_CASCADE_MAX_LOSS", "0.005"))
+CASCADE_MIN_CONFIDENCE = float(os.environ.get("TRAIN_CASCADE_MIN_CONFIDENCE", "0.8"))
+CASCADE_HASH_BITS = int(os.environ.get("TRAIN_CASCADE_HASH_BITS", "0"))
 
 def load_and_prepare_data():
     """Load the consolidated training dataset with new fields"""
@@ -38,6 +86,16 @@ def load_and_prepare_data():
     
     return df
 
+def dataset_features(df):
+    """Feature columns and labels of the prepared dataset"""
+    X = df[['text', 'roi_percentage', 'timeframe']].copy()
+    X['text'] = X['text'].fillna("").astype(str)
+    return X, df['label'].astype(int)
+
+def split_dataset(X, y):
+    """The train/test split of main(), reproducible from the dataset alone"""
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
 def create_feature_pipeline():
     """Create comprehensive feature extraction pipeline including new fields"""
     text_pipeline = TfidfVectorizer(
@@ -64,7 +122,25 @@ def create_feature_pipeline():
     
     return preprocessor
 
-def evaluate_models(X_train, X_test, y_train, y_test, preprocessor):
+def create_feature_cache():
+    """Disk cache for fitted preprocessors, shared by every pipeline and CV fold
+
+    Pipeline caches the fitted preprocessor keyed by its parameters and the
+    training rows, so each fold's TF-IDF is fitted once and reused by every
+    classifier and hyperparameter setting that trains on that fold.
+    """
+    return joblib.Memory(FEATURE_CACHE_PATH or tempfile.mkdtemp(prefix="verifi-features-"), verbose=0)
+
+def remove_feature_cache(memory):
+    """Delete a per-run cache; a configured TRAIN_FEATURE_CACHE is kept"""
+    if memory is not None and not FEATURE_CACHE_PATH:
+        shutil.rmtree(memory.location, ignore_errors=True)
+
+def estimator_jobs():
+    """Cores for one estimator: all of them only when candidates are not already fitted in parallel"""
+    return -1 if TRAIN_JOBS == 1 else 1
+
+def evaluate_models(X_train, X_test, y_train, y_test, preprocessor, memory=None):
     """Evaluate multiple models with enhanced feature set"""
     
     models = {
@@ -75,7 +151,7 @@ def evaluate_models(X_train, X_test, y_train, y_test, preprocessor):
             min_samples_leaf=2,
             random_state=42,
             class_weight='balanced',
-            n_jobs=-1
+            n_jobs=estimator_jobs()
         ),
         'Gradient Boosting': GradientBoostingClassifier(
             n_estimators=100,
@@ -108,55 +184,87 @@ def evaluate_models(X_train, X_test, y_train, y_test, preprocessor):
     print("Evaluating models:")
     print("-" * 50)
     
-    for name, model in models.items():
-        # Create pipeline with new preprocessor
-        pipe = Pipeline([
+    pipes = {
+        name: Pipeline([
             ('preprocessor', preprocessor),
             ('classifier', model)
-        ])
-        
-        # Train model
-        pipe.fit(X_train, y_train)
-        
-        # Evaluate
-        train_score = pipe.score(X_train, y_train)
-        test_score = pipe.score(X_test, y_test)
-        
-        # Cross-validation
-        cv_scores = cross_val_score(pipe, X_train, y_train, cv=5, scoring='f1')
-        
-        # ROC-AUC
-        y_prob = pipe.predict_proba(X_test)[:, 1]
-        roc_auc = roc_auc_score(y_test, y_prob)
-        
-        results[name] = {
-            'train_acc': train_score,
-            'test_acc': test_score,
-            'cv_f1_mean': cv_scores.mean(),
-            'cv_f1_std': cv_scores.std(),
-            'roc_auc': roc_auc,
-            'model': pipe
-        }
+        ], memory=memory)
+        for name, model in models.items()
+    }
+    
+    if memory is not None:
+        # Fill the feature cache for the full training set and every CV fold once,
+        # so the candidates running in parallel all reuse the same fitted features
+        warm_up = Pipeline([('preprocessor', preprocessor), ('classifier', DummyClassifier())], memory=memory)
+        warm_up.fit(X_train, y_train)
+        cross_val_score(warm_up, X_train, y_train, cv=5, scoring='f1')
+    
+    # The candidate families train in parallel; each is seeded, so results do not depend on scheduling
+    evaluated = joblib.Parallel(n_jobs=TRAIN_JOBS)(
+        joblib.delayed(evaluate_candidate)(pipe, X_train, X_test, y_train, y_test)
+        for pipe in pipes.values()
+    )
+    
+    for name, result in zip(pipes, evaluated):
+        results[name] = result
         
         print(f"{name}:")
-        print(f"  Train Accuracy: {train_score:.4f}")
-        print(f"  Test Accuracy: {test_score:.4f}")
-        print(f"  CV F1 Score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
-        print(f"  ROC-AUC: {roc_auc:.4f}")
+        print(f"  Train Accuracy: {result['train_acc']:.4f}")
+        print(f"  Test Accuracy: {result['test_acc']:.4f}")
+        print(f"  CV F1 Score: {result['cv_f1_mean']:.4f} (+/- {result['cv_f1_std'] * 2:.4f})")
+        print(f"  ROC-AUC: {result['roc_auc']:.4f}")
+        print(f"  Fit Time: {result['fit_seconds']:.2f}s (CV: {result['cv_seconds']:.2f}s)")
         print()
         
         # Select best model based on CV F1 score
-        if cv_scores.mean() > best_score:
-            best_score = cv_scores.mean()
-            best_model = pipe
+        if result['cv_f1_mean'] > best_score:
+            best_score = result['cv_f1_mean']
+            best_model = result['model']
             best_name = name
     
     print(f"Best model: {best_name} (CV F1: {best_score:.4f})")
     return best_model, best_name, results
 
-def hyperparameter_tuning(X_train, y_train):
-    """Perform hyperparameter tuning for Random Forest with new features"""
-    print("Performing hyperparameter tuning...")
+def evaluate_candidate(pipe, X_train, X_test, y_train, y_test):
+    """Fit one candidate pipeline and collect its scores and timings"""
+    # Train model
+    started = time.perf_counter()
+    pipe.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    
+    # Evaluate
+    train_score = pipe.score(X_train, y_train)
+    test_score = pipe.score(X_test, y_test)
+    
+    # Cross-validation
+    started = time.perf_counter()
+    cv_scores = cross_val_score(pipe, X_train, y_train, cv=5, scoring='f1')
+    cv_seconds = time.perf_counter() - started
+    
+    # ROC-AUC
+    y_prob = pipe.predict_proba(X_test)[:, 1]
+    roc_auc = roc_auc_score(y_test, y_prob)
+    
+    return {
+        'train_acc': train_score,
+        'test_acc': test_score,
+        'cv_f1_mean': cv_scores.mean(),
+        'cv_f1_std': cv_scores.std(),
+        'roc_auc': roc_auc,
+        'fit_seconds': fit_seconds,
+        'cv_seconds': cv_seconds,
+        'model': pipe
+    }
+
+def hyperparameter_tuning(X_train, y_train, memory=None, mode=TUNING_MODE):
+    """Perform hyperparameter tuning for Random Forest with new features
+
+    ``halving`` runs successive halving with the number of trees as the
+    budget: every setting starts with a small forest and only the best
+    1/TUNING_FACTOR of them are refitted with TUNING_FACTOR times more trees,
+    up to TUNING_MAX_ESTIMATORS. ``grid`` fits the full grid at every size.
+    """
+    print(f"Performing hyperparameter tuning ({mode})...")
     
     param_grid = {
         'classifier__n_estimators': [100, 200, 300],
@@ -167,24 +275,58 @@ def hyperparameter_tuning(X_train, y_train):
     
     pipe = Pipeline([
         ('preprocessor', create_feature_pipeline()),
-        ('classifier', RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=-1))
-    ])
-    
-    grid_search = GridSearchCV(
-        pipe, 
-        param_grid, 
-        cv=3, 
-        scoring='f1',
-        n_jobs=-1,
-        verbose=1
-    )
+        ('classifier', RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=estimator_jobs()))
+    ], memory=memory)
+    
+    if mode == 'grid':
+        search = GridSearchCV(
+            pipe, 
+            param_grid, 
+            cv=3, 
+            scoring='f1',
+            n_jobs=TRAIN_JOBS,
+            verbose=1
+        )
+    elif mode == 'halving':
+        # The tree count is the resource being budgeted, so it is not searched directly
+        del param_grid['classifier__n_estimators']
+        search = HalvingGridSearchCV(
+            pipe,
+            param_grid,
+            resource='classifier__n_estimators',
+            max_resources=TUNING_MAX_ESTIMATORS,
+            min_resources='exhaust',
+            factor=TUNING_FACTOR,
+            cv=3,
+            scoring='f1',
+            random_state=42,
+            n_jobs=TRAIN_JOBS,
+            verbose=1
+        )
+    else:
+        raise ValueError(f"Unknown tuning mode: {mode}")
     
-    grid_search.fit(X_train, y_train)
+    started = time.perf_counter()
+    search.fit(X_train, y_train)
+    print(f"Tuning time: {time.perf_counter() - started:.1f}s")
     
-    print(f"Best parameters: {grid_search.best_params_}")
-    print(f"Best CV score: {grid_search.best_score_:.4f}")
+    report_candidates(search.cv_results_)
+    print(f"Best parameters: {search.best_params_}")
+    print(f"Best CV score: {search.best_score_:.4f}")
     
-    return grid_search.best_estimator_
+    return search.best_estimator_
+
+def report_candidates(cv_results):
+    """Print the fit time and CV score of every tuning candidate"""
+    print(f"\n{'Round':>5} {'Trees':>5} {'Fit (s)':>8} {'CV F1':>7}  Parameters")
+    print("-" * 100)
+    rounds = cv_results.get('iter', [0] * len(cv_results['params']))
+    resources = cv_results.get('n_resources', [None] * len(cv_results['params']))
+    for i, params in enumerate(cv_results['params']):
+        trees = resources[i] if resources[i] is not None else params.get('classifier__n_estimators', '')
+        settings = ", ".join(f"{key.split('__', 1)[-1]}={value}" for key, value in params.items() if key != 'classifier__n_estimators')
+        print(f"{rounds[i]:>5} {trees:>5} {cv_results['mean_fit_time'][i]:>8.2f} {cv_results['mean_test_score'][i]:>7.4f}  {settings}")
+    print()
 
 def analyze_features(model, top_n=20):
     """Analyze top features for fraud detection including new fields"""
@@ -217,18 +359,7 @@ def analyze_features(model, top_n=20):
 
 def test_sample_predictions(model):
     """Test model with sample predictions including new fields"""
-    test_samples = pd.DataFrame([
-        {"text": "SEBI registered investment advisor. Mutual funds subject to market risks", "roi_percentage": 0, "timeframe": "unknown"},
-        {"text": "Guaranteed 25% returns in 2 weeks! Join our Telegram group", "roi_percentage": 25, "timeframe": "2 weeks"},
-        {"text": "ICICI Securities - diversified equity investments for long-term goals", "roi_percentage": 12, "timeframe": "annual"},
-        {"text": "Pre-IPO shares available! Send money to paytm@insider immediately", "roi_percentage": 300, "timeframe": "1 month"},
-        {"text": "Systematic investment in mutual funds helps achieve financial goals", "roi_percentage": 10, "timeframe": "annual"},
-        {"text": "URGENT: 300% returns in 3 days confirmed. Send money now!", "roi_percentage": 300, "timeframe": "3 days"},
-        {"text": "Angel One Limited - SEBI registered broker providing research reports", "roi_percentage": 0, "timeframe": "unknown"},
-        {"text": "Risk-free trading! Our AI guarantees 50% daily returns", "roi_percentage": 50, "timeframe": "daily"},
-        {"text": "Past performance is not indicative of future returns", "roi_percentage": 0, "timeframe": "unknown"},
-        {"text": "BREAKING: Secret billionaire strategy revealed! 500% returns guaranteed!", "roi_percentage": 500, "timeframe": "monthly"}
-    ])
+    test_samples = pd.DataFrame(SAMPLE_INPUTS)
     
     print("\nSample Predictions:")
     print("-" * 100)
@@ -244,46 +375,149 @@ def test_sample_predictions(model):
         print(f"Fraud probability: {prob[1]:.3f}")
         print("-" * 100)
 
-def main():
+def export_compact_model(model):
+    """Export the saved model to the compact memory-mapped format used by app.py"""
+    try:
+        export_compact(model, COMPACT_MODEL_PATH, SAMPLE_INPUTS, source_hash=file_digest(MODEL_PATH)[:16])
+        print(f"Compact model saved to: {COMPACT_MODEL_PATH} ({os.path.getsize(COMPACT_MODEL_PATH)} bytes)")
+    except ValueError as e:
+        # A stale artifact must not be served in place of the new model
+        if os.path.exists(COMPACT_MODEL_PATH):
+            os.remove(COMPACT_MODEL_PATH)
+        print(f"Compact export skipped: {e}")
+
+def cascade_features(X):
+    """First-tier feature matrix for rows of text, roi_percentage and timeframe"""
+    hash_features = 2 ** CASCADE_HASH_BITS if CASCADE_HASH_BITS else 0
+    return np.array([
+        feature_row(text, scan_keywords(text.lower()), roi, timeframe, hash_features)
+        for text, roi, timeframe in X[['text', 'roi_percentage', 'timeframe']].itertuples(index=False)
+    ])
+
+def calibrate_cascade(model, X_train, y_train, X_test, y_test, source_hash):
+    """Fit the rule pre-screen on the training split and pick its exit thresholds on the test split"""
+    tier = LogisticRegression(max_iter=1000, random_state=42)
+    tier.fit(cascade_features(X_train), y_train)
+    probabilities = tier.predict_proba(cascade_features(X_test))[:, 1]
+    
+    y_test = np.asarray(y_test)
+    model_predictions = model.predict(X_test)
+    # Same cut-off as the API's prediction label
+    tier_predictions = (probabilities > 0.5).astype(int)
+    low, high = choose_thresholds(
+        probabilities, tier_predictions == y_test, model_predictions == y_test,
+        CASCADE_MAX_ACCURACY_LOSS, CASCADE_MIN_CONFIDENCE
+    )
+    exits = (probabilities >= high) | (probabilities <= low)
+    cascade_predictions = np.where(exits, tier_predictions, model_predictions)
+    
+    calibration = {
+        "calibrated_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "samples": len(y_test),
+        "exit_rate": float(exits.mean()),
+        "model_accuracy": float((model_predictions == y_test).mean()),
+        "cascade_accuracy": float((cascade_predictions == y_test).mean()),
+        "max_accuracy_loss": CASCADE_MAX_ACCURACY_LOSS,
+        "min_confidence": CASCADE_MIN_CONFIDENCE
+    }
+    cascade = RuleCascade(
+        tier.coef_[0].tolist(), float(tier.intercept_[0]), float(low), float(high),
+        2 ** CASCADE_HASH_BITS if CASCADE_HASH_BITS else 0, source_hash, calibration
+    )
+    cascade.save(CASCADE_MODEL_PATH)
+    
+    print("\nCascade calibration:")
+    print("-" * 50)
+    print(f"Exit thresholds: fraud probability <= {low:.3f} or >= {high:.3f}")
+    print(f"Early exits: {calibration['exit_rate']:.1%} of {len(y_test)} test rows")
+    print(f"Accuracy: model {calibration['model_accuracy']:.4f}, cascade {calibration['cascade_accuracy']:.4f} "
+          f"(allowed loss {CASCADE_MAX_ACCURACY_LOSS})")
+    print(f"Cascade saved to: {CASCADE_MODEL_PATH}")
+    return cascade
+
+def calibrate_current_model():
+    """Recalibrate the cascade for the current model against the training dataset"""
+    model, version = load_current_model()
+    registry = ModelRegistry(MODEL_REGISTRY_PATH)
+    path = os.path.join(registry.version_dir(version), JOBLIB_FILE) if version else MODEL_PATH
+    
+    X, y = dataset_features(load_and_prepare_data())
+    # The same split as training, so the test rows are ones the model has not seen
+    X_train, X_test, y_train, y_test = split_dataset(X, y)
+    calibrate_cascade(model, X_train, y_train, X_test, y_test, file_digest(path)[:16])
+    if version:
+        registry.add_artifact(version, CASCADE_MODEL_PATH, CASCADE_FILE)
+        print(f"Cascade added to version {version}; reload the model to use it")
+
+def current_cascade_path():
+    """CASCADE_MODEL_PATH if it was calibrated for the saved model"""
+    try:
+        cascade = RuleCascade.load(CASCADE_MODEL_PATH)
+    except (OSError, ValueError):
+        return None
+    return CASCADE_MODEL_PATH if cascade.source_hash == file_digest(MODEL_PATH)[:16] else None
+
+def save_holdout(rows):
+    """Keep up to UPDATE_CHECK_ROWS held-out rows next to the model, so --update never rereads the dataset"""
+    rows = rows[['text', 'roi_percentage', 'timeframe', 'label']].head(UPDATE_CHECK_ROWS)
+    rows.to_csv(HOLDOUT_PATH, index=False)
+    print(f"Held-out rows for update checks saved to: {HOLDOUT_PATH} ({len(rows)} rows)")
+
+def publish_model(metadata):
+    """Publish the saved model as a new version in the model registry and activate it"""
+    version = ModelRegistry(MODEL_REGISTRY_PATH).publish(
+        MODEL_PATH,
+        COMPACT_MODEL_PATH if os.path.exists(COMPACT_MODEL_PATH) else None,
+        metadata,
+        cascade_path=current_cascade_path(),
+        holdout_path=HOLDOUT_PATH
+    )
+    print(f"Model published as version {version} in {MODEL_REGISTRY_PATH}")
+    return version
+
+def main(tuning=TUNING_MODE):
     print("Financial Advice Fraud Detection Model Training")
     print("=" * 60)
-    df = load_and_prepare_data()
+    X, y = dataset_features(load_and_prepare_data())
     
-    X = df[['text', 'roi_percentage', 'timeframe']].copy()
-    X['text'] = X['text'].fillna("").astype(str)
-    y = df['label'].astype(int)
-    
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split_dataset(X, y)
     
     print(f"\nTraining set size: {len(X_train)}")
     print(f"Test set size: {len(X_test)}")
     
     preprocessor = create_feature_pipeline()
-    best_model, best_name, results = evaluate_models(X_train, X_test, y_train, y_test, preprocessor)
+    feature_cache = create_feature_cache()
+    try:
+        best_model, best_name, results = evaluate_models(X_train, X_test, y_train, y_test, preprocessor, feature_cache)
     
-    if best_name == 'Random Forest':
-        print("\nPerforming hyperparameter tuning for Random Forest...")
-        tuned_model = hyperparameter_tuning(X_train, y_train)
+        if best_name == 'Random Forest':
+            print("\nPerforming hyperparameter tuning for Random Forest...")
+            tuned_model = hyperparameter_tuning(X_train, y_train, feature_cache, tuning)
         
-        # Compare tuned model
-        tuned_score = tuned_model.score(X_test, y_test)
-        original_score = best_model.score(X_test, y_test)
+            # Compare tuned model
+            tuned_score = tuned_model.score(X_test, y_test)
+            original_score = best_model.score(X_test, y_test)
         
-        if tuned_score > original_score:
-            print(f"Tuned model performs better: {tuned_score:.4f} vs {original_score:.4f}")
-            best_model = tuned_model
-        else:
-            print(f"Original model performs better: {original_score:.4f} vs {tuned_score:.4f}")
+            if tuned_score > original_score:
+                print(f"Tuned model performs better: {tuned_score:.4f} vs {original_score:.4f}")
+                best_model = tuned_model
+            else:
+                print(f"Original model performs better: {original_score:.4f} vs {tuned_score:.4f}")
+    finally:
+        remove_feature_cache(feature_cache)
+    # The saved pipeline must not point at the cache directory
+    best_model.set_params(memory=None)
     
     y_pred = best_model.predict(X_test)
     y_prob = best_model.predict_proba(X_test)[:, 1]
     
+    test_accuracy = best_model.score(X_test, y_test)
+    test_roc_auc = roc_auc_score(y_test, y_prob)
+    
     print(f"\nFinal Model Performance ({best_name}):")
     print("=" * 40)
-    print(f"Test Accuracy: {best_model.score(X_test, y_test):.4f}")
-    print(f"ROC-AUC Score: {roc_auc_score(y_test, y_prob):.4f}")
+    print(f"Test Accuracy: {test_accuracy:.4f}")
+    print(f"ROC-AUC Score: {test_roc_auc:.4f}")
     
     print("\nDetailed Classification Report:")
     print(classification_report(y_test, y_pred, target_names=['Legitimate', 'Fraudulent']))
@@ -298,6 +532,25 @@ def main():
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
     joblib.dump(best_model, MODEL_PATH)
     print(f"\nModel saved to: {MODEL_PATH}")
+    export_compact_model(best_model)
+    save_holdout(X_test.assign(label=y_test))
+    calibrate_cascade(best_model, X_train, y_train, X_test, y_test, file_digest(MODEL_PATH)[:16])
+    publish_model({
+        "model_type": best_name,
+        "classifier": type(best_model.named_steps['classifier']).__name__,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "dataset": os.path.basename(DATA_PATH),
+        "dataset_hash": file_digest(DATA_PATH),
+        "training_samples": len(X_train),
+        "test_samples": len(X_test),
+        "sklearn_version": sklearn.__version__,
+        "metrics": {
+            "test_accuracy": float(test_accuracy),
+            "roc_auc": float(test_roc_auc),
+            "cv_f1_mean": float(results[best_name]['cv_f1_mean']),
+            "cv_f1_std": float(results[best_name]['cv_f1_std'])
+        }
+    })
     
     test_sample_predictions(best_model) # Testing sample predictions with new format
     
@@ -312,15 +565,377 @@ def main():
             .named_transformers_['timeframe']
             .get_feature_names_out().tolist()
         )
-        print(f"\nTraining completed successfully!")
+        print("\nTraining completed successfully!")
         print(f"Model type: {best_name}")
         print(f"Features: {len(feature_names)}")
         print(f"Training samples: {len(X_train)}")
     except Exception as e:
-        print(f"\nTraining completed successfully!")
+        print("\nTraining completed successfully!")
         print(f"Model type: {best_name}")
         print(f"Features: Could not extract feature names ({e})")
         print(f"Training samples: {len(X_train)}")
 
+def read_chunks(columns=None, path=DATA_PATH):
+    """Yield (chunk, holdout mask) pairs over a labelled CSV without loading it whole"""
+    offset = 0
+    for chunk in pd.read_csv(path, chunksize=STREAM_CHUNK_ROWS, usecols=columns):
+        if 'text' in chunk:
+            chunk['text'] = chunk['text'].fillna("").astype(str)
+        if 'roi_percentage' in chunk or columns is None:
+            chunk['roi_percentage'] = chunk.get('roi_percentage', pd.Series(0, index=chunk.index)).fillna(0)
+        if 'timeframe' in chunk or columns is None:
+            chunk['timeframe'] = chunk.get('timeframe', pd.Series('unknown', index=chunk.index)).fillna('unknown').astype(str)
+        holdout = np.arange(offset, offset + len(chunk)) % STREAM_HOLDOUT_EVERY == 0
+        offset += len(chunk)
+        yield chunk, holdout
+
+def scan_dataset():
+    """First pass over the CSV: ROI statistics, timeframe categories and class counts"""
+    scaler = StandardScaler()
+    timeframes = set()
+    class_counts = np.zeros(2, dtype=np.int64)
+    training_samples = 0
+    test_samples = 0
+    for chunk, holdout in read_chunks(['roi_percentage', 'timeframe', 'label']):
+        train_rows = chunk[~holdout]
+        test_samples += int(holdout.sum())
+        if train_rows.empty:
+            continue
+        training_samples += len(train_rows)
+        scaler.partial_fit(train_rows[['roi_percentage']])
+        timeframes.update(train_rows['timeframe'])
+        class_counts += np.bincount(train_rows['label'].astype(int), minlength=2)[:2]
+    if training_samples == 0:
+        raise ValueError(f"No training rows in {DATA_PATH}")
+    return scaler, sorted(timeframes), class_counts, training_samples, test_samples
+
+def create_streaming_feature_pipeline(scaler, timeframes):
+    """Feature pipeline that needs no pass over the text: hashed n-grams, ROI and timeframe
+
+    The hashing vectorizer is stateless, the ROI statistics come from
+    scan_dataset and the timeframe categories are fixed, so the preprocessor
+    is complete before training starts.
+    """
+    text_pipeline = HashingVectorizer(
+        n_features=STREAM_HASH_FEATURES,
+        ngram_range=(1, 3),
+        stop_words='english',
+        lowercase=True,
+        strip_accents='unicode',
+        token_pattern=r'\b[a-zA-Z]{2,}\b',
+        alternate_sign=False,
+        norm='l2'
+    )
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('text', text_pipeline, 'text'),
+            ('returns', StandardScaler(), ['roi_percentage']),
+            ('timeframe', OneHotEncoder(categories=[timeframes], handle_unknown='ignore'), ['timeframe'])
+        ],
+        remainder='drop'
+    )
+    # Two rows whose ROI has the scanned mean and standard deviation give the fitted scaler the
+    # whole dataset's statistics; nothing else is learnt from them
+    mean, std = scaler.mean_[0], np.sqrt(scaler.var_[0])
+    preprocessor.fit(pd.DataFrame({'text': "", 'roi_percentage': [mean - std, mean + std], 'timeframe': timeframes[0]}))
+    return preprocessor
+
+def streaming_holdout():
+    """The first UPDATE_CHECK_ROWS held-out rows, read from the start of the CSV only"""
+    rows = []
+    remaining = UPDATE_CHECK_ROWS
+    for chunk, holdout in read_chunks(['text', 'roi_percentage', 'timeframe', 'label']):
+        if remaining <= 0:
+            break
+        test_rows = chunk[holdout].head(remaining)
+        rows.append(test_rows)
+        remaining -= len(test_rows)
+    return pd.concat(rows)
+
+def evaluate_streaming(model):
+    """Accuracy, confusion matrix and binned ROC-AUC on the held-out rows"""
+    cm = np.zeros((2, 2), dtype=np.int64)
+    histograms = np.zeros((2, STREAM_AUC_BINS), dtype=np.int64)
+    for chunk, holdout in read_chunks():
+        test_rows = chunk[holdout]
+        if test_rows.empty:
+            continue
+        y_true = test_rows['label'].astype(int).to_numpy()
+        y_prob = model.predict_proba(test_rows[['text', 'roi_percentage', 'timeframe']])[:, 1]
+        y_pred = (y_prob > 0.5).astype(int)
+        np.add.at(cm, (y_true, y_pred), 1)
+        bins = np.minimum((y_prob * STREAM_AUC_BINS).astype(np.int64), STREAM_AUC_BINS - 1)
+        np.add.at(histograms, (y_true, bins), 1)
+
+    negatives, positives = histograms
+    # Probability that a random fraudulent row outranks a random legitimate one, ties counting half
+    negatives_below = np.cumsum(negatives) - negatives
+    pairs = negatives.sum() * positives.sum()
+    roc_auc = float((positives * (negatives_below + 0.5 * negatives)).sum() / pairs) if pairs else float('nan')
+    total = cm.sum()
+    return {
+        'test_accuracy': float(np.trace(cm) / total) if total else float('nan'),
+        'roc_auc': roc_auc,
+        'confusion_matrix': cm
+    }
+
+def train_streaming(epochs=STREAM_EPOCHS):
+    """Train on the CSV chunk by chunk with a partial_fit classifier
+
+    Memory is bounded by STREAM_CHUNK_ROWS and the hashed feature width, not
+    by the dataset size. The result is the same Pipeline([preprocessor,
+    classifier]) layout as main(), so app.py serves it unchanged.
+    """
+    print("Financial Advice Fraud Detection Model Training (streaming)")
+    print("=" * 60)
+    print(f"Streaming data from: {DATA_PATH} ({STREAM_CHUNK_ROWS} rows per chunk)")
+    
+    scaler, timeframes, class_counts, training_samples, test_samples = scan_dataset()
+    print(f"Training set size: {training_samples}")
+    print(f"Test set size: {test_samples}")
+    print(f"Label distribution: {class_counts.tolist()}")
+    print(f"Timeframe categories: {timeframes}")
+    
+    preprocessor = create_streaming_feature_pipeline(scaler, timeframes)
+    # 'balanced' weights cannot be computed by partial_fit, so they come from the scan
+    class_weight = {
+        label: training_samples / (2 * count)
+        for label, count in enumerate(class_counts.tolist()) if count
+    }
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-5, class_weight=class_weight, random_state=42)
+    model = Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', classifier)
+    ])
+    
+    rng = np.random.RandomState(42)
+    for epoch in range(1, epochs + 1):
+        started = time.perf_counter()
+        for chunk, holdout in read_chunks():
+            train_rows = chunk[~holdout]
+            if train_rows.empty:
+                continue
+            # Shuffle within the chunk; a seeded generator keeps runs reproducible
+            train_rows = train_rows.iloc[rng.permutation(len(train_rows))]
+            X = preprocessor.transform(train_rows[['text', 'roi_percentage', 'timeframe']])
+            classifier.partial_fit(X, train_rows['label'].astype(int), classes=[0, 1])
+        evaluation = evaluate_streaming(model)
+        print(f"Epoch {epoch}/{epochs}: {time.perf_counter() - started:.1f}s, "
+              f"test accuracy {evaluation['test_accuracy']:.4f}, ROC-AUC {evaluation['roc_auc']:.4f}")
+    
+    cm = evaluation['confusion_matrix']
+    print("\nFinal Model Performance (Streaming SGD):")
+    print("=" * 40)
+    print(f"Test Accuracy: {evaluation['test_accuracy']:.4f}")
+    print(f"ROC-AUC Score: {evaluation['roc_auc']:.4f}")
+    print(f"True Negatives: {cm[0,0]}, False Positives: {cm[0,1]}")
+    print(f"False Negatives: {cm[1,0]}, True Positives: {cm[1,1]}")
+    
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(model, MODEL_PATH)
+    print(f"\nModel saved to: {MODEL_PATH}")
+    export_compact_model(model)
+    save_holdout(streaming_holdout())
+    publish_model({
+        "model_type": "Streaming SGD",
+        "classifier": type(classifier).__name__,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "dataset": os.path.basename(DATA_PATH),
+        "dataset_hash": file_digest(DATA_PATH),
+        "training_samples": training_samples,
+        "test_samples": test_samples,
+        "sklearn_version": sklearn.__version__,
+        "epochs": epochs,
+        "hash_features": STREAM_HASH_FEATURES,
+        "metrics": {
+            "test_accuracy": evaluation['test_accuracy'],
+            "roc_auc": evaluation['roc_auc']
+        }
+    })
+    
+    test_sample_predictions(model)
+
+def load_current_model():
+    """The registry's active model, or MODEL_PATH when nothing is published"""
+    registry = ModelRegistry(MODEL_REGISTRY_PATH)
+    version = registry.active_version()
+    path = os.path.join(registry.version_dir(version), JOBLIB_FILE) if version else MODEL_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No trained model at {path}")
+    return joblib.load(path), version
+
+def update_classifier(classifier, read_training_chunks, epochs):
+    """Continue training a fitted classifier on new feature rows, returning the method used
+
+    partial_fit classifiers take more passes over the new rows. Forests and
+    gradient boosting keep their fitted trees and add UPDATE_ESTIMATORS
+    trees or stages fitted on the new rows only. Other classifiers, such as
+    logistic regression or an SVM, can only be refitted on the whole corpus,
+    which is a full training rather than an update.
+    """
+    if hasattr(classifier, 'partial_fit'):
+        for _ in range(epochs):
+            for X, y in read_training_chunks():
+                classifier.partial_fit(X, y, classes=classifier.classes_)
+        return f"partial_fit x{epochs}"
+
+    if isinstance(classifier, (RandomForestClassifier, GradientBoostingClassifier)):
+        # Tree ensembles cannot be fitted chunk by chunk, so the new rows are gathered
+        batches = list(read_training_chunks())
+        if not batches:
+            raise ValueError("No new rows to train on")
+        X = sparse.vstack([X for X, _ in batches]).tocsr()
+        y = np.concatenate([y for _, y in batches])
+        if len(np.unique(y)) < len(classifier.classes_):
+            raise ValueError("The update data must contain both legitimate and fraudulent examples")
+        added = UPDATE_ESTIMATORS
+        classifier.set_params(warm_start=True, n_estimators=classifier.n_estimators + added)
+        classifier.fit(X, y)
+        classifier.set_params(warm_start=False)
+        return f"warm_start +{added} estimators"
+
+    raise ValueError(
+        f"{type(classifier).__name__} cannot be updated incrementally; add the new rows to {DATA_PATH} "
+        "and retrain with train.py, or use train.py --streaming for a model that supports --update"
+    )
+
+def regression_slice(version):
+    """Held-out rows saved with the current model, or None if it was published without them"""
+    directory = ModelRegistry(MODEL_REGISTRY_PATH).version_dir(version) if version else None
+    path = os.path.join(directory, HOLDOUT_FILE) if directory else HOLDOUT_PATH
+    if not os.path.exists(path):
+        print(f"⚠️ No held-out rows saved with {version or MODEL_PATH}; skipping the reference check")
+        return None
+    rows = pd.read_csv(path)
+    rows['text'] = rows['text'].fillna("").astype(str)
+    rows['roi_percentage'] = rows['roi_percentage'].fillna(0)
+    rows['timeframe'] = rows['timeframe'].fillna('unknown').astype(str)
+    return rows
+
+def accuracy(model, rows):
+    if rows is None or rows.empty:
+        return None
+    return float(model.score(rows[['text', 'roi_percentage', 'timeframe']], rows['label'].astype(int)))
+
+def update_model(feedback_path, epochs=STREAM_EPOCHS):
+    """Update the current model with newly labelled rows and publish it if it passes the regression check
+
+    Only the classifier learns: the fitted preprocessing (TF-IDF vocabulary
+    or hashing, ROI scaling, timeframe categories) is kept, so the update
+    costs time proportional to the new rows plus a bounded check.
+    """
+    print("Financial Advice Fraud Detection Model Update")
+    print("=" * 60)
+    started = time.perf_counter()
+    current, parent_version = load_current_model()
+    updated, _ = load_current_model()
+    parent_metadata = ModelRegistry(MODEL_REGISTRY_PATH).metadata(parent_version) if parent_version else {}
+    print(f"Updating {parent_version or MODEL_PATH} with: {feedback_path}")
+    
+    preprocessor = updated.named_steps['preprocessor']
+    classifier = updated.named_steps['classifier']
+    new_rows = 0
+    
+    def read_training_chunks():
+        nonlocal new_rows
+        new_rows = 0
+        for chunk, holdout in read_chunks(path=feedback_path):
+            train_rows = chunk[~holdout]
+            if train_rows.empty:
+                continue
+            new_rows += len(train_rows)
+            yield preprocessor.transform(train_rows[['text', 'roi_percentage', 'timeframe']]), train_rows['label'].astype(int).to_numpy()
+    
+    method = update_classifier(classifier, read_training_chunks, epochs)
+    if new_rows == 0:
+        raise ValueError(f"No training rows in {feedback_path}")
+    print(f"Updated with {new_rows} rows ({method}) in {time.perf_counter() - started:.1f}s")
+    
+    # Regression check: the update must not break the existing slice and must not get worse on the new data
+    reference = regression_slice(parent_version)
+    feedback_holdout = pd.concat([chunk[holdout] for chunk, holdout in read_chunks(path=feedback_path)])
+    check = {
+        "reference_rows": 0 if reference is None else len(reference),
+        "feedback_holdout_rows": len(feedback_holdout),
+        "reference_accuracy_before": accuracy(current, reference),
+        "reference_accuracy_after": accuracy(updated, reference),
+        "feedback_accuracy_before": accuracy(current, feedback_holdout),
+        "feedback_accuracy_after": accuracy(updated, feedback_holdout)
+    }
+    passed = True
+    if check["reference_accuracy_before"] is not None:
+        passed &= check["reference_accuracy_after"] >= check["reference_accuracy_before"] - UPDATE_MAX_REGRESSION
+    if check["feedback_accuracy_before"] is not None:
+        passed &= check["feedback_accuracy_after"] >= check["feedback_accuracy_before"]
+    
+    print("\nRegression check:")
+    print("-" * 50)
+    for name, value in check.items():
+        print(f"  {name}: {value if value is None or isinstance(value, int) else f'{value:.4f}'}")
+    if not passed:
+        print(f"❌ Update rejected: accuracy regressed (tolerance {UPDATE_MAX_REGRESSION})")
+        return None
+    
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(updated, MODEL_PATH)
+    print(f"\nModel saved to: {MODEL_PATH}")
+    export_compact_model(updated)
+    # The new version is checked against the same held-out rows as its parent
+    if reference is not None:
+        save_holdout(reference)
+    elif os.path.exists(HOLDOUT_PATH):
+        os.remove(HOLDOUT_PATH)
+    version = publish_model({
+        "model_type": "Incremental update",
+        "classifier": type(classifier).__name__,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "parent_version": parent_version,
+        # The saved held-out rows stay those of the parent's training data
+        "dataset": parent_metadata.get("dataset"),
+        "dataset_hash": parent_metadata.get("dataset_hash"),
+        "update_data": os.path.basename(feedback_path),
+        "update_data_hash": file_digest(feedback_path),
+        "update_method": method,
+        "training_samples": new_rows,
+        "test_samples": check["feedback_holdout_rows"],
+        "sklearn_version": sklearn.__version__,
+        "metrics": {
+            "test_accuracy": check["feedback_accuracy_after"],
+            "regression_check": check
+        }
+    })
+    print(f"✅ Update finished in {time.perf_counter() - started:.1f}s")
+    return version
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the financial advice fraud detection model")
+    parser.add_argument('--export-compact', action='store_true',
+                        help='only export the existing model to the compact format')
+    parser.add_argument('--streaming', action='store_true',
+                        help='train out of core on CSV chunks with hashed features and SGD')
+    parser.add_argument('--update', metavar='CSV',
+                        help='update the current model with newly labelled text,label,roi_percentage,timeframe rows')
+    parser.add_argument('--epochs', type=int, default=STREAM_EPOCHS,
+                        help='passes over the data in streaming and update modes')
+    parser.add_argument('--tuning', choices=['halving', 'grid'], default=TUNING_MODE,
+                        help='hyperparameter search: successive halving (default) or the full grid')
+    parser.add_argument('--calibrate-cascade', action='store_true',
+                        help='only recalibrate the rule pre-screen for the current model')
+    args = parser.parse_args()
+    
+    if args.export_compact:
+        export_compact_model(joblib.load(MODEL_PATH))
+    elif args.calibrate_cascade:
+        calibrate_current_model()
+    elif args.update:
+        try:
+            version = update_model(args.update, args.epochs)
+        except ValueError as e:
+            print(f"❌ Update failed: {e}")
+            version = None
+        if version is None:
+            raise SystemExit(1)
+    elif args.streaming:
+        train_streaming(args.epochs)
+    else:
+        main(args.tuning)